@@ -1,16 +1,42 @@
 from __future__ import annotations
 
-from typing import Any
+from dataclasses import asdict
+from typing import Any, AsyncIterator
 
-from fastapi import APIRouter, Depends
+import orjson
+from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 
 from app.api.v1.deps import require_api_key
-from app.contracts.input_v1 import EstimateInputV1
+from app.common.errors import AppError, batch_error_item, batch_validation_error_item, raise_http
+from app.common.ndjson import (
+    NDJSON_MEDIA_TYPE,
+    NdjsonLineTooLong,
+    NdjsonStreamingResponse,
+    iter_ndjson_lines,
+)
+from app.contracts.input_v1 import CalculateBatchBody, EstimateInputV1, SweepBodyV1
+from app.contracts.result_v1 import CalculateBatchOut
 from app.domain.calc import get_calc_engine_v0
+from app.domain.calc.calculators.wall_painting_v1 import sweep_wall_painting_v1
+from app.domain.calc.errors import CalcError, CalcInvalidInput, CalcTimeout
+from app.domain.calc.executor import get_calc_executor
+from app.settings import settings
 
 router = APIRouter(prefix="/calculations")
 
 
+def _validation_error_item(index: int, e: ValidationError) -> dict[str, Any]:
+    return batch_validation_error_item(index, e, "Invalid calculation input")
+
+
+def _outcome_item(index: int, outcome: dict[str, Any] | CalcError) -> dict[str, Any]:
+    if isinstance(outcome, CalcError):
+        return batch_error_item(index, outcome.code, outcome.message)
+    return {"index": index, "ok": True, "result": outcome}
+
+
 @router.post("/calculate")
 def calculate(
     body: EstimateInputV1,
@@ -18,3 +44,146 @@ def calculate(
 ) -> dict[str, Any]:
     engine = get_calc_engine_v0()
     return engine.calculate(body.model_dump())
+
+
+@router.get("/cache-stats")
+def cache_stats(
+    _=Depends(require_api_key),
+) -> dict[str, Any]:
+    cache = get_calc_engine_v0().cache
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **asdict(cache.stats())}
+
+
+@router.post("/calculate-batch", response_model=CalculateBatchOut)
+def calculate_batch(
+    body: CalculateBatchBody,
+    _=Depends(require_api_key),
+):
+    if len(body.items) > settings.calc_batch_max_items:
+        raise_http(
+            AppError(
+                code="batch_too_large",
+                message=f"Batch must contain at most {settings.calc_batch_max_items} items",
+                status_code=413,
+            )
+        )
+
+    items: list[dict[str, Any] | None] = [None] * len(body.items)
+    valid_indexes: list[int] = []
+    valid_inputs: list[dict[str, Any]] = []
+    for i, raw in enumerate(body.items):
+        try:
+            valid_inputs.append(EstimateInputV1.model_validate(raw).model_dump())
+        except ValidationError as e:
+            items[i] = _validation_error_item(i, e)
+            continue
+        valid_indexes.append(i)
+
+    try:
+        outcomes = get_calc_executor().calculate_many(valid_inputs)
+    except CalcTimeout as e:
+        raise_http(AppError(code=e.code, message=e.message, status_code=504))
+    for i, outcome in zip(valid_indexes, outcomes):
+        items[i] = _outcome_item(i, outcome)
+
+    ok_count = sum(1 for item in items if item and item["ok"])
+    return {"items": items, "ok_count": ok_count, "error_count": len(items) - ok_count}
+
+
+@router.post("/sweep")
+def sweep(
+    body: SweepBodyV1,
+    _=Depends(require_api_key),
+) -> dict[str, Any]:
+    axes = body.axes.model_dump(exclude_none=True)
+    variants = 1
+    for values in axes.values():
+        variants *= len(values)
+    if variants > settings.calc_sweep_max_variants:
+        raise_http(
+            AppError(
+                code="sweep_too_large",
+                message=f"Sweep must contain at most {settings.calc_sweep_max_variants} variants",
+                status_code=413,
+            )
+        )
+
+    prices = body.prices.model_dump(exclude_none=True) if body.prices else None
+    try:
+        return sweep_wall_painting_v1(body.params.model_dump(exclude_none=True), axes, prices)
+    except CalcInvalidInput as e:
+        raise_http(AppError(code=e.code, message=e.message, status_code=422))
+    except CalcError as e:
+        raise_http(AppError(code=e.code, message=e.message, status_code=500))
+
+
+async def _stream_results(request: Request) -> AsyncIterator[bytes]:
+    """
+    Читает NDJSON-вход по строкам и отдаёт результаты порциями по
+    calc_stream_chunk_items в исходном порядке. Следующая порция входа читается
+    только после того, как предыдущая отправлена клиенту, поэтому память
+    ограничена размером порции.
+    """
+    executor = get_calc_executor()
+    chunk_size = max(1, settings.calc_stream_chunk_items)
+    # (index, валидный вход | None, готовая строка-ошибка | None)
+    chunk: list[tuple[int, dict[str, Any] | None, dict[str, Any] | None]] = []
+
+    async def _flush() -> bytes:
+        inputs = [item for _, item, _ in chunk if item is not None]
+        try:
+            computed: list[Any] = await run_in_threadpool(executor.calculate_many, inputs)
+        except CalcError as e:
+            computed = [e] * len(inputs)
+        outcomes = iter(computed)
+        out = [
+            orjson.dumps(error if item is None else _outcome_item(index, next(outcomes))) + b"\n"
+            for index, item, error in chunk
+        ]
+        chunk.clear()
+        return b"".join(out)
+
+    lines = iter_ndjson_lines(request.stream(), max_line_bytes=settings.calc_stream_max_line_bytes)
+    try:
+        async for index, line in lines:
+            try:
+                raw = orjson.loads(line)
+                chunk.append((index, EstimateInputV1.model_validate(raw).model_dump(), None))
+            except orjson.JSONDecodeError:
+                chunk.append((index, None, batch_error_item(index, "invalid_json", "Line is not valid JSON")))
+            except ValidationError as e:
+                chunk.append((index, None, _validation_error_item(index, e)))
+
+            if len(chunk) >= chunk_size:
+                yield await _flush()
+    except NdjsonLineTooLong as e:
+        # границу следующей строки уже не восстановить — досчитываем накопленное и завершаем поток
+        chunk.append((e.line_no, None, batch_error_item(e.line_no, "line_too_long", str(e))))
+
+    if chunk:
+        yield await _flush()
+
+
+@router.post(
+    "/calculate-stream",
+    summary="Stream Engine V0 calculations (NDJSON in, NDJSON out)",
+    response_class=NdjsonStreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                NDJSON_MEDIA_TYPE: {
+                    "schema": {"$ref": "#/components/schemas/EstimateInputV1"},
+                },
+            },
+        },
+    },
+)
+async def calculate_stream(
+    request: Request,
+    _=Depends(require_api_key),
+) -> NdjsonStreamingResponse:
+    # одна строка EstimateInputV1 на вход -> одна строка {index, ok, result | error} на выход
+    return NdjsonStreamingResponse(_stream_results(request))
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 
 from app.api.v1.deps import require_api_key
+from app.common.errors import AppError, raise_http
 from app.contracts.engine_v1.input import EngineInput
 from app.contracts.engine_v1.result import EngineResult
-from app.domain.calc.engine_v1_skeleton import calculate_v1
+from app.domain.calc.errors import CalcInvalidInput, CalcTimeout
+from app.domain.calc.executor import get_calc_executor
+from app.domain.calc.result_projection import parse_include, project_engine_result_json
 
 router = APIRouter(prefix="/engine")
 
@@ -17,6 +20,28 @@ router = APIRouter(prefix="/engine")
 )
 def calculate_engine_v1(
     body: EngineInput,
+    include: str | None = Query(
+        default=None,
+        description="Comma-separated EngineResult sections to return, e.g. works,totals,meta",
+    ),
+    compact: bool = Query(
+        default=False,
+        description="Omit echoed input: inputs, project_profile and per-work parameters/dependencies",
+    ),
+    timings: bool = Query(
+        default=False,
+        description="Add per-stage wall/CPU time to meta.timings",
+    ),
     _=Depends(require_api_key),
-) -> EngineResult:
-    return calculate_v1(body)
+):
+    try:
+        sections = parse_include(include)
+        result = get_calc_executor().calculate_v1(body, timings=timings)
+        # JSON-байты сразу из модели: без повторной валидации и сериализации через
+        # response_model (он остаётся только для схемы OpenAPI)
+        content = project_engine_result_json(result, include=sections, compact=compact)
+        return Response(content=content, media_type="application/json")
+    except CalcInvalidInput as e:
+        raise_http(AppError(code=e.code, message=e.message, status_code=422))
+    except CalcTimeout as e:
+        raise_http(AppError(code=e.code, message=e.message, status_code=504))
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import APIRouter, Depends
+from pydantic import ValidationError
+
+from app.api.v1.deps import require_api_key
+from app.common.errors import AppError, batch_error_item, batch_validation_error_item, raise_http
+from app.contracts.intake_v1_1 import IntakeBatchBody, IntakeBatchOut, ProjectIntakeV1_1
+from app.domain.calc.errors import CalcTimeout
+from app.domain.intake.batch import evaluate_intake_batch
+from app.settings import settings
+
+router = APIRouter(prefix="/intake")
+
+
+@router.post("/evaluate-batch", response_model=IntakeBatchOut)
+def evaluate_batch(
+    body: IntakeBatchBody,
+    _=Depends(require_api_key),
+):
+    if len(body.items) > settings.intake_batch_max_items:
+        raise_http(
+            AppError(
+                code="batch_too_large",
+                message=f"Batch must contain at most {settings.intake_batch_max_items} items",
+                status_code=413,
+            )
+        )
+
+    items: list[dict[str, Any] | None] = [None] * len(body.items)
+    valid_indexes: list[int] = []
+    valid_intakes: list[ProjectIntakeV1_1] = []
+    for i, raw in enumerate(body.items):
+        try:
+            valid_intakes.append(ProjectIntakeV1_1.model_validate(raw))
+        except ValidationError as e:
+            items[i] = batch_validation_error_item(i, e, "Invalid intake")
+            continue
+        valid_indexes.append(i)
+
+    try:
+        evaluations = evaluate_intake_batch(valid_intakes)
+    except CalcTimeout as e:
+        raise_http(AppError(code=e.code, message=e.message, status_code=504))
+    for i, evaluation in zip(valid_indexes, evaluations):
+        if evaluation.output is None:
+            items[i] = batch_error_item(
+                i,
+                "location_profile_not_found",
+                f"Unknown location profile: {evaluation.location_profile_id}",
+            )
+            continue
+        items[i] = {
+            "index": i,
+            "ok": True,
+            "location_profile_id": evaluation.location_profile_id,
+            "output": evaluation.output,
+        }
+
+    ok_count = sum(1 for item in items if item and item["ok"])
+    return {"items": items, "ok_count": ok_count, "error_count": len(items) - ok_count}
@@ -1,16 +1,22 @@
 from __future__ import annotations
 
+from typing import Iterable
+
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
 
 
 class BodySizeLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, max_bytes: int):
+    def __init__(self, app, max_bytes: int, exempt_paths: Iterable[str] = ()):
         super().__init__(app)
         self.max_bytes = max_bytes
+        # потоковые эндпоинты сами ограничивают память построчно
+        self.exempt_paths = frozenset(exempt_paths)
 
     async def dispatch(self, request: Request, call_next):
+        if request.url.path in self.exempt_paths:
+            return await call_next(request)
         cl = request.headers.get("content-length")
         if cl is not None:
             try:
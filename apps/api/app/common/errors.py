@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Any
+
 from fastapi import HTTPException
+from pydantic import ValidationError
 
 
 @dataclass
@@ -13,3 +16,20 @@ class AppError(Exception):
 
 def raise_http(err: AppError) -> None:
     raise HTTPException(status_code=err.status_code, detail={"code": err.code, "message": err.message})
+
+
+def batch_error_item(index: int, code: str, message: str, details: list[Any] | None = None) -> dict[str, Any]:
+    """Элемент батч-ответа с ошибкой: {"index", "ok": False, "error": {code, message[, details]}}."""
+    error: dict[str, Any] = {"code": code, "message": message}
+    if details is not None:
+        error["details"] = details
+    return {"index": index, "ok": False, "error": error}
+
+
+def batch_validation_error_item(index: int, e: ValidationError, message: str) -> dict[str, Any]:
+    return batch_error_item(
+        index,
+        "validation_error",
+        message,
+        e.errors(include_url=False, include_input=False, include_context=False),
+    )
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any
+
+import orjson
+
+
+def canonical_json(data: Any) -> bytes:
+    """Детерминированный JSON: ключи отсортированы, без пробелов."""
+    return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class NdjsonLineTooLong(Exception):
+    def __init__(self, line_no: int, max_bytes: int):
+        super().__init__(f"NDJSON line {line_no} exceeds {max_bytes} bytes")
+        self.line_no = line_no
+        self.max_bytes = max_bytes
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    *,
+    max_line_bytes: int,
+) -> AsyncIterator[tuple[int, bytes]]:
+    """
+    Режет поток байтов на строки NDJSON по мере поступления.
+
+    Отдаёт (номер строки с 0, строка) для непустых строк. В памяти держится
+    только один неполный хвост, не длиннее max_line_bytes.
+    """
+    pending = b""
+    line_no = 0
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if len(line) > max_line_bytes:
+                raise NdjsonLineTooLong(line_no, max_line_bytes)
+            if line.strip():
+                yield line_no, line
+            line_no += 1
+        if len(pending) > max_line_bytes:
+            raise NdjsonLineTooLong(line_no, max_line_bytes)
+    if pending.strip():
+        yield line_no, pending
+
+
+class NdjsonStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse для эндпоинтов, которые сами читают тело запроса
+    во время отдачи ответа.
+
+    Базовый класс параллельно слушает receive() ради http.disconnect и при этом
+    забирает себе чанки тела запроса. Здесь receive принадлежит генератору,
+    а разрыв соединения проявится ошибкой на send().
+    """
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -16,6 +16,15 @@ class WorkStatus(str, Enum):
     DRAFT = "DRAFT"
 
 
+class BomLine(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    resource_id: str
+    section: str
+    quantity: Optional[float] = None
+    unit: Optional[str] = None
+
+
 class WorkResult(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -26,6 +35,8 @@ class WorkResult(BaseModel):
     provided_params: List[str] = Field(default_factory=list)
     expected_sections: List[str] = Field(default_factory=list)
     parameters: Dict[str, Any] = Field(default_factory=dict)
+    formula_values: Dict[str, Any] = Field(default_factory=dict)
+    bom: List[BomLine] = Field(default_factory=list)
     dependencies: List[str] = Field(default_factory=list)
     warnings: List[str] = Field(default_factory=list)
 
@@ -78,6 +89,16 @@ class TotalsResult(BaseModel):
     time_range: Optional[RangeValue] = None
 
 
+class StageTimingItem(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    stage: str
+    wall_ms: float
+    cpu_ms: float
+    units: int = 0
+    calls: int = 0
+
+
 class EngineMeta(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -86,6 +107,7 @@ class EngineMeta(BaseModel):
     created_at: datetime
     trace_id: str
     warnings: List[str] = Field(default_factory=list)
+    timings: Optional[List[StageTimingItem]] = None
 
 
 class EngineResult(BaseModel):
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Literal, Optional, Type
+from typing import Annotated, Any, Dict, List, Literal, Optional, Type
 
-from pydantic import BaseModel, Field, create_model
+from pydantic import BaseModel, Field, create_model, model_validator
 
 
 # =========================
@@ -49,6 +49,46 @@ class EstimateInputV1(BaseModel):
     prices: Optional[PricesV1] = None
 
 
+WallBase = Literal["concrete", "plaster", "drywall", "painted_wall", "wallpaper_paintable"]
+WallQuality = Literal["econom", "comfort", "premium"]
+
+
+class WallPaintingSweepParamsV1(BaseModel):
+    area_m2: float = Field(..., gt=0)
+    coats: Optional[int] = Field(default=None, ge=1, le=6)
+    base: Optional[WallBase] = None
+    quality: Optional[WallQuality] = None
+    waste_pct: Optional[float] = Field(default=None, ge=0, le=30)
+
+
+class WallPaintingSweepAxesV1(BaseModel):
+    base: Optional[List[WallBase]] = Field(default=None, min_length=1)
+    quality: Optional[List[WallQuality]] = Field(default=None, min_length=1)
+    coats: Optional[List[Annotated[int, Field(ge=1, le=6)]]] = Field(default=None, min_length=1)
+    waste_pct: Optional[List[Annotated[float, Field(ge=0, le=30)]]] = Field(default=None, min_length=1)
+
+
+class SweepBodyV1(BaseModel):
+    work_id: Literal["wall_painting_v1"]
+    params: WallPaintingSweepParamsV1
+    axes: WallPaintingSweepAxesV1
+    prices: Optional[PricesV1] = None
+
+    @model_validator(mode="after")
+    def _fixed_or_varied(self) -> "SweepBodyV1":
+        for name in ("base", "quality"):
+            if getattr(self.params, name) is None and getattr(self.axes, name) is None:
+                raise ValueError(f"{name} must be set in params or varied in axes")
+        if not self.axes.model_dump(exclude_none=True):
+            raise ValueError("axes must vary at least one parameter")
+        return self
+
+
+class CalculateBatchBody(BaseModel):
+    # элементы валидируются поштучно, чтобы ошибка одного не валила весь батч
+    items: List[Dict[str, Any]] = Field(..., min_length=1)
+
+
 # =========================
 # Compatibility shim for missing names
 # =========================
@@ -256,6 +256,8 @@ class RulesEngineOutput(BaseModel):
     visible_fields: List[str] = Field(default_factory=list)
     required_fields: List[str] = Field(default_factory=list)
     applied_defaults: List[AppliedDefault] = Field(default_factory=list)
+    rules_version: Optional[str] = None
+    matched_rules: List[str] = Field(default_factory=list)  # rule_id сработавших правил, для пересчёта
 
 
 class ProjectIntakeV1_1(BaseModel):
@@ -362,3 +364,28 @@ class LegacyProjectIntake(BaseModel):
 
     def effective_version(self) -> IntakeVersion:
         return self.intake_version or IntakeVersion.V1_0
+
+
+class IntakeBatchBody(BaseModel):
+    # элементы валидируются поштучно, чтобы ошибка одного не валила весь батч
+    items: List[Dict[str, Any]] = Field(..., min_length=1)
+
+
+class IntakeErrorOut(BaseModel):
+    code: str
+    message: str
+    details: Optional[List[Dict[str, Any]]] = None
+
+
+class IntakeBatchItemOut(BaseModel):
+    index: int
+    ok: bool
+    location_profile_id: Optional[str] = None
+    output: Optional[RulesEngineOutput] = None
+    error: Optional[IntakeErrorOut] = None
+
+
+class IntakeBatchOut(BaseModel):
+    items: List[IntakeBatchItemOut] = Field(default_factory=list)
+    ok_count: int = 0
+    error_count: int = 0
@@ -91,6 +91,25 @@ class EstimateResultV1(BaseModel):
     cost: EstimateResultCostV1
 
 
+class CalcErrorOut(BaseModel):
+    code: str
+    message: str
+    details: Optional[List[Dict[str, Any]]] = None
+
+
+class CalculateBatchItemOut(BaseModel):
+    index: int
+    ok: bool
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[CalcErrorOut] = None
+
+
+class CalculateBatchOut(BaseModel):
+    items: List[CalculateBatchItemOut] = Field(default_factory=list)
+    ok_count: int = 0
+    error_count: int = 0
+
+
 class RecalcOut(BaseModel):
     estimate_id: str
     version_no: int
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping
+
+import numpy as np
+
+from app.contracts.engine_v1.profile import CalculationProfile, FormulaSpec
+from app.contracts.engine_v1.result import BomLine, ResourceItem, WorkResult
+from app.domain.calc.errors import CalcFailed
+from app.domain.calc.formulas import CompiledFormula, compile_formula
+
+# resource_type из профиля -> секция EngineResult
+_SECTIONS: Mapping[str, str] = MappingProxyType(
+    {
+        "material": "materials",
+        "materials": "materials",
+        "tool": "tools",
+        "tools": "tools",
+        "equipment": "equipment",
+    }
+)
+BOM_SECTIONS: tuple[str, ...] = ("materials", "tools", "equipment")
+
+# единица -> (каноническая единица, множитель к ней)
+_UNITS: Mapping[str, tuple[str, float]] = MappingProxyType(
+    {
+        "g": ("kg", 0.001),
+        "г": ("kg", 0.001),
+        "kg": ("kg", 1.0),
+        "кг": ("kg", 1.0),
+        "t": ("kg", 1000.0),
+        "т": ("kg", 1000.0),
+        "ml": ("l", 0.001),
+        "мл": ("l", 0.001),
+        "l": ("l", 1.0),
+        "л": ("l", 1.0),
+        "mm": ("m", 0.001),
+        "мм": ("m", 0.001),
+        "cm": ("m", 0.01),
+        "см": ("m", 0.01),
+        "m": ("m", 1.0),
+        "м": ("m", 1.0),
+        "cm2": ("m2", 0.0001),
+        "m2": ("m2", 1.0),
+        "m²": ("m2", 1.0),
+        "м2": ("m2", 1.0),
+        "м²": ("m2", 1.0),
+        "m3": ("m3", 1.0),
+        "m³": ("m3", 1.0),
+        "м3": ("m3", 1.0),
+        "м³": ("m3", 1.0),
+        "pcs": ("pcs", 1.0),
+        "pc": ("pcs", 1.0),
+        "шт": ("pcs", 1.0),
+    }
+)
+
+
+def normalize_unit(unit: str | None) -> tuple[str | None, float]:
+    """Каноническая единица и множитель; незнакомая единица остаётся как есть."""
+    if unit is None:
+        return None, 1.0
+    key = unit.strip().lower().rstrip(".")
+    return _UNITS.get(key, (unit.strip(), 1.0))
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledBomItem:
+    resource_id: str
+    section: str
+    unit: str | None  # каноническая
+    factor: float
+    quantity: CompiledFormula | None
+
+
+@dataclass(frozen=True, slots=True)
+class BomPlan:
+    """BOM профиля: выражения количеств скомпилированы так же, как формулы."""
+
+    profile_id: str
+    items: tuple[CompiledBomItem, ...]
+
+    def evaluate(self, env: Mapping[str, Any]) -> tuple[list[BomLine], list[str]]:
+        """
+        Строки BOM юнита в канонических единицах. env — параметры и значения формул.
+        Количество без входов или с ошибкой пропускает строку с warning.
+        """
+        lines: list[BomLine] = []
+        warnings: list[str] = []
+        for item in self.items:
+            quantity: float | None = None
+            if item.quantity is not None:
+                try:
+                    args = [env[name] for name in item.quantity.inputs]
+                except KeyError:
+                    missing = [name for name in item.quantity.inputs if name not in env]
+                    warnings.append(f"BOM_INPUTS_MISSING:{item.resource_id}:{','.join(missing)}")
+                    continue
+                try:
+                    value = item.quantity.fn(*args)
+                    if isinstance(value, bool) or not isinstance(value, (int, float)):
+                        raise TypeError("non-numeric quantity")
+                    quantity = float(value) * item.factor
+                    if not math.isfinite(quantity):
+                        raise ArithmeticError("non-finite quantity")
+                except Exception as e:
+                    warnings.append(f"BOM_FAILED:{item.resource_id}:{e.__class__.__name__}")
+                    continue
+            lines.append(
+                BomLine.model_construct(
+                    resource_id=item.resource_id, section=item.section, quantity=quantity, unit=item.unit
+                )
+            )
+        return lines, warnings
+
+
+def compile_bom_plan(profile: CalculationProfile) -> BomPlan:
+    profile_id = profile.profile_id
+    params = frozenset(param.key for param in profile.params)
+    formula_ids = frozenset(spec.formula_id for spec in profile.formulas)
+    items: list[CompiledBomItem] = []
+    for bom_item in profile.bom:
+        section = _SECTIONS.get(bom_item.resource_type.strip().lower())
+        if section is None:
+            raise CalcFailed(
+                f"Invalid BOM item {profile_id}:{bom_item.resource_id}: unknown resource_type {bom_item.resource_type!r}"
+            )
+        quantity = None
+        if bom_item.quantity is not None:
+            quantity = compile_formula(
+                FormulaSpec(formula_id=f"bom.{bom_item.resource_id}", expression=bom_item.quantity, unit=bom_item.unit),
+                profile_id=profile_id,
+                params=params,
+                formula_ids=formula_ids,
+            )
+        unit, factor = normalize_unit(bom_item.unit)
+        items.append(
+            CompiledBomItem(
+                resource_id=bom_item.resource_id,
+                section=section,
+                unit=unit,
+                factor=factor,
+                quantity=quantity,
+            )
+        )
+    return BomPlan(profile_id=profile_id, items=tuple(items))
+
+
+def aggregate_bom(works: Iterable[WorkResult]) -> tuple[dict[str, list[ResourceItem]], list[str]]:
+    """
+    Сводит строки BOM всех юнитов по (секция, resource_id, единица).
+
+    Ключи группируются словарём в целочисленные коды за один проход,
+    суммы считаются np.bincount по всем строкам сразу. Ресурсы — в порядке
+    первого появления. Один resource_id в разных единицах не складывается:
+    он попадает в результат дважды с warning BOM_UNIT_CONFLICT (строка без
+    единицы в нём — "-").
+    """
+    codes_by_key: dict[tuple[str, str, str | None], int] = {}
+    codes: list[int] = []
+    quantities: list[float] = []
+    for work in works:
+        for line in work.bom:
+            key = (line.section, line.resource_id, line.unit)
+            code = codes_by_key.get(key)
+            if code is None:
+                code = codes_by_key[key] = len(codes_by_key)
+            codes.append(code)
+            quantities.append(math.nan if line.quantity is None else line.quantity)
+
+    sections: dict[str, list[ResourceItem]] = {section: [] for section in BOM_SECTIONS}
+    if not codes:
+        return sections, []
+
+    code_array = np.asarray(codes, dtype=np.int64)
+    quantity_array = np.asarray(quantities, dtype=np.float64)
+    known = ~np.isnan(quantity_array)
+    totals = np.bincount(code_array, weights=np.where(known, quantity_array, 0.0), minlength=len(codes_by_key))
+    counted = np.bincount(code_array, weights=known, minlength=len(codes_by_key))
+
+    units_by_resource: dict[tuple[str, str], list[str]] = {}
+    for (section, resource_id, unit), code in codes_by_key.items():
+        quantity = float(totals[code]) if counted[code] else None
+        sections[section].append(
+            ResourceItem.model_construct(resource_id=resource_id, quantity=quantity, unit=unit)
+        )
+        units_by_resource.setdefault((section, resource_id), []).append(unit or "-")
+
+    warnings = [
+        f"BOM_UNIT_CONFLICT:{resource_id}:{','.join(units)}"
+        for (_, resource_id), units in units_by_resource.items()
+        if len(units) > 1
+    ]
+    return sections, warnings
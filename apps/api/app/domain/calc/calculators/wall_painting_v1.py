@@ -1,150 +1,462 @@
 from __future__ import annotations
 
-import math
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Mapping, Sequence
+
+import numpy as np
 
 from app.domain.calc.errors import CalcFailed, CalcInvalidInput
-from app.domain.calc.recipes_loader import load_yaml_recipe
+from app.domain.calc.money import Money, from_minor, line_costs, to_price_units
+from app.domain.calc.recipes_loader import CompiledRecipe, load_compiled_recipe
 
 _RECIPE_PATH = Path(__file__).resolve().parents[1] / "recipes" / "wall_painting_v1.yaml"
-_RECIPE_CACHE: dict[str, Any] | None = None
 
+_PRICE_KEYS = (
+    "paint_price_per_l",
+    "primer_price_per_l",
+    "masking_tape_price_per_roll",
+    "film_price_per_roll",
+    "labor_price_per_hour",
+)
+
+# (строка стоимости, ключ цены)
+_COST_LINES = (
+    ("paint_l", "paint_price_per_l"),
+    ("primer_l", "primer_price_per_l"),
+    ("masking_tape_rolls", "masking_tape_price_per_roll"),
+    ("film_rolls", "film_price_per_roll"),
+    ("labor_hours", "labor_price_per_hour"),
+)
+_MAX_PRICE = 1e13  # верхняя граница цены за единицу: всё, что выше, — ошибка ввода
+_MAX_QUANTITY = 1e12
+
+Column = Sequence[Any] | np.ndarray
+
+
+def wall_painting_v1_recipe() -> CompiledRecipe:
+    return load_compiled_recipe(_RECIPE_PATH)
+
+
+def _coerce_column(
+    values: Column,
+    cast: Callable[[Any], Any],
+    *,
+    dtype: type,
+    numeric_kinds: str,
+) -> tuple[np.ndarray, list[Exception | None]]:
+    """
+    Приводит колонку к numpy-массиву с той же семантикой, что и скалярный
+    cast (float/int). Уже числовой ndarray проходит без Python-цикла.
+    """
+    n = len(values)
+    failures: list[Exception | None] = [None] * n
+    if isinstance(values, np.ndarray) and values.dtype.kind in numeric_kinds:
+        return values.astype(dtype), failures
+
+    out = np.zeros(n, dtype=dtype)
+    for i, raw in enumerate(values):
+        try:
+            out[i] = cast(raw)
+        except Exception as e:
+            failures[i] = e
+    return out, failures
+
+
+def _coats(raw: Any) -> int:
+    # int вне int64 не влезет в колонку: прижимаем к 0/7, чтобы строка дошла
+    # до проверки 1..6 с тем же текстом ошибки, что и в скалярном пути
+    return min(max(int(raw), 0), 7)
+
+
+def _price(raw: Any) -> float:
+    return float(raw or 0)
+
+
+@dataclass(frozen=True)
+class WallPaintingBatchResult:
+    """
+    Колоночный результат расчёта: i-я позиция каждого массива соответствует
+    i-й комнате. Для строк с ошибкой значения в массивах не определены,
+    а errors[i] хранит исключение, которое вернул бы скалярный расчёт.
+    """
+
+    version: int
+    area_m2: np.ndarray
+    coats: np.ndarray
+    base: list[Any]
+    quality: list[Any]
+    waste_pct: np.ndarray
+    paint_l: np.ndarray
+    primer_l: np.ndarray
+    masking_tape_rolls: np.ndarray
+    film_rolls: np.ndarray
+    labor_hours: np.ndarray
+    material_cost_minor: np.ndarray
+    labor_cost_minor: np.ndarray
+    total_cost_minor: np.ndarray
+    currency: list[str]
+    errors: list[Exception | None]
+
+    @property
+    def material_cost(self) -> np.ndarray:
+        return from_minor(self.material_cost_minor, self.currency)
+
+    @property
+    def labor_cost(self) -> np.ndarray:
+        return from_minor(self.labor_cost_minor, self.currency)
+
+    @property
+    def total_cost(self) -> np.ndarray:
+        return from_minor(self.total_cost_minor, self.currency)
+
+    def total_money(self, i: int) -> Money:
+        return Money(int(self.total_cost_minor[i]), self.currency[i])
+
+    def __len__(self) -> int:
+        return len(self.errors)
+
+    def outcomes(self) -> list[dict[str, Any] | Exception]:
+        """Результат или исключение для каждой строки, в исходном порядке."""
+        return [err if err is not None else self.result(i) for i, err in enumerate(self.errors)]
+
+    def result(self, i: int) -> dict[str, Any]:
+        err = self.errors[i]
+        if err is not None:
+            raise err
+        return {
+            "work_id": "wall_painting_v1",
+            "version": self.version,
+            "summary": {
+                "area_m2": float(self.area_m2[i]),
+                "coats": int(self.coats[i]),
+                "base": self.base[i],
+                "quality": self.quality[i],
+                "waste_pct": float(self.waste_pct[i]),
+            },
+            "materials": {
+                "paint_l": float(self.paint_l[i]),
+                "primer_l": float(self.primer_l[i]),
+                "masking_tape_rolls": int(self.masking_tape_rolls[i]),
+                "film_rolls": int(self.film_rolls[i]),
+            },
+            "labor": {"hours": float(self.labor_hours[i])},
+            "cost": {
+                "material_cost": Money(int(self.material_cost_minor[i]), self.currency[i]).amount,
+                "labor_cost": Money(int(self.labor_cost_minor[i]), self.currency[i]).amount,
+                "total_cost": self.total_money(i).amount,
+                "currency": self.currency[i],
+            },
+        }
+
+
+def calc_wall_painting_v1_batch(
+    *,
+    area_m2: Column,
+    base: Sequence[Any],
+    quality: Sequence[Any],
+    coats: Column | None = None,
+    waste_pct: Column | None = None,
+    prices: Mapping[str, Column] | None = None,
+    currency: Sequence[Any] | str = "RUB",
+) -> WallPaintingBatchResult:
+    """
+    Колоночный расчёт покраски стен: все комнаты считаются одним проходом NumPy.
+
+    coats / waste_pct = None -> значения из defaults рецепта.
+    prices — колонки цен по ключам _PRICE_KEYS (отсутствующие = 0).
+    Ошибки валидации не прерывают батч, а попадают в errors построчно
+    с тем же текстом и в том же порядке проверок, что и в скалярном пути.
+    """
+    r = wall_painting_v1_recipe()
+    defaults = r.defaults
+
+    n = len(area_m2)
+    for name, column in (("base", base), ("quality", quality)):
+        if len(column) != n:
+            raise CalcInvalidInput(f"{name} column length must match area_m2")
+    if coats is None:
+        coats = [defaults.get("coats", 2)] * n
+    if waste_pct is None:
+        waste_pct = [defaults.get("waste_pct", 10)] * n
+    if isinstance(currency, str):
+        currency = [currency] * n
+    price_columns = prices or {}
+    for name, column in (("coats", coats), ("waste_pct", waste_pct), ("currency", currency)):
+        if len(column) != n:
+            raise CalcInvalidInput(f"{name} column length must match area_m2")
+    for key, column in price_columns.items():
+        if len(column) != n:
+            raise CalcInvalidInput(f"{key} column length must match area_m2")
+
+    errors: list[Exception | None] = [None] * n
+
+    def _fail(mask: np.ndarray, make: Callable[[int], Exception]) -> None:
+        for i in np.flatnonzero(mask):
+            if errors[i] is None:
+                errors[i] = make(int(i))
+
+    def _fail_cast(failures: list[Exception | None], message: str) -> None:
+        for i, e in enumerate(failures):
+            if e is not None and errors[i] is None:
+                errors[i] = CalcInvalidInput(message)
+
+    # --- params (порядок проверок = порядок скалярной версии) ---
+    area, area_failures = _coerce_column(area_m2, float, dtype=np.float64, numeric_kinds="biuf")
+    _fail_cast(area_failures, "area_m2 must be a number")
+    _fail(area <= 0, lambda i: CalcInvalidInput("area_m2 must be > 0"))
 
-def _recipe() -> dict[str, Any]:
-    global _RECIPE_CACHE
-    if _RECIPE_CACHE is None:
-        _RECIPE_CACHE = load_yaml_recipe(_RECIPE_PATH)
-    return _RECIPE_CACHE
+    coats_arr, coats_failures = _coerce_column(coats, _coats, dtype=np.int64, numeric_kinds="biu")
+    _fail_cast(coats_failures, "coats must be integer")
+    _fail((coats_arr < 1) | (coats_arr > 6), lambda i: CalcInvalidInput("coats must be between 1 and 6"))
 
+    allowed_base = r.enums.get("base", frozenset())
+    allowed_quality = r.enums.get("quality", frozenset())
 
-def _num(x: Any, *, name: str) -> float:
-    try:
-        v = float(x)
-    except Exception:
-        raise CalcInvalidInput(f"{name} must be a number")
-    if v <= 0:
-        raise CalcInvalidInput(f"{name} must be > 0")
-    return v
+    # значения enum -> индексы в предкомпилированных таблицах норм
+    base_idx = r.lookup("base", base)
+    quality_idx = r.lookup("quality", quality)
+    base_is_str = np.fromiter((isinstance(b, str) for b in base), dtype=bool, count=n)
+    quality_is_str = np.fromiter((isinstance(q, str) for q in quality), dtype=bool, count=n)
+    _fail(~base_is_str, lambda i: CalcInvalidInput("base must be a string"))
+    _fail(~quality_is_str, lambda i: CalcInvalidInput("quality must be a string"))
+    if allowed_base:
+        bad_base = base_idx == len(r.enum_index["base"])
+        _fail(bad_base, lambda i: CalcInvalidInput(f"base must be one of {sorted(allowed_base)}"))
+    if allowed_quality:
+        bad_quality = quality_idx == len(r.enum_index["quality"])
+        _fail(bad_quality, lambda i: CalcInvalidInput(f"quality must be one of {sorted(allowed_quality)}"))
 
+    waste, waste_failures = _coerce_column(waste_pct, float, dtype=np.float64, numeric_kinds="biuf")
+    _fail_cast(waste_failures, "waste_pct must be a number")
+    _fail((waste < 0) | (waste > 30), lambda i: CalcInvalidInput("waste_pct must be between 0 and 30"))
 
-def _int(x: Any, *, name: str) -> int:
-    try:
-        v = int(x)
-    except Exception:
-        raise CalcInvalidInput(f"{name} must be integer")
-    return v
+    # --- norms ---
+    paint_cov = r.norms["paint_coverage_m2_per_l_by_base"][base_idx]
+    primer_cov = r.norms["primer_coverage_m2_per_l_by_base"][base_idx]
+    labor_h_m2 = r.norms["labor_hours_per_m2_by_quality"][quality_idx]
+    _fail(
+        np.isnan(paint_cov) | np.isnan(primer_cov) | np.isnan(labor_h_m2),
+        lambda i: CalcFailed("Recipe is missing required norms for given base/quality"),
+    )
+    _fail(paint_cov == 0, lambda i: ZeroDivisionError("float division by zero"))
+
+    # --- quantities: один проход по всем строкам ---
+    ok = np.fromiter((e is None for e in errors), dtype=bool, count=n)
+    has_primer = ok & (primer_cov > 0)
+    safe_paint_cov = np.where(ok, paint_cov, 1.0)
+    safe_primer_cov = np.where(has_primer, primer_cov, 1.0)
+
+    # inf/nan в отбракованных строках не должны шуметь warning-ами
+    with np.errstate(invalid="ignore", over="ignore"):
+        waste_k = 1.0 + (waste / 100.0)
+        paint_l = (area * coats_arr / safe_paint_cov) * waste_k
+        primer_l = np.where(has_primer, (area / safe_primer_cov) * waste_k, 0.0)
+        labor_hours = area * np.where(ok, labor_h_m2, 0.0)
+
+    # скалярная версия падала в math.ceil на nan/inf (area/waste_pct) — сохраняем это
+    _fail(np.isnan(paint_l), lambda i: ValueError("cannot convert float NaN to integer"))
+    _fail(np.isinf(paint_l), lambda i: OverflowError("cannot convert float infinity to integer"))
+    safe_area = np.where(np.isfinite(paint_l), area, 0.0)
+
+    liters_step = r.rounding.get("liters_step", 0.1) or 0.1
+    hours_step = r.rounding.get("hours_step", 0.1) or 0.1
+
+    with np.errstate(invalid="ignore", over="ignore"):
+        paint_l_ceil = _round_up_step(paint_l, liters_step)
+        primer_l_ceil = _round_up_step(primer_l, liters_step)
+        labor_hours_ceil = _round_up_step(labor_hours, hours_step)
+
+    tape_per_50 = r.bundles.get("masking_tape_rolls_per_50m2", 1)
+    film_per_40 = r.bundles.get("film_rolls_per_40m2", 1)
+    # огромная area не влезает в int64; такие строки ниже отбракует "area_m2 is too large"
+    with np.errstate(invalid="ignore", over="ignore"):
+        masking_tape_rolls = np.maximum(1, np.ceil(safe_area / 50.0).astype(np.int64) * tape_per_50)
+        film_rolls = np.maximum(1, np.ceil(safe_area / 40.0).astype(np.int64) * film_per_40)
+
+    # --- prices: целые доли минорной единицы валюты строки ---
+    currency = [str(c) for c in currency]
+    price_arrays: dict[str, np.ndarray] = {}
+    for key in _PRICE_KEYS:
+        column = price_columns.get(key)
+        if column is None:
+            price_arrays[key] = np.zeros(n)
+            continue
+        values, failures = _coerce_column(column, _price, dtype=np.float64, numeric_kinds="biuf")
+        for i, e in enumerate(failures):
+            if e is not None and errors[i] is None:
+                errors[i] = e
+        price_arrays[key] = values
+    for key, values in price_arrays.items():
+        _fail(~np.isfinite(values), lambda i, key=key: CalcInvalidInput(f"{key} must be a finite number"))
+        with np.errstate(invalid="ignore"):
+            _fail(np.abs(values) >= _MAX_PRICE, lambda i, key=key: CalcInvalidInput(f"{key} is too large"))
+
+    quantities = {
+        "paint_l": paint_l_ceil,
+        "primer_l": primer_l_ceil,
+        "masking_tape_rolls": masking_tape_rolls,
+        "film_rolls": film_rolls,
+        "labor_hours": labor_hours_ceil,
+    }
+    with np.errstate(invalid="ignore"):
+        too_large = np.zeros(n, dtype=bool)
+        for column in quantities.values():
+            too_large |= np.abs(column) >= _MAX_QUANTITY
+    _fail(too_large, lambda i: CalcInvalidInput("area_m2 is too large"))
+
+    valid = np.fromiter((e is None for e in errors), dtype=bool, count=n)
+    price_units = {
+        key: to_price_units(np.where(valid, values, 0.0), currency) for key, values in price_arrays.items()
+    }
+    line_minor = {
+        name: line_costs(price_units[price_key], np.where(valid, quantities[name], 0))
+        for name, price_key in _COST_LINES
+    }
+    material_cost_minor = (
+        line_minor["paint_l"] + line_minor["primer_l"] + line_minor["masking_tape_rolls"] + line_minor["film_rolls"]
+    )
+    labor_cost_minor = line_minor["labor_hours"]
+    total_cost_minor = material_cost_minor + labor_cost_minor
+
+    return WallPaintingBatchResult(
+        version=r.version,
+        area_m2=area,
+        coats=coats_arr,
+        base=list(base),
+        quality=list(quality),
+        waste_pct=waste,
+        paint_l=paint_l_ceil,
+        primer_l=primer_l_ceil,
+        masking_tape_rolls=masking_tape_rolls,
+        film_rolls=film_rolls,
+        labor_hours=labor_hours_ceil,
+        material_cost_minor=material_cost_minor,
+        labor_cost_minor=labor_cost_minor,
+        total_cost_minor=total_cost_minor,
+        currency=currency,
+        errors=errors,
+    )
 
 
-def _round_up_step(value: float, step: float) -> float:
+def _round_up_step(value: np.ndarray, step: float) -> np.ndarray:
     if step <= 0:
         return value
-    return math.ceil(value / step) * step
+    return np.ceil(value / step) * step
+
+
+def calc_wall_painting_v1_many(inputs: Sequence[dict[str, Any]]) -> WallPaintingBatchResult:
+    """
+    Батч по входам формата calc_wall_painting_v1: раскладывает dict-и в колонки
+    и считает их одним вызовом calc_wall_painting_v1_batch.
+    """
+    defaults = wall_painting_v1_recipe().defaults
+    default_coats = defaults.get("coats", 2)
+    default_waste_pct = defaults.get("waste_pct", 10)
+
+    area_m2: list[Any] = []
+    coats: list[Any] = []
+    base: list[Any] = []
+    quality: list[Any] = []
+    waste_pct: list[Any] = []
+    currency: list[Any] = []
+    prices: dict[str, list[Any]] = {key: [] for key in _PRICE_KEYS}
+    for item in inputs:
+        params = item.get("params") if isinstance(item.get("params"), dict) else item
+        row_prices = item.get("prices") if isinstance(item.get("prices"), dict) else {}
+        area_m2.append(params.get("area_m2"))
+        coats.append(params.get("coats", default_coats))
+        base.append(params.get("base"))
+        quality.append(params.get("quality"))
+        waste_pct.append(params.get("waste_pct", default_waste_pct))
+        currency.append(row_prices.get("currency", "RUB"))
+        for key in _PRICE_KEYS:
+            prices[key].append(row_prices.get(key, 0))
+
+    return calc_wall_painting_v1_batch(
+        area_m2=area_m2,
+        base=base,
+        quality=quality,
+        coats=coats,
+        waste_pct=waste_pct,
+        prices=prices,
+        currency=currency,
+    )
 
 
 def calc_wall_painting_v1(input: dict[str, Any]) -> dict[str, Any]:
-    r = _recipe()
-
-    params = input.get("params") if isinstance(input.get("params"), dict) else input
-    defaults = r.get("defaults", {}) if isinstance(r.get("defaults"), dict) else {}
-    norms = r.get("norms", {}) if isinstance(r.get("norms"), dict) else {}
-    bundles = r.get("bundles", {}) if isinstance(r.get("bundles"), dict) else {}
-    rounding = r.get("rounding", {}) if isinstance(r.get("rounding"), dict) else {}
-
-    area_m2 = _num(params.get("area_m2"), name="area_m2")
-
-    coats = _int(params.get("coats", defaults.get("coats", 2)), name="coats")
-    if coats < 1 or coats > 6:
-        raise CalcInvalidInput("coats must be between 1 and 6")
-
-    base = params.get("base")
-    quality = params.get("quality")
-    if not isinstance(base, str):
-        raise CalcInvalidInput("base must be a string")
-    if not isinstance(quality, str):
-        raise CalcInvalidInput("quality must be a string")
-
-    allowed_base = set((r.get("enums", {}) or {}).get("base", []))
-    allowed_quality = set((r.get("enums", {}) or {}).get("quality", []))
-    if allowed_base and base not in allowed_base:
-        raise CalcInvalidInput(f"base must be one of {sorted(allowed_base)}")
-    if allowed_quality and quality not in allowed_quality:
-        raise CalcInvalidInput(f"quality must be one of {sorted(allowed_quality)}")
-
-    waste_pct_raw = params.get("waste_pct", defaults.get("waste_pct", 10))
-    try:
-        waste_pct = float(waste_pct_raw)
-    except Exception:
-        raise CalcInvalidInput("waste_pct must be a number")
-    if waste_pct < 0 or waste_pct > 30:
-        raise CalcInvalidInput("waste_pct must be between 0 and 30")
-
-    paint_cov_map = norms.get("paint_coverage_m2_per_l_by_base", {})
-    primer_cov_map = norms.get("primer_coverage_m2_per_l_by_base", {})
-    labor_map = norms.get("labor_hours_per_m2_by_quality", {})
-
-    try:
-        paint_cov = float(paint_cov_map[base])
-        primer_cov = float(primer_cov_map[base])
-        labor_h_m2 = float(labor_map[quality])
-    except Exception as e:
-        raise CalcFailed("Recipe is missing required norms for given base/quality") from e
-
-    waste_k = 1.0 + (waste_pct / 100.0)
-
-    paint_l = (area_m2 * coats / paint_cov) * waste_k
-    primer_l = (area_m2 / primer_cov) * waste_k if primer_cov > 0 else 0.0
-    labor_hours = area_m2 * labor_h_m2
-
-    liters_step = float(rounding.get("liters_step", 0.1) or 0.1)
-    hours_step = float(rounding.get("hours_step", 0.1) or 0.1)
-
-    paint_l_ceil = _round_up_step(paint_l, liters_step)
-    primer_l_ceil = _round_up_step(primer_l, liters_step)
-    labor_hours_ceil = _round_up_step(labor_hours, hours_step)
-
-    tape_per_50 = int(bundles.get("masking_tape_rolls_per_50m2", 1) or 1)
-    film_per_40 = int(bundles.get("film_rolls_per_40m2", 1) or 1)
-    masking_tape_rolls = max(1, math.ceil(area_m2 / 50.0) * tape_per_50)
-    film_rolls = max(1, math.ceil(area_m2 / 40.0) * film_per_40)
-
-    prices = input.get("prices") if isinstance(input.get("prices"), dict) else {}
-    paint_price_per_l = float(prices.get("paint_price_per_l", 0) or 0)
-    primer_price_per_l = float(prices.get("primer_price_per_l", 0) or 0)
-    tape_price_per_roll = float(prices.get("masking_tape_price_per_roll", 0) or 0)
-    film_price_per_roll = float(prices.get("film_price_per_roll", 0) or 0)
-    labor_price_per_hour = float(prices.get("labor_price_per_hour", 0) or 0)
-
-    material_cost = (
-        paint_l_ceil * paint_price_per_l
-        + primer_l_ceil * primer_price_per_l
-        + masking_tape_rolls * tape_price_per_roll
-        + film_rolls * film_price_per_roll
+    return calc_wall_painting_v1_many([input]).result(0)
+
+
+SWEEP_AXES = ("base", "quality", "coats", "waste_pct")
+SWEEP_METRICS = (
+    "paint_l",
+    "primer_l",
+    "masking_tape_rolls",
+    "film_rolls",
+    "labor_hours",
+    "material_cost",
+    "labor_cost",
+    "total_cost",
+)
+
+
+def sweep_wall_painting_v1(
+    params: Mapping[str, Any],
+    axes: Mapping[str, Sequence[Any]],
+    prices: Mapping[str, Any] | None = None,
+) -> dict[str, Any]:
+    """
+    What-if по декартовой сетке осей (base × quality × coats × waste_pct).
+
+    Сетка разворачивается в колонки и считается одним вызовом
+    calc_wall_painting_v1_batch, поэтому каждая ячейка совпадает с отдельным
+    calc_wall_painting_v1. Результат — компактная таблица: columns + rows
+    в row-major порядке по осям из SWEEP_AXES.
+    """
+    names = [name for name in SWEEP_AXES if axes.get(name)]
+    if not names:
+        raise CalcInvalidInput(f"axes must vary at least one of {list(SWEEP_AXES)}")
+    values = [list(axes[name]) for name in names]
+    shape = tuple(len(v) for v in values)
+    n = int(np.prod(shape))
+    grid = np.indices(shape).reshape(len(shape), n)
+
+    defaults = wall_painting_v1_recipe().defaults
+    fixed = {
+        "area_m2": params.get("area_m2"),
+        "base": params.get("base"),
+        "quality": params.get("quality"),
+        "coats": params.get("coats", defaults.get("coats", 2)),
+        "waste_pct": params.get("waste_pct", defaults.get("waste_pct", 10)),
+    }
+    columns: dict[str, Any] = {key: [value] * n for key, value in fixed.items()}
+    for k, name in enumerate(names):
+        columns[name] = [values[k][j] for j in grid[k]]
+
+    prices = prices or {}
+    batch = calc_wall_painting_v1_batch(
+        area_m2=columns["area_m2"],
+        base=columns["base"],
+        quality=columns["quality"],
+        coats=columns["coats"],
+        waste_pct=columns["waste_pct"],
+        prices={key: [prices.get(key, 0)] * n for key in _PRICE_KEYS},
+        currency=str(prices.get("currency", "RUB")),
     )
-    labor_cost = labor_hours_ceil * labor_price_per_hour
-    total_cost = material_cost + labor_cost
+    for err in batch.errors:
+        if err is not None:
+            raise err
+
+    metric_columns = [getattr(batch, metric).tolist() for metric in SWEEP_METRICS]
+    axis_columns = [columns[name] for name in names]
 
     return {
         "work_id": "wall_painting_v1",
-        "version": int(r.get("version", 1) or 1),
-        "summary": {
-            "area_m2": float(area_m2),
-            "coats": int(coats),
-            "base": base,
-            "quality": quality,
-            "waste_pct": float(waste_pct),
-        },
-        "materials": {
-            "paint_l": float(paint_l_ceil),
-            "primer_l": float(primer_l_ceil),
-            "masking_tape_rolls": int(masking_tape_rolls),
-            "film_rolls": int(film_rolls),
-        },
-        "labor": {"hours": float(labor_hours_ceil)},
-        "cost": {
-            "material_cost": round(float(material_cost), 2),
-            "labor_cost": round(float(labor_cost), 2),
-            "total_cost": round(float(total_cost), 2),
-            "currency": str(prices.get("currency", "RUB")),
-        },
+        "version": batch.version,
+        "fixed": {key: value for key, value in fixed.items() if key not in names},
+        "axes": dict(zip(names, values)),
+        "currency": batch.currency[0],
+        "columns": [*names, *SWEEP_METRICS],
+        "rows": [list(row) for row in zip(*axis_columns, *metric_columns)],
     }
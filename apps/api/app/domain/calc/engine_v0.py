@@ -1,17 +1,52 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Callable
+from dataclasses import dataclass, field
+from typing import Any, Sequence
 
-from .errors import CalcFailed, CalcInvalidInput, CalcUnknownWork
-from .registry_v0 import build_registry_v0
+from app.settings import settings
 
-CalculatorFn = Callable[[dict[str, Any]], dict[str, Any]]
+from .errors import CalcError, CalcFailed, CalcInvalidInput, CalcUnknownWork
+from .registry_v0 import (
+    BatchCalculatorFn,
+    CalculatorFn,
+    RecipeFn,
+    build_batch_registry_v0,
+    build_recipe_registry_v0,
+    build_registry_v0,
+)
+from .result_cache import CalcResultCache
+from .timings import collect_timings, stage
+
+
+def _domain_error(e: Exception) -> CalcError:
+    if isinstance(e, (CalcInvalidInput, CalcUnknownWork)):
+        return e
+    # наружу не отдаём сырую ошибку
+    return CalcFailed(f"Calculation failed: {e.__class__.__name__}")
 
 
 @dataclass(frozen=True)
 class CalcEngineV0:
     registry: dict[str, CalculatorFn]
+    batch_registry: dict[str, BatchCalculatorFn] = field(default_factory=dict)
+    recipe_registry: dict[str, RecipeFn] = field(default_factory=dict)
+    cache: CalcResultCache | None = None
+
+    def _work_id(self, input: dict[str, Any]) -> str:
+        work_id = input.get("work_id") or input.get("work") or input.get("code")
+        if not work_id or not isinstance(work_id, str):
+            raise CalcInvalidInput("Missing work_id/work/code in input")
+        if work_id not in self.registry:
+            raise CalcUnknownWork(f"Unknown work_id: {work_id}")
+        return work_id
+
+    def _cache_key(self, work_id: str, input: dict[str, Any]) -> str | None:
+        if self.cache is None:
+            return None
+        recipe = self.recipe_registry.get(work_id)
+        if recipe is None:
+            return None
+        return self.cache.key(input, recipe())
 
     def calculate(self, input: dict[str, Any]) -> dict[str, Any]:
         """
@@ -25,23 +60,89 @@ class CalcEngineV0:
         Для совместимости:
           work_id можно передать как work / code.
         """
-        work_id = input.get("work_id") or input.get("work") or input.get("code")
-        if not work_id or not isinstance(work_id, str):
-            raise CalcInvalidInput("Missing work_id/work/code in input")
+        with collect_timings("engine_v0"):
+            return self._calculate(input)
 
-        calc = self.registry.get(work_id)
-        if calc is None:
-            raise CalcUnknownWork(f"Unknown work_id: {work_id}")
+    def _calculate(self, input: dict[str, Any]) -> dict[str, Any]:
+        work_id = self._work_id(input)
+        calc = self.registry[work_id]
 
         try:
-            return calc(input)
-        except CalcInvalidInput:
-            raise
-        except CalcUnknownWork:
-            raise
+            with stage("cache_lookup", 1):
+                key = self._cache_key(work_id, input)
+                cached = self.cache.get(key) if key is not None and self.cache is not None else None
+            if cached is not None:
+                return cached
+            with stage("calculate", 1):
+                result = calc(input)
         except Exception as e:
-            # наружу не отдаём сырую ошибку
-            raise CalcFailed(f"Calculation failed: {e.__class__.__name__}") from e
+            err = _domain_error(e)
+            if err is e:
+                raise
+            raise err from e
+
+        if key is not None and self.cache is not None:
+            with stage("cache_store", 1):
+                self.cache.put(key, result)
+        return result
+
+    def calculate_many(self, inputs: Sequence[dict[str, Any]]) -> list[dict[str, Any] | CalcError]:
+        """
+        Батч-расчёт: результат или CalcError на каждый вход, в исходном порядке.
+
+        Входы группируются по work_id; промахи кеша группы уходят в векторное
+        ядро из batch_registry (если есть), иначе считаются поштучно через
+        calculate. Ошибка одного элемента не валит остальные.
+        """
+        with collect_timings("engine_v0"):
+            return self._calculate_many(inputs)
+
+    def _calculate_many(self, inputs: Sequence[dict[str, Any]]) -> list[dict[str, Any] | CalcError]:
+        out: list[dict[str, Any] | CalcError | None] = [None] * len(inputs)
+        groups: dict[str, list[int]] = {}
+        for i, item in enumerate(inputs):
+            try:
+                groups.setdefault(self._work_id(item), []).append(i)
+            except CalcError as e:
+                out[i] = e
+
+        for work_id, indexes in groups.items():
+            batch = self.batch_registry.get(work_id)
+            if batch is None:
+                for i in indexes:
+                    try:
+                        out[i] = self.calculate(inputs[i])
+                    except CalcError as e:
+                        out[i] = e
+                continue
+
+            keys: dict[int, str] = {}
+            misses: list[int] = []
+            try:
+                with stage("cache_lookup", len(indexes)):
+                    for i in indexes:
+                        key = self._cache_key(work_id, inputs[i])
+                        cached = self.cache.get(key) if key is not None and self.cache is not None else None
+                        if cached is not None:
+                            out[i] = cached
+                            continue
+                        if key is not None:
+                            keys[i] = key
+                        misses.append(i)
+                with stage("calculate", len(misses)):
+                    results = batch([inputs[i] for i in misses]) if misses else []
+            except Exception as e:
+                misses = [i for i in indexes if out[i] is None]
+                results = [e] * len(misses)
+            for i, result in zip(misses, results):
+                if isinstance(result, Exception):
+                    out[i] = _domain_error(result)
+                    continue
+                out[i] = result
+                if i in keys and self.cache is not None:
+                    self.cache.put(keys[i], result)
+
+        return out  # type: ignore[return-value]
 
 
 _engine_singleton: CalcEngineV0 | None = None
@@ -50,5 +151,11 @@ _engine_singleton: CalcEngineV0 | None = None
 def get_calc_engine_v0() -> CalcEngineV0:
     global _engine_singleton
     if _engine_singleton is None:
-        _engine_singleton = CalcEngineV0(registry=build_registry_v0())
+        cache = CalcResultCache(settings.calc_cache_max_entries) if settings.calc_cache_max_entries > 0 else None
+        _engine_singleton = CalcEngineV0(
+            registry=build_registry_v0(),
+            batch_registry=build_batch_registry_v0(),
+            recipe_registry=build_recipe_registry_v0(),
+            cache=cache,
+        )
     return _engine_singleton
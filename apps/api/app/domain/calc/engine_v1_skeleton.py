@@ -1,29 +1,28 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-import hashlib
-import json
+from typing import Any, Iterable, Sequence
+
 from app.contracts.engine_v1.input import EngineInput, WorkUnit
-from app.contracts.engine_v1.profile import CalculationProfile
 from app.contracts.engine_v1.result import (
+    BomLine,
     EngineMeta,
     EngineResult,
+    StageTimingItem,
     TotalsResult,
     WorkResult,
     WorkStatus,
 )
-from app.domain.calc.profile_registry import get_profile_by_id, get_profile_by_work_id
+from app.domain.calc.bom import aggregate_bom
+from app.domain.calc.fingerprint import input_fingerprint, work_unit_fingerprint
+from app.domain.calc.profile_registry import ProfileMeta, get_profile_meta
+from app.domain.calc.timings import CalcTimer, collect_timings, stage
+from app.domain.calc.work_graph import WorkGraph, build_work_graph, run_work_graph
 
 
 _EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
 
-def _stable_trace_id(payload: EngineInput) -> str:
-    data = payload.model_dump(mode="json", by_alias=True, exclude_none=False)
-    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"))
-    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
-
-
 def _resolve_created_at(payload: EngineInput) -> datetime:
     metadata = payload.engine_context.request_metadata
     created_at = metadata.get("created_at") if isinstance(metadata, dict) else None
@@ -37,88 +36,292 @@ def _resolve_created_at(payload: EngineInput) -> datetime:
     return _EPOCH
 
 
-def _expected_sections(profile: CalculationProfile) -> list[str]:
-    return list(profile.outputs.model_dump().keys())
+def _resolve_profile(work_unit: WorkUnit) -> ProfileMeta | None:
+    return get_profile_meta(work_unit.work_id, work_unit.calculation_profile_id)
 
 
-def _missing_required_params(profile: CalculationProfile, work_unit: WorkUnit) -> list[str]:
-    required = [param.key for param in profile.params if param.required]
-    return [key for key in required if key not in work_unit.parameters]
+# результат юнита и готов ли он вместе со всеми своими зависимостями
+_LinkedWork = tuple[WorkResult, bool]
 
+# warnings юнита, которые дублируются в meta с work_id
+_META_WARNING_CODES = frozenset(
+    {"MISSING_REQUIRED_PARAMS", "INVALID_PARAM", "DEPENDENCY_NOT_FOUND", "DEPENDENCIES_NOT_READY"}
+)
+
+
+def _work_meta_warnings(work: WorkResult) -> list[str]:
+    """meta-warnings юнита выводятся из его warnings, поэтому переиспользованный результат даёт те же meta."""
+    meta_warnings: list[str] = []
+    for warning in work.warnings:
+        code, _, detail = warning.partition(":")
+        if code == "PROFILE_NOT_FOUND":
+            meta_warnings.append(warning)
+        elif code in _META_WARNING_CODES:
+            meta_warnings.append(f"{code}:{work.work_id}:{detail}")
+    return meta_warnings
 
-def _resolve_profile(work_unit: WorkUnit) -> CalculationProfile | None:
-    if work_unit.calculation_profile_id:
-        return get_profile_by_id(work_unit.calculation_profile_id)
-    return get_profile_by_work_id(work_unit.work_id)
 
+def _validate_params(
+    work_units: Sequence[WorkUnit],
+    metas: Sequence[ProfileMeta | None],
+) -> dict[int, list[str]]:
+    """Ошибки параметров по индексу юнита; юниты одного профиля проверяются одним колоночным проходом."""
+    groups: dict[str, list[int]] = {}
+    for index, meta in enumerate(metas):
+        if meta is not None:
+            groups.setdefault(meta.profile_id, []).append(index)
+    errors: dict[int, list[str]] = {}
+    for indices in groups.values():
+        validator = metas[indices[0]].validator  # type: ignore[union-attr]
+        rows = [work_units[index].parameters for index in indices]
+        for row, row_errors in validator.validate(rows).items():
+            errors[indices[row]] = row_errors
+    return errors
 
-def _build_work_result(work_unit: WorkUnit, meta_warnings: list[str]) -> WorkResult:
+
+def _build_work_result(
+    work_unit: WorkUnit,
+    meta: ProfileMeta | None,
+    invalid_params: Sequence[str] = (),
+) -> WorkResult:
     warnings: list[str] = []
-    profile = _resolve_profile(work_unit)
-    if profile is None:
-        warning = f"PROFILE_NOT_FOUND:{work_unit.work_id}"
-        warnings.append(warning)
-        meta_warnings.append(warning)
-        return WorkResult(
+    if meta is None:
+        warnings.append(f"PROFILE_NOT_FOUND:{work_unit.work_id}")
+        return WorkResult.model_construct(
             work_id=work_unit.work_id,
             calculation_profile_id=work_unit.calculation_profile_id,
             status=WorkStatus.UNIMPLEMENTED,
             required_params=[],
             provided_params=list(work_unit.parameters.keys()),
             expected_sections=[],
-            parameters=work_unit.parameters,
-            dependencies=work_unit.dependencies,
+            parameters=dict(work_unit.parameters),
+            formula_values={},
+            bom=[],
+            dependencies=list(work_unit.dependencies),
             warnings=warnings,
         )
 
-    missing = _missing_required_params(profile, work_unit)
-    required_params = [param.key for param in profile.params if param.required]
+    missing = meta.missing_required(work_unit.parameters)
     provided_params = list(work_unit.parameters.keys())
     status = WorkStatus.DRAFT
     if missing:
-        warning = f"MISSING_REQUIRED_PARAMS:{','.join(missing)}"
-        warnings.append(warning)
-        meta_warnings.append(f"MISSING_REQUIRED_PARAMS:{work_unit.work_id}:{','.join(missing)}")
+        warnings.append(f"MISSING_REQUIRED_PARAMS:{','.join(missing)}")
+        status = WorkStatus.READY_FOR_INPUT
+    if invalid_params:
+        warnings.extend(invalid_params)
         status = WorkStatus.READY_FOR_INPUT
 
-    return WorkResult(
+    formula_values: dict[str, Any] = {}
+    bom: list[BomLine] = []
+    if status == WorkStatus.DRAFT:
+        if meta.formula_plan.steps:
+            formula_values, formula_warnings = meta.formula_plan.evaluate(work_unit.parameters)
+            warnings.extend(formula_warnings)
+        if meta.bom_plan.items:
+            bom, bom_warnings = meta.bom_plan.evaluate({**work_unit.parameters, **formula_values})
+            warnings.extend(bom_warnings)
+
+    # всё собрано из провалидированного WorkUnit и профиля — повторная валидация не нужна;
+    # parameters/dependencies копируются, как их копировала бы валидация
+    return WorkResult.model_construct(
         work_id=work_unit.work_id,
-        calculation_profile_id=profile.profile_id,
+        calculation_profile_id=meta.profile_id,
         status=status,
-        required_params=required_params,
+        required_params=list(meta.required_keys),
         provided_params=provided_params,
-        expected_sections=_expected_sections(profile),
-        parameters=work_unit.parameters,
-        dependencies=work_unit.dependencies,
+        expected_sections=list(meta.expected_sections),
+        parameters=dict(work_unit.parameters),
+        formula_values=formula_values,
+        bom=bom,
+        dependencies=list(work_unit.dependencies),
         warnings=warnings,
     )
 
 
-def calculate_v1(payload: EngineInput) -> EngineResult:
-    meta_warnings: list[str] = []
-    works = [
-        _build_work_result(work_unit, meta_warnings) for work_unit in payload.work_graph
+def _evaluate(work_units: Sequence[WorkUnit]) -> list[WorkResult]:
+    metas = [_resolve_profile(work_unit) for work_unit in work_units]
+    invalid = _validate_params(work_units, metas)
+    return [
+        _build_work_result(work_unit, meta, invalid.get(index, ()))
+        for index, (work_unit, meta) in enumerate(zip(work_units, metas))
     ]
-    trace_id = _stable_trace_id(payload)
+
+
+def evaluate_work_units(work_units: Iterable[WorkUnit]) -> list[WorkResult]:
+    """Расчёт юнитов без учёта зависимостей; безопасен для чанков в пуле процессов."""
+    return _evaluate(list(work_units))
+
+
+def _blocked_dependencies(upstream: Iterable[_LinkedWork]) -> tuple[str, ...]:
+    # готовность зависимостей уже посчитана у них самих — транзитивно, без обхода цепочки
+    return tuple(dict.fromkeys(dep.work_id for dep, ready in upstream if not ready))
+
+
+def _is_ready(work: WorkResult, unknown: Sequence[str], blocked: Sequence[str]) -> bool:
+    return work.status == WorkStatus.DRAFT and not unknown and not blocked
+
+
+# warnings, которые дописывает связывание зависимостей
+_LINK_WARNING_CODES = ("DEPENDENCY_NOT_FOUND:", "DEPENDENCIES_NOT_READY:")
+
+
+def _link_warnings(unknown: Sequence[str], blocked: Sequence[str]) -> list[str]:
+    warnings = [f"DEPENDENCY_NOT_FOUND:{dep}" for dep in unknown]
+    if blocked:
+        warnings.append(f"DEPENDENCIES_NOT_READY:{','.join(blocked)}")
+    return warnings
+
+
+def _link_dependencies(
+    graph: WorkGraph,
+    index: int,
+    work: WorkResult,
+    upstream: tuple[_LinkedWork, ...],
+) -> _LinkedWork:
+    unknown = graph.unknown[index]
+    blocked = _blocked_dependencies(upstream)
+    work.warnings.extend(_link_warnings(unknown, blocked))
+    return work, _is_ready(work, unknown, blocked)
+
+
+def link_work_results(
+    graph: WorkGraph,
+    evaluated: Sequence[WorkResult],
+) -> tuple[list[WorkResult], list[str]]:
+    """Проходит граф в топологическом порядке и дописывает warnings по зависимостям."""
+    linked = run_work_graph(graph, lambda i, upstream: _link_dependencies(graph, i, evaluated[i], upstream))
+    return _flatten_work_results(work for work, _ in linked)
+
+
+def _flatten_work_results(works: Iterable[WorkResult]) -> tuple[list[WorkResult], list[str]]:
+    works = list(works)
+    return works, [warning for work in works for warning in _work_meta_warnings(work)]
+
+
+def build_work_results(work_units: Iterable[WorkUnit]) -> tuple[list[WorkResult], list[str]]:
+    """Результаты юнитов в исходном порядке work_graph. Цикл в dependencies -> CalcInvalidInput."""
+    work_units = list(work_units)
+    n = len(work_units)
+    with stage("graph", n):
+        graph = build_work_graph(work_units)
+    # валидация — колоночно по всему графу заранее; сами юниты считаются по готовности зависимостей
+    with stage("profiles", n):
+        metas = [_resolve_profile(work_unit) for work_unit in graph.units]
+    with stage("params", n):
+        invalid = _validate_params(graph.units, metas)
+
+    def step(index: int, upstream: tuple[_LinkedWork, ...]) -> _LinkedWork:
+        work = _build_work_result(graph.units[index], metas[index], invalid.get(index, ()))
+        return _link_dependencies(graph, index, work, upstream)
+
+    with stage("evaluate", n):
+        return _flatten_work_results(work for work, _ in run_work_graph(graph, step))
+
+
+def assemble_engine_result(
+    payload: EngineInput,
+    works: list[WorkResult],
+    meta_warnings: list[str],
+) -> EngineResult:
+    n = len(works)
+    with stage("trace", n):
+        # trace_id — Merkle-root входа: единственный хеш payload на горячем пути
+        trace_id = input_fingerprint(payload).root
     created_at = _resolve_created_at(payload)
-    meta = EngineMeta(
-        engine_version="engine_v1",
-        rules_version=payload.engine_context.rules_version,
-        created_at=created_at,
-        trace_id=trace_id,
-        warnings=meta_warnings,
-    )
-    totals = TotalsResult(cost_range=None, time_range=None)
-    return EngineResult(
-        project_profile=payload.project_profile,
-        inputs=payload,
-        works=works,
-        materials=[],
-        tools=[],
-        equipment=[],
-        stages=[],
-        qc=[],
-        risks=[],
-        totals=totals,
-        meta=meta,
-    )
+    with stage("bom", n):
+        resources, bom_warnings = aggregate_bom(works)
+    with stage("assemble", n):
+        # вход провалидирован EngineInput, остальное собрано движком: model_construct
+        # без второго прохода валидации по всем works (на 1k юнитов это заметная доля запроса)
+        meta = EngineMeta.model_construct(
+            engine_version="engine_v1",
+            rules_version=payload.engine_context.rules_version,
+            created_at=created_at,
+            trace_id=trace_id,
+            warnings=meta_warnings + bom_warnings,
+        )
+        totals = TotalsResult.model_construct(cost_range=None, time_range=None)
+        return EngineResult.model_construct(
+            project_profile=payload.project_profile,
+            inputs=payload,
+            works=works,
+            materials=resources["materials"],
+            tools=resources["tools"],
+            equipment=resources["equipment"],
+            stages=[],
+            qc=[],
+            risks=[],
+            totals=totals,
+            meta=meta,
+        )
+
+
+def attach_timings(result: EngineResult, timer: CalcTimer | None) -> EngineResult:
+    """meta.timings из таймера расчёта; без таймера (timings не запрошены) результат не меняется."""
+    if timer is not None:
+        result.meta.timings = [StageTimingItem.model_construct(**item) for item in timer.items()]
+    return result
+
+
+def calculate_v1(payload: EngineInput, *, timings: bool = False) -> EngineResult:
+    with collect_timings("engine_v1", timings) as timer:
+        works, meta_warnings = build_work_results(payload.work_graph)
+        result = assemble_engine_result(payload, works, meta_warnings)
+    return attach_timings(result, timer)
+
+
+class _PreviousWorks:
+    """Результаты прошлого расчёта, индексированные по отпечатку юнита."""
+
+    def __init__(self, previous: EngineResult):
+        self.works = previous.works
+        self.units = previous.inputs.work_graph
+        self.by_fingerprint: dict[str, list[int]] = {}
+        if previous.meta.engine_version == "engine_v1" and len(self.units) == len(self.works):
+            for index, work_unit in enumerate(self.units):
+                self.by_fingerprint.setdefault(work_unit_fingerprint(work_unit), []).append(index)
+
+    def find(
+        self,
+        work_unit: WorkUnit,
+        profile_ref: tuple[str | None, bool],
+        link_warnings: list[str],
+    ) -> WorkResult | None:
+        # профили версионируются в profile_id, поэтому изменённый профиль — другой profile_ref
+        for index in self.by_fingerprint.get(work_unit_fingerprint(work_unit), ()):
+            work = self.works[index]
+            # == страхует от совпадения хешей (запасной json.dumps сводит ключи 1 и "1")
+            if (
+                self.units[index] == work_unit
+                and (work.calculation_profile_id, work.status != WorkStatus.UNIMPLEMENTED) == profile_ref
+                and [w for w in work.warnings if w.startswith(_LINK_WARNING_CODES)] == link_warnings
+            ):
+                return work
+        return None
+
+
+def recalculate_v1(payload: EngineInput, previous: EngineResult) -> EngineResult:
+    """
+    Инкрементальный пересчёт относительно прошлого результата engine v1.
+
+    Заново считаются только юниты, у которых изменились параметры, профиль
+    или готовность зависимостей; остальные WorkResult берутся из previous
+    как есть. Результат совпадает с calculate_v1(payload).
+    """
+    previous_works = _PreviousWorks(previous)
+    graph = build_work_graph(payload.work_graph)
+
+    def step(index: int, upstream: tuple[_LinkedWork, ...]) -> _LinkedWork:
+        work_unit = graph.units[index]
+        meta = _resolve_profile(work_unit)
+        profile_ref = (meta.profile_id, True) if meta is not None else (work_unit.calculation_profile_id, False)
+        unknown = graph.unknown[index]
+        blocked = _blocked_dependencies(upstream)
+        work = previous_works.find(work_unit, profile_ref, _link_warnings(unknown, blocked))
+        if work is None:
+            (work,) = _evaluate([work_unit])
+            return _link_dependencies(graph, index, work, upstream)
+        return work, _is_ready(work, unknown, blocked)
+
+    works, meta_warnings = _flatten_work_results(work for work, _ in run_work_graph(graph, step))
+    return assemble_engine_result(payload, works, meta_warnings)
@@ -24,3 +24,7 @@ class CalcUnknownWork(CalcError):
 
 class CalcFailed(CalcError):
     code = "calc_failed"
+
+
+class CalcTimeout(CalcError):
+    code = "calc_timeout"
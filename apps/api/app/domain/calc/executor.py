@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Sequence, TypeVar
+
+from app.contracts.engine_v1.input import EngineInput, WorkUnit
+from app.contracts.engine_v1.result import EngineResult, WorkResult
+from app.settings import settings
+
+from .engine_v0 import get_calc_engine_v0
+from .engine_v1_skeleton import (
+    assemble_engine_result,
+    attach_timings,
+    build_work_results,
+    evaluate_work_units,
+    link_work_results,
+)
+from .errors import CalcError, CalcFailed, CalcTimeout
+from .profile_registry import get_profile_registry
+from .registry_v0 import build_recipe_registry_v0
+from .snapshot import get_snapshot
+from .timings import CalcTimer, StageTiming, bind_timer, collect_timings, current_timer, stage
+from .work_graph import build_work_graph
+
+T = TypeVar("T")
+
+
+# -------------------- worker side --------------------
+
+def _warm_worker() -> None:
+    """Загружает снапшот, рецепты и индекс профилей в процессе-воркере заранее."""
+    get_snapshot()
+    get_calc_engine_v0()
+    for recipe in build_recipe_registry_v0().values():
+        recipe()
+    get_profile_registry()
+
+
+_V0Chunk = tuple[list[dict[str, Any] | CalcError], list[StageTiming]]
+
+
+def _run_v0_chunk(inputs: list[dict[str, Any]]) -> _V0Chunk:
+    return get_calc_engine_v0().calculate_many(inputs), []
+
+
+def _run_v0_chunk_timed(inputs: list[dict[str, Any]]) -> _V0Chunk:
+    # метрики воркера остались бы в его процессе: стадии уходят родителю вместе с результатом
+    timer = CalcTimer("engine_v0")
+    with bind_timer(timer):
+        outcomes = get_calc_engine_v0().calculate_many(inputs)
+    return outcomes, list(timer.stages.values())
+
+
+def _run_v1_chunk(work_units: list[WorkUnit]) -> list[WorkResult]:
+    return evaluate_work_units(work_units)
+
+
+# -------------------- parent side --------------------
+
+class CalcJob:
+    """Набор чанков, отправленных в пул; результат собирается в исходном порядке."""
+
+    def __init__(self, futures: list[Future], deadline: float | None):
+        self.futures = futures
+        self.deadline = deadline
+
+    def cancel(self) -> None:
+        # ещё не начатые чанки снимаются; уже выполняющиеся доработают и будут отброшены
+        for future in self.futures:
+            future.cancel()
+
+    def result(self) -> list[Any]:
+        timeout = None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+        _, not_done = wait(self.futures, timeout=timeout)
+        if not_done:
+            self.cancel()
+            raise CalcTimeout("Calculation deadline exceeded")
+        return [future.result() for future in self.futures]
+
+
+@dataclass
+class CalcExecutor:
+    """
+    Выносит крупные CPU-bound расчёты в пул процессов.
+
+    Вызовы меньше offload_threshold элементов считаются inline в текущем
+    потоке. Крупные режутся на чанки по chunk_size и уходят в пре-прогретые
+    воркеры. deadline_s ограничивает время ожидания всего вызова.
+    """
+
+    max_workers: int
+    offload_threshold: int
+    chunk_size: int
+    deadline_s: float | None = None
+    start_method: str = "spawn"
+    _pool: ProcessPoolExecutor | None = field(default=None, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def should_offload(self, size: int) -> bool:
+        return self.max_workers > 0 and size >= self.offload_threshold
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_warm_worker,
+                )
+            return self._pool
+
+    def _reset_pool(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def warm_up(self) -> None:
+        """Поднимает все воркеры сразу, чтобы первый крупный запрос не ждал старта."""
+        if self.max_workers <= 0:
+            return
+        pool = self._get_pool()
+        wait([pool.submit(_warm_worker) for _ in range(self.max_workers)])
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _chunks(self, items: Sequence[T]) -> list[list[T]]:
+        size = max(1, self.chunk_size)
+        return [list(items[i:i + size]) for i in range(0, len(items), size)]
+
+    def submit(self, fn: Any, items: Sequence[Any], *, deadline_s: float | None = None) -> CalcJob:
+        deadline_s = self.deadline_s if deadline_s is None else deadline_s
+        if deadline_s is not None and deadline_s <= 0:
+            # иначе исход зависел бы от того, успеют ли мелкие чанки до первого wait
+            raise CalcTimeout("Calculation deadline exceeded")
+        deadline = None if deadline_s is None else time.monotonic() + deadline_s
+        pool = self._get_pool()
+        return CalcJob([pool.submit(fn, chunk) for chunk in self._chunks(items)], deadline)
+
+    def _collect(self, job: CalcJob) -> list[Any]:
+        try:
+            return job.result()
+        except BrokenProcessPool as e:
+            self._reset_pool()
+            raise CalcFailed("Calculation failed: BrokenProcessPool") from e
+        except BaseException:
+            job.cancel()
+            raise
+
+    def map_chunks(
+        self,
+        fn: Callable[[list[T]], list[Any]],
+        items: Sequence[T],
+        *,
+        deadline_s: float | None = None,
+    ) -> list[Any]:
+        """
+        fn(chunk) -> результат на каждый элемент чанка; мелкий вызов — inline,
+        крупный — чанками в пуле. fn должна быть функцией уровня модуля.
+        """
+        if not self.should_offload(len(items)):
+            return fn(list(items))
+        job = self.submit(fn, items, deadline_s=deadline_s)
+        return [outcome for chunk in self._collect(job) for outcome in chunk]
+
+    def calculate_many(
+        self,
+        inputs: Sequence[dict[str, Any]],
+        *,
+        deadline_s: float | None = None,
+    ) -> list[dict[str, Any] | CalcError]:
+        with collect_timings("engine_v0"):
+            if not self.should_offload(len(inputs)):
+                return get_calc_engine_v0().calculate_many(inputs)
+            timer = current_timer()
+            # CPU воркеров у стадии pool не виден: он приходит в их собственных стадиях
+            with stage("pool", len(inputs)):
+                job = self.submit(
+                    _run_v0_chunk if timer is None else _run_v0_chunk_timed, inputs, deadline_s=deadline_s
+                )
+                chunks: list[_V0Chunk] = self._collect(job)
+            if timer is not None:
+                for _, timings in chunks:
+                    timer.merge(timings)
+            return [outcome for outcomes, _ in chunks for outcome in outcomes]
+
+    def calculate_v1(
+        self,
+        payload: EngineInput,
+        *,
+        deadline_s: float | None = None,
+        timings: bool = False,
+    ) -> EngineResult:
+        with collect_timings("engine_v1", timings) as timer:
+            result = self._calculate_v1(payload, deadline_s)
+        return attach_timings(result, timer)
+
+    def _calculate_v1(self, payload: EngineInput, deadline_s: float | None) -> EngineResult:
+        n = len(payload.work_graph)
+        if not self.should_offload(n):
+            works, meta_warnings = build_work_results(payload.work_graph)
+            return assemble_engine_result(payload, works, meta_warnings)
+        # граф строится до отправки: цикл отклоняется, не занимая пул;
+        # чанки считают юниты независимо, зависимости связываются здесь
+        with stage("graph", n):
+            graph = build_work_graph(payload.work_graph)
+        # CPU воркеров сюда не попадает: у стадии pool значим только wall
+        with stage("pool", n):
+            job = self.submit(_run_v1_chunk, payload.work_graph, deadline_s=deadline_s)
+            evaluated = [item for chunk in self._collect(job) for item in chunk]
+        with stage("link", n):
+            works, meta_warnings = link_work_results(graph, evaluated)
+        return assemble_engine_result(payload, works, meta_warnings)
+
+
+_executor_singleton: CalcExecutor | None = None
+
+
+def get_calc_executor() -> CalcExecutor:
+    global _executor_singleton
+    if _executor_singleton is None:
+        _executor_singleton = CalcExecutor(
+            max_workers=settings.calc_pool_workers,
+            offload_threshold=settings.calc_pool_offload_threshold,
+            chunk_size=settings.calc_pool_chunk_size,
+            deadline_s=settings.calc_pool_deadline_s,
+            start_method=settings.calc_pool_start_method,
+        )
+    return _executor_singleton
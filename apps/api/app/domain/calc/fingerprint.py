@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+
+from pydantic import BaseModel
+
+from app.common.hashing import canonical_json, sha256_hex
+from app.contracts.engine_v1.input import EngineInput, WorkUnit
+
+
+@dataclass(frozen=True, slots=True)
+class InputFingerprint:
+    """
+    Merkle-отпечаток EngineInput: хеш на каждый WorkUnit, на project_profile
+    и engine_context; root — хеш от них в порядке work_graph.
+    """
+
+    project_profile: str
+    engine_context: str
+    work_units: tuple[str, ...]
+    root: str
+
+
+def _model_hash(model: BaseModel) -> str:
+    data = model.model_dump(mode="json", by_alias=True, exclude_none=False)
+    try:
+        return sha256_hex(canonical_json(data))
+    except TypeError:
+        # orjson не сортирует не-строковые ключи; медленный, но тот же детерминизм
+        return sha256_hex(json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+
+
+def work_unit_fingerprint(work_unit: WorkUnit) -> str:
+    """
+    Хеш содержимого юнита. Считается на каждый вызов: юнит — изменяемая
+    pydantic-модель, кеш по объекту отдал бы старый хеш после правки на месте.
+    """
+    try:
+        # поля напрямую, без model_dump — вдвое дешевле на больших графах
+        return sha256_hex(
+            canonical_json(
+                {
+                    "work_id": work_unit.work_id,
+                    "calculation_profile_id": work_unit.calculation_profile_id,
+                    "parameters": work_unit.parameters,
+                    "dependencies": work_unit.dependencies,
+                }
+            )
+        )
+    except TypeError:
+        return _model_hash(work_unit)
+
+
+def input_fingerprint(payload: EngineInput) -> InputFingerprint:
+    project_profile = _model_hash(payload.project_profile)
+    engine_context = _model_hash(payload.engine_context)
+    work_units = tuple(work_unit_fingerprint(work_unit) for work_unit in payload.work_graph)
+    root = sha256_hex(
+        canonical_json(
+            {
+                "project_profile": project_profile,
+                "engine_context": engine_context,
+                "work_graph": work_units,
+            }
+        )
+    )
+    return InputFingerprint(
+        project_profile=project_profile,
+        engine_context=engine_context,
+        work_units=work_units,
+        root=root,
+    )
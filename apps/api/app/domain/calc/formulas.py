@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import ast
+import math
+from collections import deque
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
+
+from app.contracts.engine_v1.profile import CalculationProfile, FormulaSpec
+from app.domain.calc.errors import CalcFailed
+
+# единственные вызываемые имена внутри формул
+_FUNCTIONS: Mapping[str, Callable[..., Any]] = MappingProxyType(
+    {
+        "min": min,
+        "max": max,
+        "abs": abs,
+        "round": round,
+        "ceil": math.ceil,
+        "floor": math.floor,
+        "sqrt": math.sqrt,
+    }
+)
+
+_BIN_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+_UNARY_OPS = (ast.UAdd, ast.USub, ast.Not)
+_CMP_OPS = (ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+_MAX_POW_EXPONENT = 16
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledFormula:
+    formula_id: str
+    unit: str | None
+    inputs: tuple[str, ...]  # аргументы fn: параметры и другие формулы
+    depends_on: tuple[str, ...]  # только формулы
+    fn: Callable[..., Any]
+    node_count: int
+
+
+@dataclass(frozen=True, slots=True)
+class FormulaPlan:
+    """Формулы профиля, скомпилированные один раз, в топологическом порядке."""
+
+    profile_id: str
+    steps: tuple[CompiledFormula, ...]
+
+    @property
+    def node_count(self) -> int:
+        return sum(step.node_count for step in self.steps)
+
+    def evaluate(self, parameters: Mapping[str, Any]) -> tuple[dict[str, Any], list[str]]:
+        """
+        Значения формул для параметров work unit. Формула без входов или
+        упавшая при вычислении пропускается с warning, как и зависящие от неё.
+        """
+        env = dict(parameters)
+        values: dict[str, Any] = {}
+        warnings: list[str] = []
+        for step in self.steps:
+            try:
+                args = [env[name] for name in step.inputs]
+            except KeyError:
+                missing = [name for name in step.inputs if name not in env]
+                warnings.append(f"FORMULA_INPUTS_MISSING:{step.formula_id}:{','.join(missing)}")
+                continue
+            try:
+                value = step.fn(*args)
+                if isinstance(value, float) and not math.isfinite(value):
+                    raise ArithmeticError("non-finite result")
+            except Exception as e:
+                warnings.append(f"FORMULA_FAILED:{step.formula_id}:{e.__class__.__name__}")
+                continue
+            env[step.formula_id] = value
+            values[step.formula_id] = value
+        return values, warnings
+
+
+def _invalid(profile_id: str, formula_id: str, reason: str) -> CalcFailed:
+    return CalcFailed(f"Invalid formula {profile_id}:{formula_id}: {reason}")
+
+
+def _check_node(node: ast.AST, names: list[str], fail: Callable[[str], CalcFailed]) -> int:
+    """Проверяет узел по белому списку; возвращает число узлов поддерева."""
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, (bool, int, float, str)):
+            return 1
+        raise fail(f"unsupported constant {node.value!r}")
+    if isinstance(node, ast.Name):
+        if node.id.startswith("_") or node.id in _FUNCTIONS:
+            raise fail(f"name {node.id!r} is not allowed here")
+        if node.id not in names:
+            names.append(node.id)
+        return 1
+    if isinstance(node, ast.BinOp) and isinstance(node.op, _BIN_OPS):
+        if isinstance(node.op, ast.Pow):
+            exponent = node.right
+            if not (isinstance(exponent, ast.Constant) and isinstance(exponent.value, (int, float))
+                    and abs(exponent.value) <= _MAX_POW_EXPONENT):
+                raise fail(f"exponent must be a constant within ±{_MAX_POW_EXPONENT}")
+        return 1 + _check_node(node.left, names, fail) + _check_node(node.right, names, fail)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, _UNARY_OPS):
+        return 1 + _check_node(node.operand, names, fail)
+    if isinstance(node, ast.BoolOp):
+        return 1 + sum(_check_node(value, names, fail) for value in node.values)
+    if isinstance(node, ast.Compare) and all(isinstance(op, _CMP_OPS) for op in node.ops):
+        return 1 + _check_node(node.left, names, fail) + sum(
+            _check_node(value, names, fail) for value in node.comparators
+        )
+    if isinstance(node, ast.IfExp):
+        return (
+            1
+            + _check_node(node.test, names, fail)
+            + _check_node(node.body, names, fail)
+            + _check_node(node.orelse, names, fail)
+        )
+    if isinstance(node, ast.Call):
+        if not (isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS) or node.keywords:
+            raise fail("only positional calls of " + ", ".join(sorted(_FUNCTIONS)) + " are allowed")
+        return 1 + sum(_check_node(arg, names, fail) for arg in node.args)
+    raise fail(f"unsupported syntax {node.__class__.__name__}")
+
+
+def compile_formula(
+    spec: FormulaSpec,
+    *,
+    profile_id: str,
+    params: frozenset[str],
+    formula_ids: frozenset[str],
+) -> CompiledFormula:
+    """Разбирает выражение один раз и превращает его в обычную Python-функцию."""
+
+    def fail(reason: str) -> CalcFailed:
+        return _invalid(profile_id, spec.formula_id, reason)
+
+    try:
+        tree = ast.parse(spec.expression, mode="eval")
+    except SyntaxError as e:
+        raise fail("syntax error") from e
+
+    names: list[str] = []
+    node_count = _check_node(tree.body, names, fail)
+    unknown = [name for name in names if name not in params and name not in formula_ids]
+    if unknown:
+        raise fail(f"unknown names {', '.join(unknown)}")
+
+    # lambda <входы>: <выражение> — без builtins, только функции из белого списка
+    fn_tree = ast.Expression(
+        body=ast.Lambda(
+            args=ast.arguments(
+                posonlyargs=[],
+                args=[ast.arg(arg=name) for name in names],
+                kwonlyargs=[],
+                kw_defaults=[],
+                defaults=[],
+            ),
+            body=tree.body,
+        )
+    )
+    ast.fix_missing_locations(fn_tree)
+    code = compile(fn_tree, f"<formula {profile_id}:{spec.formula_id}>", "eval")
+    fn = eval(code, {"__builtins__": {}, **_FUNCTIONS})  # noqa: S307 — дерево проверено выше
+
+    return CompiledFormula(
+        formula_id=spec.formula_id,
+        unit=spec.unit,
+        inputs=tuple(names),
+        depends_on=tuple(name for name in names if name in formula_ids),
+        fn=fn,
+        node_count=node_count,
+    )
+
+
+def compile_formula_plan(profile: CalculationProfile) -> FormulaPlan:
+    """Компилирует формулы профиля и упорядочивает их по зависимостям (Kahn)."""
+    profile_id = profile.profile_id
+    params = frozenset(param.key for param in profile.params)
+    formula_ids: list[str] = []
+    for spec in profile.formulas:
+        if not spec.formula_id.isidentifier() or spec.formula_id.startswith("_"):
+            raise _invalid(profile_id, spec.formula_id, "formula_id must be an identifier")
+        if spec.formula_id in params or spec.formula_id in formula_ids:
+            raise _invalid(profile_id, spec.formula_id, "formula_id must be unique")
+        formula_ids.append(spec.formula_id)
+
+    ids = frozenset(formula_ids)
+    compiled = {
+        spec.formula_id: compile_formula(spec, profile_id=profile_id, params=params, formula_ids=ids)
+        for spec in profile.formulas
+    }
+
+    pending = {formula_id: len(set(step.depends_on)) for formula_id, step in compiled.items()}
+    dependents: dict[str, list[str]] = {formula_id: [] for formula_id in compiled}
+    for formula_id, step in compiled.items():
+        for dep in set(step.depends_on):
+            dependents[dep].append(formula_id)
+
+    # при равных правах сохраняем порядок объявления в профиле
+    ready = deque(formula_id for formula_id in formula_ids if pending[formula_id] == 0)
+    order: list[CompiledFormula] = []
+    while ready:
+        formula_id = ready.popleft()
+        order.append(compiled[formula_id])
+        for dependent in dependents[formula_id]:
+            pending[dependent] -= 1
+            if pending[dependent] == 0:
+                ready.append(dependent)
+
+    if len(order) != len(compiled):
+        cycle = [formula_id for formula_id in formula_ids if pending[formula_id] > 0]
+        raise CalcFailed(f"Formula cycle in {profile_id}: {', '.join(cycle)}")
+    return FormulaPlan(profile_id=profile_id, steps=tuple(order))
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import Enum
+from types import MappingProxyType
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+
+from app.domain.calc.errors import CalcInvalidInput
+
+# знаков после запятой в минорной единице валюты (копейки, центы)
+CURRENCY_MINOR_DIGITS: Mapping[str, int] = MappingProxyType(
+    {
+        "RUB": 2,
+        "BYN": 2,
+        "KZT": 2,
+        "USD": 2,
+        "EUR": 2,
+        "CNY": 2,
+        "JPY": 0,
+    }
+)
+DEFAULT_MINOR_DIGITS = 2
+
+# количества переводятся в целые тысячные доли единицы (0.001 л / ч / шт)
+QTY_SCALE = 1000
+
+# цены за единицу хранятся точнее минорной единицы: 0.0049 ₽/ч × 280 ч — это
+# 1.37 ₽, а не 0; округление до минорной единицы — только у итога строки
+PRICE_EXTRA_DIGITS = 6
+
+# выше этой границы произведения считаются в Python int, а не в int64
+_INT64_SAFE = 2**62
+
+
+class Rounding(str, Enum):
+    HALF_UP = "half_up"  # 0.5 -> от нуля
+    HALF_EVEN = "half_even"  # банковское
+    UP = "up"  # от нуля
+    DOWN = "down"  # к нулю
+
+
+def minor_digits(currency: str) -> int:
+    return CURRENCY_MINOR_DIGITS.get(currency.upper(), DEFAULT_MINOR_DIGITS)
+
+
+def _digits_array(currency: str | Sequence[str], n: int) -> np.ndarray:
+    if isinstance(currency, str):
+        return np.full(n, minor_digits(currency), dtype=np.int64)
+    return np.fromiter((minor_digits(str(c)) for c in currency), dtype=np.int64, count=n)
+
+
+def _round_float(values: np.ndarray, rounding: Rounding) -> np.ndarray:
+    if rounding is Rounding.HALF_EVEN:
+        return np.rint(values)
+    magnitude = np.abs(values)
+    if rounding is Rounding.HALF_UP:
+        magnitude = np.floor(magnitude + 0.5)
+    elif rounding is Rounding.UP:
+        magnitude = np.ceil(magnitude)
+    else:
+        magnitude = np.floor(magnitude)
+    return np.copysign(magnitude, values)
+
+
+def to_minor(
+    amounts: Any,
+    currency: str | Sequence[str] = "RUB",
+    rounding: Rounding = Rounding.HALF_UP,
+) -> np.ndarray:
+    """
+    Суммы в основных единицах -> int64-массив минорных единиц.
+
+    Ошибка представления float (0.295 * 100 = 29.499999...) гасится
+    округлением до 6 знаков перед применением политики rounding.
+    """
+    values = np.asarray(amounts, dtype=np.float64).reshape(-1)
+    if not np.isfinite(values).all():
+        raise CalcInvalidInput("Money amount must be a finite number")
+    scaled = np.round(values * 10.0 ** _digits_array(currency, len(values)), 6)
+    if (np.abs(scaled) >= 2.0**53).any():
+        raise CalcInvalidInput("Money amount is too large")
+    return _round_float(scaled, rounding).astype(np.int64)
+
+
+def to_price_units(amounts: Any, currency: str | Sequence[str] = "RUB") -> np.ndarray:
+    """
+    Цены за единицу -> целые доли 10**-(minor_digits + PRICE_EXTRA_DIGITS).
+
+    Ошибка представления float (0.0049 * 1e8 = 490000.00000000006) гасится
+    округлением до целой доли. Значения за пределами int64 — Python int
+    (dtype=object), как и в line_costs.
+    """
+    values = np.asarray(amounts, dtype=np.float64).reshape(-1)
+    if not np.isfinite(values).all():
+        raise CalcInvalidInput("Money amount must be a finite number")
+    scaled = np.rint(values * 10.0 ** (_digits_array(currency, len(values)) + PRICE_EXTRA_DIGITS))
+    if (np.abs(scaled) >= _INT64_SAFE).any():
+        return np.array([int(value) for value in scaled], dtype=object)
+    return scaled.astype(np.int64)
+
+
+def from_minor(minor: Any, currency: str | Sequence[str] = "RUB") -> np.ndarray:
+    """Минорные единицы -> float в основных единицах (только для вывода)."""
+    values = np.asarray(minor).reshape(-1)
+    return values.astype(np.float64) / 10.0 ** _digits_array(currency, len(values))
+
+
+def quantity_units(quantities: Any) -> np.ndarray:
+    """Количества -> целые тысячные доли (int64)."""
+    values = np.asarray(quantities, dtype=np.float64).reshape(-1)
+    if not np.isfinite(values).all():
+        raise CalcInvalidInput("Quantity must be a finite number")
+    scaled = np.rint(values * QTY_SCALE)
+    if (np.abs(scaled) >= 2.0**62).any():
+        raise CalcInvalidInput("Quantity is too large")
+    return scaled.astype(np.int64)
+
+
+def div_round(numerator: np.ndarray, denominator: int, rounding: Rounding) -> np.ndarray:
+    """Целочисленное деление с явной политикой округления (int64 или object)."""
+    negative = numerator < 0
+    magnitude = np.abs(numerator)
+    # // и % вместо np.divmod: divmod не поддерживает dtype=object
+    quotient, remainder = magnitude // denominator, magnitude % denominator
+    if rounding is Rounding.HALF_UP:
+        quotient = quotient + (2 * remainder >= denominator)
+    elif rounding is Rounding.HALF_EVEN:
+        half = 2 * remainder
+        quotient = quotient + ((half > denominator) | ((half == denominator) & (quotient % 2 == 1)))
+    elif rounding is Rounding.UP:
+        quotient = quotient + (remainder > 0)
+    return np.where(negative, -quotient, quotient)
+
+
+def line_costs(
+    price_units: np.ndarray,
+    quantities: Any,
+    rounding: Rounding = Rounding.HALF_UP,
+) -> np.ndarray:
+    """
+    Стоимость строк BOM: цена (доли из to_price_units) × количество, округлённая
+    до минорной единицы один раз на строку. Всё в целых числах; при риске
+    переполнения int64 — в Python int (dtype=object).
+    """
+    price = np.asarray(price_units).reshape(-1)
+    if price.dtype != object:
+        price = price.astype(np.int64)
+    qty = quantity_units(quantities)
+    bound = int(np.abs(price).max(initial=0)) * int(np.abs(qty).max(initial=0))
+    if bound >= _INT64_SAFE:
+        product = price.astype(object) * qty.astype(object)
+    else:
+        product = price * qty
+    return div_round(product, QTY_SCALE * 10**PRICE_EXTRA_DIGITS, rounding)
+
+
+@dataclass(frozen=True, slots=True)
+class Money:
+    minor: int
+    currency: str
+
+    @classmethod
+    def of(cls, amount: Any, currency: str = "RUB", rounding: Rounding = Rounding.HALF_UP) -> "Money":
+        return cls(int(to_minor([amount], currency, rounding)[0]), currency)
+
+    @property
+    def amount(self) -> float:
+        return self.minor / 10.0 ** minor_digits(self.currency)
+
+    def _check(self, other: "Money") -> None:
+        if other.currency != self.currency:
+            raise CalcInvalidInput(f"Cannot combine money in {self.currency} and {other.currency}")
+
+    def __add__(self, other: "Money") -> "Money":
+        self._check(other)
+        return Money(self.minor + other.minor, self.currency)
+
+    def __sub__(self, other: "Money") -> "Money":
+        self._check(other)
+        return Money(self.minor - other.minor, self.currency)
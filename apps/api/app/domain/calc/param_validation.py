@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+
+from app.contracts.engine_v1.profile import CalculationProfile, ParamType, ProfileParam
+from app.domain.calc.errors import CalcFailed
+
+
+class _Missing:
+    pass
+
+
+_MISSING = _Missing()
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value)
+    except OverflowError:
+        # int за пределами float64 — такое же нарушение типа, как nan/inf
+        return math.nan
+
+
+# допустимые python-типы значения по типу параметра; bool — не число
+_ALLOWED_TYPES: Mapping[ParamType, tuple[type, ...]] = {
+    ParamType.NUMBER: (int, float),
+    ParamType.STRING: (str,),
+    ParamType.BOOLEAN: (bool,),
+    ParamType.ENUM: (str,),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class ParamCheck:
+    key: str
+    type: ParamType
+    min: float | None
+    max: float | None
+    options: tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class ParamValidator:
+    """
+    Проверки ProfileParam (тип, min/max, options), собранные один раз на профиль.
+
+    validate() работает по колонкам: значения одного параметра у всех юнитов
+    профиля проверяются numpy-масками, Python-цикл идёт только по нарушениям.
+    Значения не приводятся и не переписываются — результат повторяет вход.
+    """
+
+    profile_id: str
+    checks: tuple[ParamCheck, ...]
+
+    def validate(self, rows: Sequence[Mapping[str, Any]]) -> dict[int, list[str]]:
+        """
+        Нарушения по индексу строки: INVALID_PARAM:<key>:<type|min|max|options>,
+        в порядке параметров профиля. Отсутствующие ключи не проверяются.
+        """
+        n = len(rows)
+        errors: dict[int, list[str]] = {}
+        if n == 0:
+            return errors
+        for check in self.checks:
+            values = np.fromiter((row.get(check.key, _MISSING) for row in rows), dtype=object, count=n)
+            types = np.fromiter(map(type, values), dtype=object, count=n)
+            present = types != _Missing
+            if not present.any():
+                continue
+            ok = np.zeros(n, dtype=bool)
+            for allowed in _ALLOWED_TYPES[check.type]:
+                ok |= types == allowed
+
+            violations: list[tuple[str, np.ndarray]] = []
+            if check.type is ParamType.NUMBER:
+                numbers = np.full(n, np.nan)
+                try:
+                    numbers[ok] = values[ok].astype(np.float64)
+                except OverflowError:
+                    numbers[ok] = np.fromiter(map(_as_float, values[ok]), dtype=np.float64)
+                ok &= np.isfinite(numbers)
+                if check.min is not None:
+                    violations.append(("min", ok & (numbers < check.min)))
+                if check.max is not None:
+                    violations.append(("max", ok & (numbers > check.max)))
+            elif check.type is ParamType.ENUM:
+                in_options = np.zeros(n, dtype=bool)
+                for option in check.options:
+                    in_options |= values == option
+                violations.append(("options", ok & ~in_options))
+            violations.insert(0, ("type", present & ~ok))
+
+            for rule, mask in violations:
+                for index in np.flatnonzero(mask).tolist():
+                    errors.setdefault(index, []).append(f"INVALID_PARAM:{check.key}:{rule}")
+        return errors
+
+
+def _bound(profile_id: str, param: ProfileParam, name: str) -> float | None:
+    value = param.validation.get(name)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise CalcFailed(f"Invalid {name} for param {param.key} in profile {profile_id}")
+    return float(value)
+
+
+def compile_param_validator(profile: CalculationProfile) -> ParamValidator:
+    checks = []
+    for param in profile.params:
+        minimum = _bound(profile.profile_id, param, "min")
+        maximum = _bound(profile.profile_id, param, "max")
+        if (minimum is not None or maximum is not None) and param.type is not ParamType.NUMBER:
+            raise CalcFailed(f"min/max on non-number param {param.key} in profile {profile.profile_id}")
+        checks.append(
+            ParamCheck(
+                key=param.key,
+                type=param.type,
+                min=minimum,
+                max=maximum,
+                options=tuple(param.options),
+            )
+        )
+    return ParamValidator(profile_id=profile.profile_id, checks=tuple(checks))
@@ -1,27 +1,180 @@
 from __future__ import annotations
 
+import json
+import sys
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Mapping
 
 from pydantic import ValidationError
 
+from app.common.hashing import canonical_json, sha256_hex
 from app.contracts.engine_v1.profile import CalculationProfile
 from app.domain.calc.errors import CalcFailed
-from app.domain.calc.recipes_loader import load_yaml_recipe
+from app.domain.calc.recipes_loader import parse_yaml, read_yaml_bytes
+from app.domain.calc.snapshot import get_snapshot
 
 _PROFILE_DIR = Path(__file__).resolve().parent / "profiles"
+INDEX_FILE = "index.json"
+_INDEX_VERSION = 1
 
 
-def load_profiles() -> List[CalculationProfile]:
+class StaleProfileIndex(CalcFailed):
+    """Файл профиля правили после сборки индекса так, что поменялись его ключи."""
+
+
+def validate_profile(data: dict, name: str) -> CalculationProfile:
+    try:
+        return CalculationProfile.model_validate(data)
+    except ValidationError as exc:
+        raise CalcFailed(f"Invalid calculation profile: {name}") from exc
+
+
+def load_profile_file(
+    path: Path,
+    parsed: Mapping[str, CalculationProfile] | None = None,
+) -> tuple[CalculationProfile, str]:
+    """
+    Профиль и sha256 файла; из parsed (sha256 -> профиль, уже разобранный
+    в этом процессе) или из снапшота, если файл не менялся с их сборки.
+    """
+    raw = read_yaml_bytes(path)
+    checksum = sha256_hex(raw)
+    profile = parsed.get(checksum) if parsed else None
+    if profile is None:
+        profile = get_snapshot().profile(checksum)
+    if profile is None:
+        profile = validate_profile(parse_yaml(raw, path.name), path.name)
+    return profile, checksum
+
+
+def load_profiles(profile_dir: Path = _PROFILE_DIR) -> List[CalculationProfile]:
     profiles: List[CalculationProfile] = []
-    if not _PROFILE_DIR.exists():
+    if not profile_dir.exists():
         return profiles
 
-    for path in sorted(_PROFILE_DIR.glob("*.yaml")):
-        data = load_yaml_recipe(path)
-        try:
-            profile = CalculationProfile.model_validate(data)
-        except ValidationError as exc:
-            raise CalcFailed(f"Invalid calculation profile: {path.name}") from exc
-        profiles.append(profile)
+    for path in sorted(profile_dir.glob("*.yaml")):
+        profiles.append(load_profile_file(path)[0])
     return profiles
+
+
+@dataclass(frozen=True, slots=True)
+class ProfileIndexEntry:
+    profile_id: str
+    work_id: str
+    file: str
+    sha256: str
+
+
+@dataclass(frozen=True)
+class ProfileIndex:
+    """
+    profile_id/work_id -> файл профиля и его sha256.
+
+    Строится при сборке образа (`python -m app.domain.calc.profile_loader`),
+    чтобы старт не разбирал весь каталог: профиль парсится при первом обращении.
+    """
+
+    profile_dir: Path
+    by_profile_id: Dict[str, ProfileIndexEntry]
+    by_work_id: Dict[str, ProfileIndexEntry]
+    # sha256 -> профиль, разобранный полным проходом build_profile_index
+    parsed: Mapping[str, CalculationProfile] = field(default_factory=dict)
+
+    @classmethod
+    def from_entries(
+        cls,
+        profile_dir: Path,
+        entries: List[ProfileIndexEntry],
+        parsed: Mapping[str, CalculationProfile] | None = None,
+    ) -> "ProfileIndex":
+        by_profile_id: Dict[str, ProfileIndexEntry] = {}
+        by_work_id: Dict[str, ProfileIndexEntry] = {}
+        for entry in entries:
+            if entry.profile_id in by_profile_id:
+                raise CalcFailed(f"Duplicate profile_id: {entry.profile_id}")
+            if entry.work_id in by_work_id:
+                raise CalcFailed(f"Duplicate work_id: {entry.work_id}")
+            by_profile_id[entry.profile_id] = entry
+            by_work_id[entry.work_id] = entry
+        return cls(
+            profile_dir=profile_dir,
+            by_profile_id=by_profile_id,
+            by_work_id=by_work_id,
+            parsed=dict(parsed or {}),
+        )
+
+    def entries(self) -> List[ProfileIndexEntry]:
+        return list(self.by_profile_id.values())
+
+    def load(self, entry: ProfileIndexEntry) -> CalculationProfile:
+        profile, checksum = load_profile_file(self.profile_dir / entry.file, self.parsed)
+        # файл правили после сборки индекса: годится, пока ключи индекса те же
+        if checksum != entry.sha256 and (profile.profile_id, profile.work_id) != (
+            entry.profile_id,
+            entry.work_id,
+        ):
+            raise StaleProfileIndex(f"Stale profile index: {entry.file}")
+        return profile
+
+
+def build_profile_index(profile_dir: Path = _PROFILE_DIR) -> ProfileIndex:
+    """
+    Полный проход по каталогу — для сборки образа и как запасной путь без индекса.
+    Разобранные профили остаются в индексе: реестр не разбирает их второй раз.
+    """
+    entries: List[ProfileIndexEntry] = []
+    parsed: Dict[str, CalculationProfile] = {}
+    if profile_dir.exists():
+        for path in sorted(profile_dir.glob("*.yaml")):
+            profile, checksum = load_profile_file(path)
+            parsed[checksum] = profile
+            entries.append(
+                ProfileIndexEntry(
+                    profile_id=profile.profile_id,
+                    work_id=profile.work_id,
+                    file=path.name,
+                    sha256=checksum,
+                )
+            )
+    return ProfileIndex.from_entries(profile_dir, entries, parsed)
+
+
+def write_profile_index(profile_dir: Path = _PROFILE_DIR) -> Path:
+    index = build_profile_index(profile_dir)
+    data = {
+        "version": _INDEX_VERSION,
+        "profiles": [
+            {"profile_id": e.profile_id, "work_id": e.work_id, "file": e.file, "sha256": e.sha256}
+            for e in index.entries()
+        ],
+    }
+    path = profile_dir / INDEX_FILE
+    path.write_bytes(canonical_json(data))
+    return path
+
+
+def load_profile_index(profile_dir: Path = _PROFILE_DIR) -> ProfileIndex:
+    """
+    Индекс с диска; без файла индекса, при другой версии формата или другом
+    наборе *.yaml (добавили/удалили профиль без пересборки) — полный проход.
+    """
+    try:
+        data = json.loads((profile_dir / INDEX_FILE).read_bytes())
+    except (OSError, ValueError):
+        return build_profile_index(profile_dir)
+    if not isinstance(data, dict) or data.get("version") != _INDEX_VERSION:
+        return build_profile_index(profile_dir)
+    try:
+        entries = [ProfileIndexEntry(**item) for item in data.get("profiles", [])]
+    except TypeError:
+        return build_profile_index(profile_dir)
+    files = {path.name for path in profile_dir.glob("*.yaml")}
+    if files != {entry.file for entry in entries}:
+        return build_profile_index(profile_dir)
+    return ProfileIndex.from_entries(profile_dir, entries)
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else _PROFILE_DIR
+    print(write_profile_index(target))
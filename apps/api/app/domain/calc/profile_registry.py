@@ -1,42 +1,135 @@
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, List, Optional
-
-from app.contracts.engine_v1.profile import CalculationProfile
-from app.domain.calc.errors import CalcFailed
-from app.domain.calc.profile_loader import load_profiles
+from typing import Any, List, Mapping, Optional
+
+from app.contracts.engine_v1.profile import CalculationProfile, OutputSections
+from app.domain.calc.bom import BomPlan, compile_bom_plan
+from app.domain.calc.formulas import FormulaPlan, compile_formula_plan
+from app.domain.calc.param_validation import ParamValidator, compile_param_validator
+from app.domain.calc.profile_loader import (
+    ProfileIndex,
+    ProfileIndexEntry,
+    StaleProfileIndex,
+    build_profile_index,
+    load_profile_index,
+)
+from app.settings import settings
+
+# секции не зависят от профиля: это поля OutputSections в порядке объявления
+_EXPECTED_SECTIONS: tuple[str, ...] = tuple(OutputSections.model_fields)
+
+
+@dataclass(frozen=True, slots=True)
+class ProfileMeta:
+    """Всё, что расчёт юнита берёт из профиля, посчитанное один раз при сборке реестра."""
+
+    profile: CalculationProfile
+    required_keys: tuple[str, ...]  # в порядке params, для WorkResult.required_params
+    required: frozenset[str]
+    optional: frozenset[str]
+    expected_sections: tuple[str, ...]
+    formula_plan: FormulaPlan
+    bom_plan: BomPlan
+    validator: ParamValidator
+
+    @property
+    def profile_id(self) -> str:
+        return self.profile.profile_id
+
+    def missing_required(self, parameters: Mapping[str, Any]) -> list[str]:
+        if self.required <= parameters.keys():
+            return []
+        return [key for key in self.required_keys if key not in parameters]
+
+
+def _build_meta(profile: CalculationProfile) -> ProfileMeta:
+    required_keys = tuple(param.key for param in profile.params if param.required)
+    return ProfileMeta(
+        profile=profile,
+        required_keys=required_keys,
+        required=frozenset(required_keys),
+        optional=frozenset(param.key for param in profile.params if not param.required),
+        expected_sections=_EXPECTED_SECTIONS,
+        formula_plan=compile_formula_plan(profile),
+        bom_plan=compile_bom_plan(profile),
+        validator=compile_param_validator(profile),
+    )
 
 
-@dataclass(frozen=True)
 class ProfileRegistry:
-    profiles_by_id: Dict[str, CalculationProfile]
-    profiles_by_work_id: Dict[str, CalculationProfile]
+    """
+    Профили по индексу каталога: файл разбирается и компилируется в ProfileMeta
+    при первом обращении, готовые ProfileMeta держит LRU на max_cached записей.
+    """
+
+    def __init__(self, index: ProfileIndex, max_cached: int):
+        self.index = index
+        self.max_cached = max(1, max_cached)
+        self._metas: OrderedDict[str, ProfileMeta] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, key: str, by_work_id: bool) -> ProfileIndexEntry | None:
+        index = self.index
+        return (index.by_work_id if by_work_id else index.by_profile_id).get(key)
+
+    def _rebuild_index(self, stale: ProfileIndex) -> None:
+        # полный проход вне блокировки; индекс меняет тот, кто успел первым
+        index = build_profile_index(stale.profile_dir)
+        with self._lock:
+            if self.index is stale:
+                self.index = index
+                self._metas.clear()
+
+    def _get(self, key: str, by_work_id: bool) -> Optional[ProfileMeta]:
+        index = self.index
+        try:
+            return self._load(index, self._entry(key, by_work_id))
+        except StaleProfileIndex:
+            # ключи файла поменялись после сборки индекса: пересобираем и ищем заново
+            self._rebuild_index(index)
+            return self._load(self.index, self._entry(key, by_work_id))
+
+    def _load(self, index: ProfileIndex, entry: ProfileIndexEntry | None) -> Optional[ProfileMeta]:
+        if entry is None:
+            return None
+        with self._lock:
+            meta = self._metas.get(entry.profile_id)
+            if meta is not None:
+                self._metas.move_to_end(entry.profile_id)
+                return meta
+        # разбор вне блокировки: два потока могут собрать один профиль, в кеше останется один
+        meta = _build_meta(index.load(entry))
+        with self._lock:
+            meta = self._metas.setdefault(entry.profile_id, meta)
+            self._metas.move_to_end(entry.profile_id)
+            while len(self._metas) > self.max_cached:
+                self._metas.popitem(last=False)
+        return meta
 
     def get_profile_by_id(self, profile_id: str) -> Optional[CalculationProfile]:
-        return self.profiles_by_id.get(profile_id)
+        meta = self.get_meta_by_id(profile_id)
+        return meta.profile if meta is not None else None
 
     def get_profile_by_work_id(self, work_id: str) -> Optional[CalculationProfile]:
-        return self.profiles_by_work_id.get(work_id)
+        meta = self.get_meta_by_work_id(work_id)
+        return meta.profile if meta is not None else None
+
+    def get_meta_by_id(self, profile_id: str) -> Optional[ProfileMeta]:
+        return self._get(profile_id, by_work_id=False)
+
+    def get_meta_by_work_id(self, work_id: str) -> Optional[ProfileMeta]:
+        return self._get(work_id, by_work_id=True)
+
+    def get_formula_plan(self, profile_id: str) -> Optional[FormulaPlan]:
+        meta = self.get_meta_by_id(profile_id)
+        return meta.formula_plan if meta is not None else None
 
     def list_profiles(self) -> List[CalculationProfile]:
-        return list(self.profiles_by_id.values())
-
-
-def _build_registry(profiles: List[CalculationProfile]) -> ProfileRegistry:
-    profiles_by_id: Dict[str, CalculationProfile] = {}
-    profiles_by_work_id: Dict[str, CalculationProfile] = {}
-    for profile in profiles:
-        if profile.profile_id in profiles_by_id:
-            raise CalcFailed(f"Duplicate profile_id: {profile.profile_id}")
-        if profile.work_id in profiles_by_work_id:
-            raise CalcFailed(f"Duplicate work_id: {profile.work_id}")
-        profiles_by_id[profile.profile_id] = profile
-        profiles_by_work_id[profile.work_id] = profile
-    return ProfileRegistry(
-        profiles_by_id=profiles_by_id,
-        profiles_by_work_id=profiles_by_work_id,
-    )
+        # разбирает весь каталог — не для горячего пути
+        return [self.index.load(entry) for entry in self.index.entries()]
 
 
 _REGISTRY_CACHE: ProfileRegistry | None = None
@@ -45,11 +138,15 @@ _REGISTRY_CACHE: ProfileRegistry | None = None
 def _get_registry() -> ProfileRegistry:
     global _REGISTRY_CACHE
     if _REGISTRY_CACHE is None:
-        profiles = load_profiles()
-        _REGISTRY_CACHE = _build_registry(profiles)
+        _REGISTRY_CACHE = ProfileRegistry(load_profile_index(), settings.calc_profile_cache_size)
     return _REGISTRY_CACHE
 
 
+def get_profile_registry() -> ProfileRegistry:
+    """Индекс каталога читается при первом вызове, сами профили — по мере обращения."""
+    return _get_registry()
+
+
 def get_profile_by_work_id(work_id: str) -> Optional[CalculationProfile]:
     return _get_registry().get_profile_by_work_id(work_id)
 
@@ -58,5 +155,17 @@ def get_profile_by_id(profile_id: str) -> Optional[CalculationProfile]:
     return _get_registry().get_profile_by_id(profile_id)
 
 
+def get_profile_meta(work_id: str, profile_id: str | None = None) -> Optional[ProfileMeta]:
+    """Профиль юнита: по явному profile_id, иначе по work_id."""
+    registry = _get_registry()
+    if profile_id:
+        return registry.get_meta_by_id(profile_id)
+    return registry.get_meta_by_work_id(work_id)
+
+
+def get_formula_plan(profile_id: str) -> Optional[FormulaPlan]:
+    return _get_registry().get_formula_plan(profile_id)
+
+
 def list_profiles() -> List[CalculationProfile]:
     return _get_registry().list_profiles()
@@ -1,24 +1,206 @@
 from __future__ import annotations
 
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Mapping
 
+import numpy as np
+
+from app.common.hashing import sha256_hex
 from app.domain.calc.errors import CalcFailed
+from app.domain.calc.snapshot import get_snapshot
+from app.settings import settings
 
 
-def load_yaml_recipe(path: Path) -> dict[str, Any]:
+def parse_yaml(raw: bytes, name: str) -> dict[str, Any]:
     try:
         import yaml  # type: ignore
     except Exception as e:
         raise CalcFailed("Missing dependency: pyyaml") from e
 
     try:
-        with path.open("r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+        data = yaml.safe_load(raw.decode("utf-8"))
         if not isinstance(data, dict):
             raise CalcFailed("Invalid recipe format: root must be a mapping")
         return data
     except CalcFailed:
         raise
+    except Exception as e:
+        raise CalcFailed(f"Failed to load recipe: {name}") from e
+
+
+def read_yaml_bytes(path: Path) -> bytes:
+    try:
+        return path.read_bytes()
     except Exception as e:
         raise CalcFailed(f"Failed to load recipe: {path.name}") from e
+
+
+def load_yaml_recipe(path: Path) -> dict[str, Any]:
+    return parse_yaml(read_yaml_bytes(path), path.name)
+
+
+def load_yaml_with_checksum(path: Path) -> tuple[dict[str, Any], str]:
+    """Разобранный YAML и sha256 исходных байтов файла."""
+    raw = read_yaml_bytes(path)
+    return parse_yaml(raw, path.name), sha256_hex(raw)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledRecipe:
+    """
+    Рецепт, разобранный один раз при загрузке.
+
+    enum_index[enum][value] -> позиция значения в таблицах норм.
+    norms[name] для карт вида `<name>_by_<enum>` — float-массив длиной
+    len(enum_index[enum]) + 1; отсутствующая норма и последний слот
+    («значение не найдено») равны nan.
+    """
+
+    recipe_id: str
+    version: int
+    checksum: str
+    enums: Mapping[str, frozenset[str]]
+    enum_index: Mapping[str, Mapping[str, int]]
+    norms: Mapping[str, np.ndarray]
+    norm_enum: Mapping[str, str]
+    defaults: Mapping[str, Any]
+    bundles: Mapping[str, int]
+    rounding: Mapping[str, float]
+
+    def lookup(self, enum: str, values: list[Any]) -> np.ndarray:
+        """Индексы значений в таблицах enum; не найденные -> nan-слот."""
+        index = self.enum_index[enum]
+        missing = len(index)
+        return np.fromiter(
+            (index.get(v, missing) if isinstance(v, str) else missing for v in values),
+            dtype=np.int64,
+            count=len(values),
+        )
+
+
+def _section(data: dict[str, Any], key: str) -> dict[str, Any]:
+    value = data.get(key)
+    return value if isinstance(value, dict) else {}
+
+
+def _frozen_array(values: np.ndarray) -> np.ndarray:
+    values.flags.writeable = False
+    return values
+
+
+def compile_recipe(data: dict[str, Any], *, name: str = "recipe", checksum: str = "") -> CompiledRecipe:
+    recipe_id = data.get("id")
+    if not isinstance(recipe_id, str) or not recipe_id:
+        raise CalcFailed(f"Invalid recipe format: {name} must define id")
+    try:
+        version = int(data.get("version", 1) or 1)
+    except Exception as e:
+        raise CalcFailed(f"Invalid recipe version: {name}") from e
+
+    enums_raw = data.get("enums", {}) or {}
+    norms_raw = _section(data, "norms")
+
+    # enum -> упорядоченные значения; без явного enum берём ключи карт норм
+    enum_values: dict[str, list[str]] = {}
+    for enum, values in enums_raw.items():
+        enum_values[enum] = [str(v) for v in values or []]
+    norm_enum: dict[str, str] = {}
+    for norm_name, mapping in norms_raw.items():
+        _, sep, enum = norm_name.rpartition("_by_")
+        if not sep or not isinstance(mapping, dict):
+            continue
+        norm_enum[norm_name] = enum
+        known = enum_values.setdefault(enum, [])
+        if enum not in enums_raw:
+            known.extend(str(k) for k in mapping if str(k) not in known)
+
+    enum_index = {
+        enum: MappingProxyType({value: idx for idx, value in enumerate(values)})
+        for enum, values in enum_values.items()
+    }
+
+    norms: dict[str, np.ndarray] = {}
+    for norm_name, enum in norm_enum.items():
+        mapping = norms_raw[norm_name]
+        index = enum_index[enum]
+        table = np.full(len(index) + 1, np.nan)
+        for value, idx in index.items():
+            if value not in mapping:
+                continue
+            try:
+                table[idx] = float(mapping[value])
+            except Exception as e:
+                raise CalcFailed(f"Invalid recipe norm: {name}: {norm_name}.{value}") from e
+        norms[norm_name] = _frozen_array(table)
+
+    try:
+        bundles = {key: int(value or 1) for key, value in _section(data, "bundles").items()}
+        rounding = {key: float(value or 0) for key, value in _section(data, "rounding").items()}
+    except Exception as e:
+        raise CalcFailed(f"Invalid recipe constants: {name}") from e
+
+    return CompiledRecipe(
+        recipe_id=recipe_id,
+        version=version,
+        checksum=checksum,
+        enums=MappingProxyType({enum: frozenset(enums_raw.get(enum) or []) for enum in enums_raw}),
+        enum_index=MappingProxyType(enum_index),
+        norms=MappingProxyType(norms),
+        norm_enum=MappingProxyType(norm_enum),
+        defaults=MappingProxyType(dict(_section(data, "defaults"))),
+        bundles=MappingProxyType(bundles),
+        rounding=MappingProxyType(rounding),
+    )
+
+
+@dataclass(slots=True)
+class _CachedRecipe:
+    stamp: tuple[int, int]
+    compiled: CompiledRecipe
+    checked_at: float
+
+
+_COMPILED_BY_PATH: dict[Path, _CachedRecipe] = {}
+_COMPILED_BY_KEY: dict[tuple[str, int], CompiledRecipe] = {}
+
+
+def _file_stamp(path: Path) -> tuple[int, int]:
+    try:
+        stat = path.stat()
+    except OSError as e:
+        raise CalcFailed(f"Failed to load recipe: {path.name}") from e
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_compiled_recipe(path: Path) -> CompiledRecipe:
+    """
+    Скомпилированный рецепт с кешем по пути. mtime/размер файла сверяются
+    не чаще раза в settings.calc_recipe_check_interval_s; файл перечитывается,
+    только если они изменились. checksum — sha256 содержимого файла.
+    """
+    now = time.monotonic()
+    cached = _COMPILED_BY_PATH.get(path)
+    if cached is not None and now - cached.checked_at < settings.calc_recipe_check_interval_s:
+        return cached.compiled
+    stamp = _file_stamp(path)
+    if cached is not None and cached.stamp == stamp:
+        cached.checked_at = now
+        return cached.compiled
+
+    raw = read_yaml_bytes(path)
+    checksum = sha256_hex(raw)
+    # снапшот избавляет от YAML-парсера; изменённый файл в нём не найдётся
+    data = get_snapshot().recipe_data(checksum)
+    if data is None:
+        data = parse_yaml(raw, path.name)
+    compiled = compile_recipe(data, name=path.name, checksum=checksum)
+    _COMPILED_BY_PATH[path] = _CachedRecipe(stamp, compiled, now)
+    _COMPILED_BY_KEY[(compiled.recipe_id, compiled.version)] = compiled
+    return compiled
+
+
+def get_compiled_recipe(recipe_id: str, version: int) -> CompiledRecipe | None:
+    return _COMPILED_BY_KEY.get((recipe_id, version))
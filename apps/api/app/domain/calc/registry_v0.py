@@ -2,12 +2,35 @@ from __future__ import annotations
 
 from typing import Any, Callable
 
-from .calculators.wall_painting_v1 import calc_wall_painting_v1
+from .calculators.wall_painting_v1 import (
+    calc_wall_painting_v1,
+    calc_wall_painting_v1_many,
+    wall_painting_v1_recipe,
+)
+from .recipes_loader import CompiledRecipe
 
 CalculatorFn = Callable[[dict[str, Any]], dict[str, Any]]
+BatchCalculatorFn = Callable[[list[dict[str, Any]]], list[dict[str, Any] | Exception]]
+RecipeFn = Callable[[], CompiledRecipe]
+
+
+def _wall_painting_v1_batch(inputs: list[dict[str, Any]]) -> list[dict[str, Any] | Exception]:
+    return calc_wall_painting_v1_many(inputs).outcomes()
 
 
 def build_registry_v0() -> dict[str, CalculatorFn]:
     return {
         "wall_painting_v1": calc_wall_painting_v1,
     }
+
+
+def build_batch_registry_v0() -> dict[str, BatchCalculatorFn]:
+    return {
+        "wall_painting_v1": _wall_painting_v1_batch,
+    }
+
+
+def build_recipe_registry_v0() -> dict[str, RecipeFn]:
+    return {
+        "wall_painting_v1": wall_painting_v1_recipe,
+    }
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import orjson
+
+from app.common.hashing import canonical_json, sha256_hex
+from app.domain.calc.recipes_loader import CompiledRecipe
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_entries: int
+
+
+class CalcResultCache:
+    """
+    In-process LRU результатов расчёта, адресуемый содержимым.
+
+    Ключ = sha256(канонический JSON входа + id/version/checksum рецепта),
+    поэтому после изменения файла рецепта старые записи просто перестают
+    находиться и вытесняются LRU. Значения хранятся сериализованными:
+    каждый hit отдаёт независимую копию, которую вызывающий может менять.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def key(input: dict[str, Any], recipe: CompiledRecipe) -> str | None:
+        try:
+            encoded = canonical_json(
+                {
+                    "input": input,
+                    "recipe": [recipe.recipe_id, recipe.version, recipe.checksum],
+                }
+            )
+        except TypeError:
+            # не-JSON вход (например, numpy-скаляры) просто не кешируем
+            return None
+        return sha256_hex(encoded)
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            raw = self._entries.get(key)
+            if raw is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return orjson.loads(raw)
+
+    def put(self, key: str, result: dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        raw = orjson.dumps(result)
+        with self._lock:
+            self._entries[key] = raw
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+                max_entries=self.max_entries,
+            )
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from app.contracts.engine_v1.input import EngineInput
+from app.contracts.engine_v1.result import EngineResult
+from app.domain.calc.errors import CalcInvalidInput
+
+RESULT_SECTIONS: tuple[str, ...] = tuple(EngineResult.model_fields)
+
+# то, что повторяет вход: восстанавливается по сохранённому EngineInput
+_ECHOED_SECTIONS = frozenset({"inputs", "project_profile"})
+_ECHOED_WORK_FIELDS = frozenset({"parameters", "dependencies"})
+
+
+def parse_include(include: str | Iterable[str] | None) -> frozenset[str] | None:
+    """include=works,totals,meta -> набор секций EngineResult; None — все секции."""
+    if include is None:
+        return None
+    names = include.split(",") if isinstance(include, str) else list(include)
+    sections = frozenset(name.strip() for name in names if name.strip())
+    unknown = sorted(sections.difference(RESULT_SECTIONS))
+    if unknown:
+        raise CalcInvalidInput(f"Unknown result sections: {', '.join(unknown)}")
+    return sections or None
+
+
+def _projection(include: frozenset[str] | None, compact: bool) -> tuple[set[str], dict[str, Any] | None]:
+    sections = set(RESULT_SECTIONS if include is None else include)
+    exclude: dict[str, Any] = {}
+    if compact:
+        sections -= _ECHOED_SECTIONS
+        exclude["works"] = {"__all__": set(_ECHOED_WORK_FIELDS)}
+    return sections, exclude or None
+
+
+def project_engine_result(
+    result: EngineResult,
+    *,
+    include: frozenset[str] | None = None,
+    compact: bool = False,
+) -> dict[str, Any]:
+    """
+    JSON-представление результата без лишнего. compact убирает эхо входа:
+    inputs, project_profile и parameters/dependencies каждого WorkResult.
+    """
+    sections, exclude = _projection(include, compact)
+    return result.model_dump(mode="json", include=sections, exclude=exclude)
+
+
+def project_engine_result_json(
+    result: EngineResult,
+    *,
+    include: frozenset[str] | None = None,
+    compact: bool = False,
+) -> bytes:
+    """То же, что project_engine_result, но сразу в JSON-байты, без промежуточного dict."""
+    if include is None and not compact:
+        return result.model_dump_json().encode("utf-8")
+    sections, exclude = _projection(include, compact)
+    return result.model_dump_json(include=sections, exclude=exclude).encode("utf-8")
+
+
+def expand_engine_result(payload: EngineInput, data: dict[str, Any]) -> EngineResult:
+    """Полный EngineResult из compact-ответа и входа, по которому он посчитан."""
+    works = [
+        {
+            **work,
+            "parameters": work_unit.parameters,
+            "dependencies": work_unit.dependencies,
+        }
+        for work, work_unit in zip(data.get("works", []), payload.work_graph, strict=True)
+    ]
+    return EngineResult.model_validate(
+        {
+            **data,
+            "inputs": payload,
+            "project_profile": payload.project_profile,
+            "works": works,
+        }
+    )
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+import mmap
+import pickle
+import platform
+import struct
+import sys
+import threading
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import Any, Mapping
+
+import pydantic
+
+from app.common.hashing import canonical_json, sha256_hex
+from app.contracts.engine_v1.profile import CalculationProfile
+
+_CALC_DIR = Path(__file__).resolve().parent
+SNAPSHOT_PATH = _CALC_DIR / "snapshot.bin"
+
+_MAGIC = b"ACMSNAP\x00"
+_FORMAT = 2
+_HEADER_LEN = struct.Struct("<I")
+
+# чем может кончиться pickle.loads записи, собранной другой версией кода
+_UNPICKLE_ERRORS = (
+    pickle.UnpicklingError,
+    AttributeError,
+    ImportError,
+    EOFError,
+    IndexError,
+    TypeError,
+    ValueError,
+)
+
+
+@cache
+def _profile_schema_hash() -> str:
+    return sha256_hex(canonical_json(CalculationProfile.model_json_schema()))
+
+
+def _runtime() -> dict[str, Any]:
+    # pickle валидированных моделей зависит от версий python и pydantic и от самой модели профиля
+    return {
+        "format": _FORMAT,
+        "python": platform.python_version(),
+        "pydantic": pydantic.VERSION,
+        "profile_schema": _profile_schema_hash(),
+    }
+
+
+@dataclass(frozen=True, slots=True)
+class _Entry:
+    offset: int
+    size: int
+    sha256: str
+
+
+_NOT_LOADED = object()
+
+
+class Snapshot:
+    """
+    Рецепты и профили, разобранные при сборке образа.
+
+    Записи адресуются sha256 исходного YAML: если файл на диске изменился,
+    его хеша в снапшоте нет и загрузчик идёт обычным путём через YAML.
+    Рецепты хранятся разобранными данными (compile_recipe дешёвый),
+    профили — уже провалидированными CalculationProfile. Каждая запись —
+    отдельный pickle по своему смещению: разбирается и сверяется с
+    контрольной суммой только при первом обращении к ней.
+    """
+
+    def __init__(
+        self,
+        buffer: Any = None,
+        recipes: Mapping[str, _Entry] | None = None,
+        profiles: Mapping[str, _Entry] | None = None,
+    ):
+        self._buffer = buffer
+        self._recipes = dict(recipes or {})
+        self._profiles = dict(profiles or {})
+        self._loaded: dict[tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._recipes) + len(self._profiles)
+
+    def _unpickle(self, entry: _Entry) -> Any:
+        view = memoryview(self._buffer)[entry.offset : entry.offset + entry.size]
+        try:
+            if len(view) != entry.size or sha256_hex(view) != entry.sha256:
+                return None
+            return pickle.loads(view)
+        except _UNPICKLE_ERRORS:
+            return None
+        finally:
+            view.release()
+
+    def _get(self, kind: str, entries: Mapping[str, _Entry], checksum: str) -> Any:
+        entry = entries.get(checksum)
+        if entry is None:
+            return None
+        key = (kind, checksum)
+        with self._lock:
+            value = self._loaded.get(key, _NOT_LOADED)
+        if value is not _NOT_LOADED:
+            return value
+        # битая запись запоминается как None: загрузчик уйдёт в YAML и больше её не тронет
+        value = self._unpickle(entry)
+        with self._lock:
+            return self._loaded.setdefault(key, value)
+
+    def recipe_data(self, checksum: str) -> dict[str, Any] | None:
+        return self._get("recipes", self._recipes, checksum)
+
+    def profile(self, checksum: str) -> CalculationProfile | None:
+        value = self._get("profiles", self._profiles, checksum)
+        return value if isinstance(value, CalculationProfile) else None
+
+
+def _encode_snapshot(
+    recipes: Mapping[str, Any],
+    profiles: Mapping[str, Any],
+    sources: Mapping[str, str],
+) -> bytes:
+    blobs: list[bytes] = []
+    offset = 0
+    entries: dict[str, dict[str, list[Any]]] = {"recipes": {}, "profiles": {}}
+    for kind, values in (("recipes", recipes), ("profiles", profiles)):
+        for checksum, value in values.items():
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            entries[kind][checksum] = [offset, len(blob), sha256_hex(blob)]
+            blobs.append(blob)
+            offset += len(blob)
+    header = json.dumps(
+        {**_runtime(), "payload_size": offset, "entries": entries, "sources": dict(sources)},
+        sort_keys=True,
+    ).encode("utf-8")
+    return _MAGIC + _HEADER_LEN.pack(len(header)) + header + b"".join(blobs)
+
+
+def build_snapshot(calc_dir: Path = _CALC_DIR) -> bytes:
+    from app.domain.calc.profile_loader import validate_profile
+    from app.domain.calc.recipes_loader import compile_recipe, load_yaml_with_checksum
+
+    recipes: dict[str, dict[str, Any]] = {}
+    profiles: dict[str, CalculationProfile] = {}
+    sources: dict[str, str] = {}
+    for path in sorted((calc_dir / "recipes").glob("*.yaml")):
+        data, checksum = load_yaml_with_checksum(path)
+        compile_recipe(data, name=path.name, checksum=checksum)  # битый рецепт ломает сборку, а не старт
+        recipes[checksum] = data
+        sources[f"recipes/{path.name}"] = checksum
+    for path in sorted((calc_dir / "profiles").glob("*.yaml")):
+        data, checksum = load_yaml_with_checksum(path)
+        profiles[checksum] = validate_profile(data, path.name)
+        sources[f"profiles/{path.name}"] = checksum
+    return _encode_snapshot(recipes, profiles, sources)
+
+
+def write_snapshot(path: Path = SNAPSHOT_PATH, calc_dir: Path = _CALC_DIR) -> Path:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(build_snapshot(calc_dir))
+    tmp.replace(path)
+    return path
+
+
+def load_snapshot(path: Path = SNAPSHOT_PATH) -> Snapshot:
+    """
+    Снапшот через mmap: файл не копируется в кучу, страницы делят форкнутые воркеры.
+    При загрузке читается только заголовок; записи разбираются по обращению.
+    Нет файла, другая версия рантайма или модели профиля, битый заголовок — пустой снапшот.
+    """
+    try:
+        with path.open("rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return Snapshot()
+    try:
+        snapshot = _parse_snapshot(mm)
+    except (ValueError, KeyError, TypeError, struct.error):
+        snapshot = None
+    if snapshot is None:
+        mm.close()
+        return Snapshot()
+    return snapshot
+
+
+def _entries(raw: Mapping[str, Any], payload_start: int, payload_size: int) -> dict[str, _Entry]:
+    entries: dict[str, _Entry] = {}
+    for checksum, (offset, size, sha256) in raw.items():
+        if not (0 <= offset and 0 <= size and offset + size <= payload_size):
+            raise ValueError(f"Snapshot entry out of bounds: {checksum}")
+        entries[checksum] = _Entry(offset=payload_start + offset, size=size, sha256=sha256)
+    return entries
+
+
+def _parse_snapshot(mm: mmap.mmap) -> Snapshot | None:
+    start = len(_MAGIC) + _HEADER_LEN.size
+    if len(mm) < start or mm[: len(_MAGIC)] != _MAGIC:
+        return None
+    (header_len,) = _HEADER_LEN.unpack(mm[len(_MAGIC) : start])
+    header = json.loads(mm[start : start + header_len])
+    if any(header.get(key) != value for key, value in _runtime().items()):
+        return None
+    payload_start = start + header_len
+    payload_size = header["payload_size"]
+    if len(mm) - payload_start != payload_size:
+        return None
+    entries = header["entries"]
+    return Snapshot(
+        buffer=mm,
+        recipes=_entries(entries["recipes"], payload_start, payload_size),
+        profiles=_entries(entries["profiles"], payload_start, payload_size),
+    )
+
+
+_SNAPSHOT: Snapshot | None = None
+
+
+def get_snapshot() -> Snapshot:
+    global _SNAPSHOT
+    if _SNAPSHOT is None:
+        _SNAPSHOT = load_snapshot()
+    return _SNAPSHOT
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else SNAPSHOT_PATH
+    print(write_snapshot(target))
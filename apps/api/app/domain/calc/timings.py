@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from app.settings import settings
+
+
+@dataclass(slots=True)
+class StageTiming:
+    stage: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    units: int = 0
+    calls: int = 0
+
+
+class _Stage:
+    __slots__ = ("timing", "units", "wall", "cpu")
+
+    def __init__(self, timing: StageTiming, units: int):
+        self.timing = timing
+        self.units = units
+
+    def __enter__(self) -> "_Stage":
+        self.cpu = time.thread_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        timing = self.timing
+        timing.wall_s += time.perf_counter() - self.wall
+        timing.cpu_s += time.thread_time() - self.cpu
+        timing.units += self.units
+        timing.calls += 1
+
+
+class _NoopStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NOOP = _NoopStage()
+
+
+class CalcTimer:
+    """
+    Время стадий одного расчёта: wall и CPU текущего потока, число юнитов и вызовов.
+    Повторный вход в ту же стадию (v0 в батче) накапливается в одну запись.
+    """
+
+    def __init__(self, engine: str):
+        self.engine = engine
+        self.stages: dict[str, StageTiming] = {}
+
+    def stage(self, name: str, units: int = 0) -> _Stage:
+        timing = self.stages.get(name)
+        if timing is None:
+            timing = self.stages[name] = StageTiming(name)
+        return _Stage(timing, units)
+
+    def merge(self, timings: Iterable[StageTiming]) -> None:
+        """Добавляет стадии, замеренные в другом процессе (чанки пула)."""
+        for other in timings:
+            timing = self.stages.get(other.stage)
+            if timing is None:
+                timing = self.stages[other.stage] = StageTiming(other.stage)
+            timing.wall_s += other.wall_s
+            timing.cpu_s += other.cpu_s
+            timing.units += other.units
+            timing.calls += other.calls
+
+    def items(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "stage": t.stage,
+                "wall_ms": round(t.wall_s * 1000, 3),
+                "cpu_ms": round(t.cpu_s * 1000, 3),
+                "units": t.units,
+                "calls": t.calls,
+            }
+            for t in self.stages.values()
+        ]
+
+
+_TIMER: contextvars.ContextVar[CalcTimer | None] = contextvars.ContextVar("calc_timer", default=None)
+
+
+def stage(name: str, units: int = 0) -> _Stage | _NoopStage:
+    """Замер стадии в активном CalcTimer; без него — общий no-op без аллокаций."""
+    timer = _TIMER.get()
+    if timer is None:
+        return _NOOP
+    return timer.stage(name, units)
+
+
+def current_timer() -> CalcTimer | None:
+    return _TIMER.get()
+
+
+class _TimerBinding:
+    __slots__ = ("timer", "token")
+
+    def __init__(self, timer: CalcTimer):
+        self.timer = timer
+        self.token: contextvars.Token | None = None
+
+    def __enter__(self) -> CalcTimer:
+        self.token = _TIMER.set(self.timer)
+        return self.timer
+
+    def __exit__(self, *exc: Any) -> None:
+        if self.token is not None:
+            _TIMER.reset(self.token)
+            self.token = None
+
+
+def bind_timer(timer: CalcTimer) -> _TimerBinding:
+    """Делает timer активным без записи в метрики процесса: так воркер пула меряет свой чанк."""
+    return _TimerBinding(timer)
+
+
+class _TimingScope:
+    __slots__ = ("engine", "enabled", "timer", "token")
+
+    def __init__(self, engine: str, enabled: bool = False):
+        self.engine = engine
+        self.enabled = enabled
+        self.timer: CalcTimer | None = None
+        self.token: contextvars.Token | None = None
+
+    def __enter__(self) -> CalcTimer | None:
+        if not (self.enabled or settings.calc_timings_enabled):
+            return None
+        current = _TIMER.get()
+        if current is not None:
+            return current if self.enabled else None
+        self.timer = CalcTimer(self.engine)
+        self.token = _TIMER.set(self.timer)
+        return self.timer if self.enabled else None
+
+    def __exit__(self, *exc: Any) -> None:
+        if self.token is None:
+            return
+        _TIMER.reset(self.token)
+        self.token = None
+        if settings.calc_timings_enabled and self.timer is not None:
+            get_calc_metrics().record(self.timer)
+
+
+def collect_timings(engine: str, enabled: bool = False) -> _TimingScope:
+    """
+    Включает CalcTimer на время расчёта, если его попросили (enabled) или включены
+    метрики (settings.calc_timings_enabled). Вложенный вызов (calculate внутри
+    calculate_many) пишет во внешний таймер. `with ... as timer` отдаёт таймер
+    только при enabled — по нему вызывающий решает, класть ли timings в ответ.
+    """
+    return _TimingScope(engine, enabled)
+
+
+class CalcMetrics:
+    """Накопленные по процессу суммы стадий: (engine, stage) -> вызовы, юниты, wall/CPU."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._runs: dict[str, int] = {}
+        self._stages: dict[tuple[str, str], StageTiming] = {}
+
+    def record(self, timer: CalcTimer) -> None:
+        with self._lock:
+            self._runs[timer.engine] = self._runs.get(timer.engine, 0) + 1
+            for name, timing in timer.stages.items():
+                total = self._stages.get((timer.engine, name))
+                if total is None:
+                    total = self._stages[(timer.engine, name)] = StageTiming(name)
+                total.wall_s += timing.wall_s
+                total.cpu_s += timing.cpu_s
+                total.units += timing.units
+                total.calls += timing.calls
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                engine: {
+                    "runs": runs,
+                    "stages": [
+                        {
+                            "stage": t.stage,
+                            "wall_seconds_total": t.wall_s,
+                            "cpu_seconds_total": t.cpu_s,
+                            "units_total": t.units,
+                            "calls_total": t.calls,
+                        }
+                        for (stage_engine, _), t in self._stages.items()
+                        if stage_engine == engine
+                    ],
+                }
+                for engine, runs in self._runs.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._runs.clear()
+            self._stages.clear()
+
+
+_metrics_singleton = CalcMetrics()
+
+
+def get_calc_metrics() -> CalcMetrics:
+    return _metrics_singleton
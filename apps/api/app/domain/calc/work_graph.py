@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Sequence, TypeVar
+
+from app.contracts.engine_v1.input import WorkUnit
+from app.domain.calc.errors import CalcInvalidInput
+
+R = TypeVar("R")
+
+
+@dataclass(frozen=True, slots=True)
+class WorkGraph:
+    """
+    work_graph как DAG по индексам юнитов.
+
+    dependencies юнита ссылаются на work_id; если work_id встречается
+    в графе несколько раз, юнит зависит от всех таких юнитов.
+    downstream — обратные рёбра, levels — слои Kahn: каждый слой зависит
+    только от предыдущих.
+    """
+
+    units: tuple[WorkUnit, ...]
+    upstream: tuple[tuple[int, ...], ...]
+    downstream: tuple[tuple[int, ...], ...]
+    unknown: tuple[tuple[str, ...], ...]
+    levels: tuple[tuple[int, ...], ...]
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+
+def build_work_graph(work_units: Sequence[WorkUnit]) -> WorkGraph:
+    """Топологическая раскладка за O(V+E); цикл -> CalcInvalidInput."""
+    units = tuple(work_units)
+    by_work_id: dict[str, list[int]] = {}
+    for i, unit in enumerate(units):
+        by_work_id.setdefault(unit.work_id, []).append(i)
+
+    upstream: list[tuple[int, ...]] = []
+    unknown: list[tuple[str, ...]] = []
+    downstream: list[list[int]] = [[] for _ in units]
+    pending = [0] * len(units)
+    for i, unit in enumerate(units):
+        deps: dict[int, None] = {}
+        missing: list[str] = []
+        for dep in unit.dependencies:
+            targets = by_work_id.get(dep)
+            if targets is None:
+                if dep not in missing:
+                    missing.append(dep)
+                continue
+            for j in targets:
+                if j != i:
+                    deps[j] = None
+        for j in deps:
+            downstream[j].append(i)
+        pending[i] = len(deps)
+        upstream.append(tuple(deps))
+        unknown.append(tuple(missing))
+
+    levels: list[tuple[int, ...]] = []
+    ready = [i for i in range(len(units)) if pending[i] == 0]
+    done = 0
+    while ready:
+        levels.append(tuple(ready))
+        done += len(ready)
+        next_ready: list[int] = []
+        for i in ready:
+            for j in downstream[i]:
+                pending[j] -= 1
+                if pending[j] == 0:
+                    next_ready.append(j)
+        ready = next_ready
+
+    if done != len(units):
+        cycle = sorted({units[i].work_id for i in range(len(units)) if pending[i] > 0})
+        raise CalcInvalidInput(f"Dependency cycle in work_graph: {', '.join(cycle)}")
+    return WorkGraph(
+        units=units,
+        upstream=tuple(upstream),
+        downstream=tuple(tuple(d) for d in downstream),
+        unknown=tuple(unknown),
+        levels=tuple(levels),
+    )
+
+
+def run_work_graph(
+    graph: WorkGraph,
+    fn: Callable[[int, tuple[R, ...]], R],
+) -> list[R]:
+    """
+    Считает fn(index, upstream_results) для каждого юнита последовательно, слой
+    за слоем; результаты — в порядке graph.units.
+
+    Потоков здесь нет: юниты — чистый Python и упираются в GIL. Независимые
+    юниты параллелит CalcExecutor — чанками в пуле процессов, где расчёт юнита
+    не читает зависимости; сюда остаётся связывание готовности.
+    """
+    results: list[R | None] = [None] * len(graph)
+    for level in graph.levels:
+        for i in level:
+            results[i] = fn(i, tuple(results[j] for j in graph.upstream[i]))  # type: ignore[misc]
+    return results  # type: ignore[return-value]
@@ -1,8 +1,11 @@
+from app.domain.intake.batch import evaluate_intake_batch
 from app.domain.intake.location_profiles import get_location_profile, resolve_location_profile
-from app.domain.intake.rules_engine import evaluate_intake_rules
+from app.domain.intake.rules_engine import evaluate_intake_rules, reevaluate_intake_rules
 
 __all__ = [
     "resolve_location_profile",
     "get_location_profile",
     "evaluate_intake_rules",
+    "reevaluate_intake_rules",
+    "evaluate_intake_batch",
 ]
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+from app.contracts.intake_v1_1 import ProjectIntakeV1_1, RulesEngineOutput
+from app.domain.calc.executor import get_calc_executor
+from app.domain.intake.location_profiles import get_location_profile, resolve_location_profile
+from app.domain.intake.rules_engine import evaluate_intake_rules_many
+
+
+@dataclass(frozen=True, slots=True)
+class IntakeEvaluation:
+    location_profile_id: str
+    output: RulesEngineOutput | None  # None — профиля нет в конфиге
+
+
+def resolve_intake_profile_id(intake: ProjectIntakeV1_1) -> str:
+    # место на карте -> профиль по индексу; без места — профиль, выбранный в форме
+    if intake.selected_place is not None:
+        return resolve_location_profile(intake.selected_place)
+    return intake.location_profile_id
+
+
+def evaluate_intake_chunk(items: list[tuple[str, ProjectIntakeV1_1]]) -> list[IntakeEvaluation]:
+    """Чанк (profile_id, intake): правила считаются группами по профилю, результат — в порядке чанка."""
+    groups: dict[str, list[int]] = {}
+    for i, (profile_id, _) in enumerate(items):
+        groups.setdefault(profile_id, []).append(i)
+
+    out: list[IntakeEvaluation | None] = [None] * len(items)
+    for profile_id, indexes in groups.items():
+        profile = get_location_profile(profile_id)
+        if profile is None:
+            for i in indexes:
+                out[i] = IntakeEvaluation(location_profile_id=profile_id, output=None)
+            continue
+        outputs = evaluate_intake_rules_many([items[i][1] for i in indexes], profile)
+        for i, output in zip(indexes, outputs):
+            out[i] = IntakeEvaluation(location_profile_id=profile_id, output=output)
+    return out  # type: ignore[return-value]
+
+
+def evaluate_intake_batch(
+    intakes: Sequence[ProjectIntakeV1_1],
+    *,
+    deadline_s: float | None = None,
+) -> list[IntakeEvaluation]:
+    """
+    Профиль локации и правила для каждого intake, в исходном порядке.
+
+    Профили разрешаются здесь, входы сортируются по профилю: группа идёт
+    подряд, и в чанке мало разных профилей. map_chunks режет по размеру,
+    поэтому крупная группа может попасть в несколько чанков — у каждого своя
+    мемоизация условий, результат от этого не зависит. Крупные батчи
+    считаются в пуле CalcExecutor.
+    """
+    profile_ids = [resolve_intake_profile_id(intake) for intake in intakes]
+    order = sorted(range(len(intakes)), key=profile_ids.__getitem__)
+    evaluations = get_calc_executor().map_chunks(
+        evaluate_intake_chunk,
+        [(profile_ids[i], intakes[i]) for i in order],
+        deadline_s=deadline_s,
+    )
+    out: list[IntakeEvaluation | None] = [None] * len(intakes)
+    for i, evaluation in zip(order, evaluations):
+        out[i] = evaluation
+    return out  # type: ignore[return-value]
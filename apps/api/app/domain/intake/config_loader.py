@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import json
+import threading
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Generic, TypeVar
 
 from app.contracts.intake_v1_1 import LocationProfile
 
@@ -11,6 +12,8 @@ _CONFIG_DIR = Path(__file__).resolve().parent / "config"
 _LOCATION_PROFILE_PATH = _CONFIG_DIR / "location_profiles.json"
 _RULES_PATH = _CONFIG_DIR / "rules_v1_1.json"
 
+T = TypeVar("T")
+
 
 def _load_json(path: Path) -> dict[str, Any]:
     with path.open("r", encoding="utf-8") as handle:
@@ -20,13 +23,76 @@ def _load_json(path: Path) -> dict[str, Any]:
     return data
 
 
-def load_location_profiles() -> list[LocationProfile]:
-    data = _load_json(_LOCATION_PROFILE_PATH)
+def load_location_profiles_config() -> dict[str, Any]:
+    return _load_json(_LOCATION_PROFILE_PATH)
+
+
+def parse_location_profiles(data: dict[str, Any]) -> list[LocationProfile]:
     profiles_data = data.get("profiles", [])
     if not isinstance(profiles_data, list):
         raise ValueError("location_profiles.json profiles must be a list")
     return [LocationProfile.model_validate(item) for item in profiles_data]
 
 
+def load_location_profiles() -> list[LocationProfile]:
+    return parse_location_profiles(load_location_profiles_config())
+
+
 def load_rules_config() -> dict[str, Any]:
     return _load_json(_RULES_PATH)
+
+
+def _stamp(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def rules_config_stamp() -> tuple[int, int]:
+    """(mtime_ns, size) файла правил: дешёвая проверка, не поменялся ли он с прошлой загрузки."""
+    return _stamp(_RULES_PATH)
+
+
+def location_profiles_stamp() -> tuple[int, int]:
+    return _stamp(_LOCATION_PROFILE_PATH)
+
+
+class ConfigCache(Generic[T]):
+    """
+    Объект, собранный из JSON-конфига, с проверкой по stamp файла.
+
+    На каждом get() — только stamp (stat). При смене mtime/размера JSON
+    перечитывается, а build повторяется, только если поменялось содержимое.
+    """
+
+    def __init__(
+        self,
+        stamp: Callable[[], tuple[int, int]],
+        load: Callable[[], dict[str, Any]],
+        build: Callable[[dict[str, Any]], T],
+    ):
+        self._stamp_fn = stamp
+        self._load_fn = load
+        self._build_fn = build
+        self._lock = threading.Lock()
+        self._stamp: tuple[int, int] | None = None
+        self._raw: dict[str, Any] | None = None
+        self._value: T | None = None
+
+    def get(self) -> T:
+        stamp = self._stamp_fn()
+        value = self._value
+        if value is not None and stamp == self._stamp:
+            return value
+        with self._lock:
+            if self._value is not None and stamp == self._stamp:
+                return self._value
+            raw = self._load_fn()
+            if self._value is None or raw != self._raw:
+                self._value = self._build_fn(raw)
+                self._raw = raw
+            self._stamp = stamp
+            return self._value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stamp = self._raw = self._value = None
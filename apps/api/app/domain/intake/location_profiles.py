@@ -1,40 +1,113 @@
 from __future__ import annotations
 
-from typing import Optional
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
 
 from app.contracts.intake_v1_1 import LocationProfile, LocationProfileMatch, SelectedPlace
-from app.domain.intake.config_loader import load_location_profiles
+from app.domain.intake.config_loader import (
+    ConfigCache,
+    load_location_profiles_config,
+    location_profiles_stamp,
+    parse_location_profiles,
+)
+from app.settings import settings
 
 
 _GLOBAL_DEFAULT_PROFILE_ID = "global_default_v1"
 
+# какие поля LocationProfileMatch заданы: (country_iso2, admin_level_1, city),
+# от самого точного правила к самому общему — город, затем регион, затем страна
+_LEVELS: tuple[tuple[bool, bool, bool], ...] = (
+    (True, True, True),
+    (True, False, True),
+    (False, True, True),
+    (False, False, True),
+    (True, True, False),
+    (False, True, False),
+    (True, False, False),
+    (False, False, False),
+)
 
-def _matches_rule(rule: LocationProfileMatch, selected_place: SelectedPlace) -> bool:
-    if rule.country_iso2 is not None and rule.country_iso2 != selected_place.country_iso2:
-        return False
-    if rule.admin_level_1 is not None and rule.admin_level_1 != selected_place.admin_level_1:
-        return False
-    if rule.city is not None and rule.city != selected_place.city:
-        return False
-    return True
+_PlaceKey = tuple[str, Optional[str], str]
+
+
+def _rule_level(rule: LocationProfileMatch) -> tuple[bool, bool, bool]:
+    return rule.country_iso2 is not None, rule.admin_level_1 is not None, rule.city is not None
+
+
+def _masked(values: Iterable[Any], level: tuple[bool, bool, bool]) -> tuple[Any, ...]:
+    return tuple(value for value, used in zip(values, level) if used)
+
+
+class LocationProfileIndex:
+    """
+    Профили локаций, собранные один раз на версию конфига.
+
+    match_rules разложены по хеш-таблицам уровней _LEVELS: место ищется от
+    (страна, регион, город) к (страна, регион) и к стране, на уровне побеждает
+    профиль, стоящий в конфиге раньше. Разрешённые места держит небольшой LRU.
+    """
+
+    def __init__(self, profiles: list[LocationProfile], max_cached: int):
+        self.by_id: dict[str, LocationProfile] = {}
+        tables: dict[tuple[bool, bool, bool], dict[tuple[Any, ...], str]] = {}
+        for profile in profiles:
+            self.by_id.setdefault(profile.profile_id, profile)
+            if profile.profile_id == _GLOBAL_DEFAULT_PROFILE_ID:
+                continue
+            for rule in profile.match_rules:
+                level = _rule_level(rule)
+                key = _masked((rule.country_iso2, rule.admin_level_1, rule.city), level)
+                tables.setdefault(level, {}).setdefault(key, profile.profile_id)
+        self._levels = tuple((level, tables[level]) for level in _LEVELS if level in tables)
+        self.max_cached = max(1, max_cached)
+        self._resolved: OrderedDict[_PlaceKey, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, place: _PlaceKey) -> str:
+        for level, table in self._levels:
+            profile_id = table.get(_masked(place, level))
+            if profile_id is not None:
+                return profile_id
+        return _GLOBAL_DEFAULT_PROFILE_ID
+
+    def resolve(self, selected_place: SelectedPlace) -> str:
+        place = (selected_place.country_iso2, selected_place.admin_level_1, selected_place.city)
+        with self._lock:
+            profile_id = self._resolved.get(place)
+            if profile_id is not None:
+                self._resolved.move_to_end(place)
+                return profile_id
+        profile_id = self._lookup(place)
+        with self._lock:
+            self._resolved[place] = profile_id
+            while len(self._resolved) > self.max_cached:
+                self._resolved.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> LocationProfile | None:
+        return self.by_id.get(profile_id)
+
+
+def _build_index(data: dict[str, Any]) -> LocationProfileIndex:
+    return LocationProfileIndex(parse_location_profiles(data), settings.intake_location_cache_size)
+
+
+_INDEX_CACHE: ConfigCache[LocationProfileIndex] = ConfigCache(
+    location_profiles_stamp, load_location_profiles_config, _build_index
+)
+
+
+def get_location_profile_index() -> LocationProfileIndex:
+    return _INDEX_CACHE.get()
 
 
 def resolve_location_profile(selected_place: Optional[SelectedPlace]) -> str:
-    profiles = load_location_profiles()
     if selected_place is None:
         return _GLOBAL_DEFAULT_PROFILE_ID
-    for profile in profiles:
-        if profile.profile_id == _GLOBAL_DEFAULT_PROFILE_ID:
-            continue
-        for rule in profile.match_rules:
-            if _matches_rule(rule, selected_place):
-                return profile.profile_id
-    return _GLOBAL_DEFAULT_PROFILE_ID
+    return get_location_profile_index().resolve(selected_place)
 
 
 def get_location_profile(profile_id: str) -> LocationProfile | None:
-    profiles = load_location_profiles()
-    for profile in profiles:
-        if profile.profile_id == profile_id:
-            return profile
-    return None
+    return get_location_profile_index().get(profile_id)
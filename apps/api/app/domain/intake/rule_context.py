@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import types
+import typing
+from dataclasses import dataclass
+from functools import cache
+from typing import Any, Iterable, Union
+
+from pydantic import BaseModel
+
+from app.contracts.intake_v1_1 import LocationProfile, ProjectIntakeV1_1
+
+LOCATION_PROFILE_PREFIX = "location_profile"
+
+_NO_DEFAULT = object()
+
+
+@dataclass(frozen=True, slots=True)
+class ContextPath:
+    """
+    Путь поля, разобранный заранее: шаги (ключ, значение по умолчанию в виде
+    model_dump(); _NO_DEFAULT — обязательное поле или ключ словаря).
+    """
+
+    path: str
+    in_profile: bool
+    steps: tuple[tuple[str, Any], ...]
+
+
+def _nested_model(annotation: Any) -> type[BaseModel] | None:
+    candidates = (annotation,)
+    if typing.get_origin(annotation) in (Union, types.UnionType):
+        candidates = typing.get_args(annotation)
+    for candidate in candidates:
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+def _dumped(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, list):
+        return [_dumped(item) for item in value]
+    return value
+
+
+@cache
+def _field_default(model: type[BaseModel], name: str) -> tuple[Any, type[BaseModel] | None]:
+    field = model.model_fields[name]
+    # exclude_defaults сравнивает и с результатом default_factory
+    default = _NO_DEFAULT if field.is_required() else _dumped(field.get_default(call_default_factory=True))
+    return default, _nested_model(field.annotation)
+
+
+@cache
+def compile_context_path(path: str) -> ContextPath:
+    path = path.removeprefix("intake.")
+    parts = tuple(path.split("."))
+    in_profile = parts[0] == LOCATION_PROFILE_PREFIX
+    model: type[BaseModel] | None = LocationProfile if in_profile else ProjectIntakeV1_1
+    if in_profile:
+        parts = parts[1:]
+    defaults = []
+    for part in parts:
+        if model is None or part not in model.model_fields:
+            # дальше — словарь или несуществующее поле: exclude_defaults туда не заходит
+            model = None
+            defaults.append(_NO_DEFAULT)
+            continue
+        default, model = _field_default(model, part)
+        defaults.append(default)
+    return ContextPath(path=path, in_profile=in_profile, steps=tuple(zip(parts, defaults)))
+
+
+def compile_context_paths(paths: Iterable[str]) -> tuple[ContextPath, ...]:
+    return tuple(compile_context_path(path) for path in dict.fromkeys(paths))
+
+
+def _resolve(data: dict[str, Any], context_path: ContextPath) -> tuple[Any, Any]:
+    """(значение как в model_dump(), значение как в model_dump(exclude_defaults, exclude_none))."""
+    current: Any = data
+    provided = True
+    for part, default in context_path.steps:
+        if not isinstance(current, dict):
+            return None, None
+        current = current.get(part, _NO_DEFAULT)
+        if current is _NO_DEFAULT:
+            return None, None
+        if provided and default is not _NO_DEFAULT and current == default:
+            provided = False
+    return current, (current if provided else None)
+
+
+@dataclass
+class RuleContext:
+    """
+    Плоские представления intake и профиля локации для правил: путь -> значение.
+
+    data — как обход model_dump() по точкам, provided — то же по
+    model_dump(exclude_defaults=True, exclude_none=True); поля профиля — под
+    `location_profile.*`. Строится один раз на вычисление и общий для правил
+    и дефолтов; пути вне собранных ищутся в intake_data.
+    """
+
+    data: dict[str, Any]
+    provided: dict[str, Any]
+    intake_data: dict[str, Any] | None = None
+
+    def intake_value(self, path: str) -> Any:
+        path = path.removeprefix("intake.")
+        if path == LOCATION_PROFILE_PREFIX or path.startswith(LOCATION_PROFILE_PREFIX + "."):
+            return None
+        if path in self.data or self.intake_data is None:
+            return self.data.get(path)
+        return _resolve(self.intake_data, compile_context_path(path))[0]
+
+
+def build_rule_context(
+    intake: ProjectIntakeV1_1,
+    location_profile: LocationProfile,
+    paths: Iterable[ContextPath],
+) -> RuleContext:
+    """Один model_dump() на модель; оба представления собираются за один проход по путям."""
+    intake_data = intake.model_dump()
+    profile_data = location_profile.model_dump()
+    data: dict[str, Any] = {}
+    provided: dict[str, Any] = {}
+    for context_path in paths:
+        value, provided_value = _resolve(profile_data if context_path.in_profile else intake_data, context_path)
+        data[context_path.path] = value
+        provided[context_path.path] = provided_value
+    return RuleContext(data=data, provided=provided, intake_data=intake_data)
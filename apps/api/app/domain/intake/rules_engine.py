@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Iterable, List
+from enum import Enum
+from typing import Any, Callable, Iterable, Iterator, List, Mapping, Sequence
 
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 
@@ -13,7 +14,8 @@ from app.contracts.intake_v1_1 import (
     RestrictiveDefault,
     RulesEngineOutput,
 )
-from app.domain.intake.config_loader import load_rules_config
+from app.domain.intake.config_loader import ConfigCache, load_rules_config, rules_config_stamp
+from app.domain.intake.rule_context import ContextPath, RuleContext, build_rule_context, compile_context_paths
 
 
 class RuleCondition(BaseModel):
@@ -58,59 +60,192 @@ class RulesConfig(BaseModel):
     required_rules: List[RuleSpec] = Field(default_factory=list)
 
 
-@dataclass
-class RuleContext:
-    data: dict[str, Any]
-    provided: dict[str, Any]
+Predicate = Callable[[RuleContext], bool]
 
 
-def _get_by_path(data: dict[str, Any], path: str) -> Any:
-    if path.startswith("intake."):
-        path = path.removeprefix("intake.")
-    current: Any = data
-    for part in path.split("."):
-        if not isinstance(current, dict) or part not in current:
-            return None
-        current = current[part]
-    return current
+def _hashable_value(value: Any) -> Any:
+    # str-Enum сравнивается со строкой по ==, но хешируется по имени — в set ищем по value
+    return value.value if isinstance(value, Enum) else value
 
 
-def _field_exists(context: RuleContext, path: str) -> bool:
-    return _get_by_path(context.provided, path) is not None
+def _compile_in(path: str, options: Any) -> Predicate:
+    options = list(options or [])
+    try:
+        lookup = frozenset(_hashable_value(option) for option in options)
+    except TypeError:
+        return lambda context: context.data.get(path) in options
 
+    def predicate(context: RuleContext) -> bool:
+        field_value = context.data.get(path)
+        try:
+            return _hashable_value(field_value) in lookup
+        except TypeError:  # список/словарь в поле
+            return field_value in options
 
-def _eval_condition(condition: RuleCondition, context: RuleContext) -> bool:
+    return predicate
+
+
+def _compile_contains(path: str, value: Any) -> Predicate:
+    def predicate(context: RuleContext) -> bool:
+        field_value = context.data.get(path)
+        if isinstance(field_value, list):
+            return value in field_value
+        if isinstance(field_value, str):
+            return value in field_value
+        return False
+
+    return predicate
+
+
+def _compile_condition(condition: RuleCondition) -> Predicate:
+    path = condition.field.removeprefix("intake.")
     op = condition.op
     value = condition.value
-    field_value = _get_by_path(context.data, condition.field)
     if op == "exists":
-        return _field_exists(context, condition.field)
+        return lambda context: context.provided.get(path) is not None
     if op == "missing":
-        return not _field_exists(context, condition.field)
+        return lambda context: context.provided.get(path) is None
     if op == "eq":
-        return field_value == value
+        return lambda context: context.data.get(path) == value
     if op == "in":
-        return field_value in (value or [])
+        return _compile_in(path, value)
     if op == "contains":
-        if isinstance(field_value, list):
-            return value in field_value
-        if isinstance(field_value, str):
-            return value in field_value
-        return False
+        return _compile_contains(path, value)
     raise ValueError(f"Unsupported operation: {op}")
 
 
-def _eval_expression(expression: RuleExpression, context: RuleContext) -> bool:
+def _compile_expression(expression: RuleExpression) -> Predicate:
     if isinstance(expression, RuleCondition):
-        return _eval_condition(expression, context)
+        return _compile_condition(expression)
+    # как и раньше: непустой all имеет приоритет, any тогда не смотрится
+    items = expression.all or expression.any
+    predicates = tuple(_compile_expression(item) for item in items)
+    if len(predicates) == 1:
+        return predicates[0]
     if expression.all:
-        return all(_eval_expression(item, context) for item in expression.all)
-    return any(_eval_expression(item, context) for item in expression.any)
+        return lambda context: all(predicate(context) for predicate in predicates)
+    return lambda context: any(predicate(context) for predicate in predicates)
 
 
-def _load_rules() -> RulesConfig:
-    config = load_rules_config()
-    return RulesConfig.model_validate(config)
+def _expression_paths(expression: RuleExpression) -> Iterator[str]:
+    if isinstance(expression, RuleCondition):
+        yield expression.field.removeprefix("intake.")
+        return
+    for item in expression.all or expression.any:
+        yield from _expression_paths(item)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledRule:
+    rule_id: str
+    position: int  # порядок в конфиге: visibility_rules, затем required_rules
+    target: str  # "visible" | "required"
+    fields: tuple[str, ...]
+    paths: frozenset[str]  # поля, которые читает условие (без префикса intake.)
+    predicate: Predicate
+
+
+@dataclass(frozen=True, slots=True)
+class RuleDependencyIndex:
+    """
+    Обратный индекс: путь поля -> rule_id правил, которые от него зависят.
+
+    refs — точные пути из условий; under — путь и всё, что под ним. Изменение
+    `selected_place` задевает правило по `selected_place.city`, и наоборот.
+    """
+
+    refs: Mapping[str, frozenset[str]]
+    under: Mapping[str, frozenset[str]]
+
+    def affected(self, changed_fields: Iterable[str]) -> set[str]:
+        affected: set[str] = set()
+        for field in changed_fields:
+            path = field.removeprefix("intake.")
+            affected.update(self.under.get(path, ()))
+            parts = path.split(".")
+            for end in range(1, len(parts)):
+                affected.update(self.refs.get(".".join(parts[:end]), ()))
+        return affected
+
+
+def build_rule_dependency_index(rules: Iterable[CompiledRule]) -> RuleDependencyIndex:
+    refs: dict[str, set[str]] = {}
+    under: dict[str, set[str]] = {}
+    for rule in rules:
+        for path in rule.paths:
+            refs.setdefault(path, set()).add(rule.rule_id)
+            parts = path.split(".")
+            for end in range(1, len(parts) + 1):
+                under.setdefault(".".join(parts[:end]), set()).add(rule.rule_id)
+    return RuleDependencyIndex(
+        refs={path: frozenset(ids) for path, ids in refs.items()},
+        under={path: frozenset(ids) for path, ids in under.items()},
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledRules:
+    """
+    RulesConfig, разобранный один раз: деревья RuleGroup свёрнуты в замыкания,
+    пути полей — готовые ключи плоского RuleContext, операнды `in` — frozenset.
+    """
+
+    version: str
+    always_visible: frozenset[str]
+    always_required: frozenset[str]
+    visibility_rules: tuple[CompiledRule, ...]
+    required_rules: tuple[CompiledRule, ...]
+    by_id: Mapping[str, CompiledRule]
+    dependencies: RuleDependencyIndex
+    context_paths: tuple[ContextPath, ...]  # всё, что читают условия, — для build_rule_context
+
+
+def _compile_rule(rule: RuleSpec, position: int, target: str) -> CompiledRule:
+    return CompiledRule(
+        rule_id=rule.rule_id,
+        position=position,
+        target=target,
+        fields=tuple(rule.fields),
+        paths=frozenset(_expression_paths(rule.conditions)),
+        predicate=_compile_expression(rule.conditions),
+    )
+
+
+def compile_rules(config: RulesConfig) -> CompiledRules:
+    offset = len(config.visibility_rules)
+    visibility_rules = tuple(
+        _compile_rule(rule, position, "visible") for position, rule in enumerate(config.visibility_rules)
+    )
+    required_rules = tuple(
+        _compile_rule(rule, offset + position, "required") for position, rule in enumerate(config.required_rules)
+    )
+    by_id: dict[str, CompiledRule] = {}
+    for rule in visibility_rules + required_rules:
+        if rule.rule_id in by_id:
+            raise ValueError(f"Duplicate rule_id: {rule.rule_id}")
+        by_id[rule.rule_id] = rule
+    return CompiledRules(
+        version=config.version,
+        always_visible=frozenset(config.always_visible),
+        always_required=frozenset(config.always_required),
+        visibility_rules=visibility_rules,
+        required_rules=required_rules,
+        by_id=by_id,
+        dependencies=build_rule_dependency_index(by_id.values()),
+        context_paths=compile_context_paths(path for rule in by_id.values() for path in sorted(rule.paths)),
+    )
+
+
+def _build_rules(raw: dict[str, Any]) -> CompiledRules:
+    return compile_rules(RulesConfig.model_validate(raw))
+
+
+# компиляция повторяется, только если поменялись версия или содержимое файла правил
+_RULES_CACHE: ConfigCache[CompiledRules] = ConfigCache(rules_config_stamp, load_rules_config, _build_rules)
+
+
+def get_compiled_rules() -> CompiledRules:
+    return _RULES_CACHE.get()
 
 
 def _collect_mall_defaults(
@@ -133,55 +268,133 @@ def _collect_mall_defaults(
 def _build_applied_defaults(
     intake: ProjectIntakeV1_1,
     profile: LocationProfile,
+    context: RuleContext,
 ) -> list[AppliedDefault]:
     applied: list[AppliedDefault] = []
-    intake_data = intake.model_dump()
     for field, value in profile.default_values.items():
-        if _get_by_path(intake_data, field) is None:
+        if context.intake_value(field) is None:
             applied.append(AppliedDefault(field=field, value=value, source=profile.profile_id))
     mall_defaults = _collect_mall_defaults(intake.mall_areas, profile)
     for item in mall_defaults:
-        if _get_by_path(intake_data, item.field) is None:
+        if context.intake_value(item.field) is None:
             applied.append(
                 AppliedDefault(field=item.field, value=item.value, source=f"{profile.profile_id}:mall")
             )
     return applied
 
 
-def evaluate_intake_rules(
+def _build_output(
+    rules: CompiledRules,
     intake: ProjectIntakeV1_1,
     location_profile: LocationProfile,
+    context: RuleContext,
+    matched: Iterable[CompiledRule],
 ) -> RulesEngineOutput:
-    rules = _load_rules()
-    intake_data = intake.model_dump()
-    context_data = {
-        **intake_data,
-        "location_profile": location_profile.model_dump(),
-    }
-    context_provided = intake.model_dump(exclude_defaults=True, exclude_none=True)
-    provided_context = {
-        **context_provided,
-        "location_profile": location_profile.model_dump(exclude_defaults=True, exclude_none=True),
-    }
-    context = RuleContext(data=context_data, provided=provided_context)
-
     visible_fields = set(rules.always_visible)
     required_fields = set(rules.always_required)
     visible_fields.update(location_profile.visible_fields)
     required_fields.update(location_profile.required_fields)
+    matched_rules: list[str] = []
+    for rule in matched:
+        (visible_fields if rule.target == "visible" else required_fields).update(rule.fields)
+        matched_rules.append(rule.rule_id)
 
-    for rule in rules.visibility_rules:
-        if _eval_expression(rule.conditions, context):
-            visible_fields.update(rule.fields)
-
-    for rule in rules.required_rules:
-        if _eval_expression(rule.conditions, context):
-            required_fields.update(rule.fields)
-
-    applied_defaults = _build_applied_defaults(intake, location_profile)
+    applied_defaults = _build_applied_defaults(intake, location_profile, context)
 
     return RulesEngineOutput(
         visible_fields=sorted(visible_fields),
         required_fields=sorted(required_fields),
         applied_defaults=applied_defaults,
+        rules_version=rules.version,
+        matched_rules=matched_rules,
     )
+
+
+def _match_rules(rules: CompiledRules, context: RuleContext) -> list[CompiledRule]:
+    return [
+        rule
+        for group in (rules.visibility_rules, rules.required_rules)
+        for rule in group
+        if rule.predicate(context)
+    ]
+
+
+def evaluate_intake_rules(
+    intake: ProjectIntakeV1_1,
+    location_profile: LocationProfile,
+) -> RulesEngineOutput:
+    rules = get_compiled_rules()
+    context = build_rule_context(intake, location_profile, rules.context_paths)
+    return _build_output(rules, intake, location_profile, context, _match_rules(rules, context))
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    return value
+
+
+def _context_signature(rules: CompiledRules, context: RuleContext) -> tuple[Any, ...] | None:
+    # всё, что видят условия: значения путей и то, заданы ли они; None — не хешируется
+    signature = tuple(
+        (_freeze(context.data[path.path]), context.provided[path.path] is not None) for path in rules.context_paths
+    )
+    try:
+        hash(signature)
+    except TypeError:
+        return None
+    return signature
+
+
+def evaluate_intake_rules_many(
+    intakes: Sequence[ProjectIntakeV1_1],
+    location_profile: LocationProfile,
+) -> list[RulesEngineOutput]:
+    """
+    evaluate_intake_rules для группы intake с общим профилем локации.
+    Условия проверяются один раз на сигнатуру контекста (значения полей, которые
+    читают правила), дефолты — для каждого intake.
+    """
+    rules = get_compiled_rules()
+    matched_by_signature: dict[tuple[Any, ...], list[CompiledRule]] = {}
+    outputs: list[RulesEngineOutput] = []
+    for intake in intakes:
+        context = build_rule_context(intake, location_profile, rules.context_paths)
+        signature = _context_signature(rules, context)
+        matched = matched_by_signature.get(signature) if signature is not None else None
+        if matched is None:
+            matched = _match_rules(rules, context)
+            if signature is not None:
+                matched_by_signature[signature] = matched
+        outputs.append(_build_output(rules, intake, location_profile, context, matched))
+    return outputs
+
+
+def reevaluate_intake_rules(
+    intake: ProjectIntakeV1_1,
+    location_profile: LocationProfile,
+    previous: RulesEngineOutput,
+    changed_fields: Iterable[str],
+) -> RulesEngineOutput:
+    """
+    Пересчёт после правки полей формы: заново проверяются только правила,
+    читающие changed_fields (пути вида `work_for`, `access_logistics.work_floor`,
+    `location_profile.visible_fields`); остальные берутся из previous.matched_rules.
+    intake и location_profile — уже новые. Смена профиля локации — это
+    changed_fields=["location_profile"]. Результат совпадает с evaluate_intake_rules.
+    """
+    rules = get_compiled_rules()
+    if previous.rules_version != rules.version or not all(
+        rule_id in rules.by_id for rule_id in previous.matched_rules
+    ):
+        return evaluate_intake_rules(intake, location_profile)
+
+    affected = rules.dependencies.affected(changed_fields)
+    matched_ids = {rule_id for rule_id in previous.matched_rules if rule_id not in affected}
+    context = build_rule_context(intake, location_profile, rules.context_paths)
+    matched_ids.update(rule_id for rule_id in affected if rules.by_id[rule_id].predicate(context))
+    # порядок matched_rules — как в полном расчёте: порядок правил в конфиге
+    matched = sorted((rules.by_id[rule_id] for rule_id in matched_ids), key=lambda rule: rule.position)
+    return _build_output(rules, intake, location_profile, context, matched)
@@ -1,12 +1,28 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.v1.deps import require_api_key
 from app.api.v1.router import router as v1_router
+from app.domain.calc.executor import get_calc_executor
+from app.domain.calc.timings import get_calc_metrics
 from app.settings import settings
 
-app = FastAPI(title="AI Construction Platform API")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    executor = get_calc_executor()
+    if settings.calc_pool_prewarm:
+        await run_in_threadpool(executor.warm_up)
+    yield
+    executor.shutdown()
+
+
+app = FastAPI(title="AI Construction Platform API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,3 +44,9 @@ app.include_router(v1_router)
 @app.get("/health")
 def health():
     return {"ok": True}
+
+
+@app.get("/metrics/calc")
+def calc_metrics(_=Depends(require_api_key)):
+    # суммы по стадиям с запуска процесса; пусто, пока calc_timings_enabled выключен
+    return get_calc_metrics().snapshot()
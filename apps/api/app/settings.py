@@ -14,6 +14,26 @@ class Settings(BaseSettings):
     max_body_bytes: int = 2_000_000  # 2 MB
     cors: str = "http://localhost:3000,http://127.0.0.1:3000"
 
+    # --- CALC ---
+    calc_batch_max_items: int = 10_000
+    calc_stream_chunk_items: int = 500
+    calc_sweep_max_variants: int = 10_000
+    calc_stream_max_line_bytes: int = 64_000
+    calc_cache_max_entries: int = 4096  # 0 = кеш выключен
+    calc_profile_cache_size: int = 512  # скомпилированных профилей в памяти
+    calc_recipe_check_interval_s: float = 1.0  # как часто сверять файл рецепта с кешем; 0 = на каждом вызове
+    calc_pool_workers: int = 2  # 0 = всё считается inline
+    calc_pool_offload_threshold: int = 2_000
+    calc_pool_chunk_size: int = 1_000
+    calc_pool_deadline_s: float | None = 60.0
+    calc_pool_start_method: str = "spawn"
+    calc_pool_prewarm: bool = True
+    calc_timings_enabled: bool = False  # время стадий расчёта в метрики процесса
+
+    # --- INTAKE ---
+    intake_location_cache_size: int = 1024  # разрешённых мест (страна, регион, город) в LRU
+    intake_batch_max_items: int = 5_000
+
     # --- AUTH ---
     jwt_secret: str = "dev-secret"
     api_keys: str = "devkey=11111111-1111-1111-1111-111111111111"
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import pytest
+
+from app.contracts.engine_v1.input import WorkUnit
+from app.contracts.engine_v1.profile import CalculationProfile
+from app.contracts.engine_v1.result import BomLine, WorkResult, WorkStatus
+from app.domain.calc.bom import aggregate_bom, compile_bom_plan, normalize_unit
+from app.domain.calc.errors import CalcFailed
+
+
+def _profile(bom: list[dict]) -> CalculationProfile:
+    return CalculationProfile.model_validate(
+        {
+            "profile_id": "test@v1",
+            "work_id": "test",
+            "params": [
+                {"key": "wall_area_m2", "type": "number", "required": True},
+                {"key": "layers", "type": "number", "required": True},
+            ],
+            "formulas": [{"formula_id": "paint_area", "expression": "wall_area_m2 * layers"}],
+            "bom": bom,
+            "outputs": {},
+        }
+    )
+
+
+def test_bom_plan_evaluates_quantities_in_canonical_units():
+    plan = compile_bom_plan(
+        _profile(
+            [
+                {"resource_id": "paint", "resource_type": "material", "unit": "ml", "quantity": "paint_area * 150"},
+                {"resource_id": "roller", "resource_type": "tool"},
+            ]
+        )
+    )
+    lines, warnings = plan.evaluate({"wall_area_m2": 10, "layers": 2, "paint_area": 20})
+    assert lines == [
+        BomLine(resource_id="paint", section="materials", quantity=3.0, unit="l"),
+        BomLine(resource_id="roller", section="tools", quantity=None, unit=None),
+    ]
+    assert warnings == []
+
+    lines, warnings = plan.evaluate({"wall_area_m2": 10, "layers": 2})
+    assert [line.resource_id for line in lines] == ["roller"]
+    assert warnings == ["BOM_INPUTS_MISSING:paint:paint_area"]
+
+
+def test_bom_plan_rejects_unknown_names_and_types():
+    with pytest.raises(CalcFailed):
+        compile_bom_plan(_profile([{"resource_id": "x", "resource_type": "material", "quantity": "nope * 2"}]))
+    with pytest.raises(CalcFailed, match="resource_type"):
+        compile_bom_plan(_profile([{"resource_id": "x", "resource_type": "labour"}]))
+
+
+def test_normalize_unit():
+    assert normalize_unit("г") == ("kg", 0.001)
+    assert normalize_unit(" M² ") == ("m2", 1.0)
+    assert normalize_unit("bucket") == ("bucket", 1.0)
+
+
+def _work(lines: list[BomLine]) -> WorkResult:
+    return WorkResult(work_id="w", status=WorkStatus.DRAFT, bom=lines)
+
+
+def test_aggregate_bom_merges_by_resource():
+    works = [
+        _work([BomLine(resource_id="paint", section="materials", quantity=1.5, unit="l")]),
+        _work(
+            [
+                BomLine(resource_id="paint", section="materials", quantity=2.0, unit="l"),
+                BomLine(resource_id="roller", section="tools", quantity=None, unit=None),
+                BomLine(resource_id="paint", section="materials", quantity=3.0, unit="kg"),
+                BomLine(resource_id="tape", section="materials", quantity=1.0, unit=None),
+                BomLine(resource_id="tape", section="materials", quantity=2.0, unit="m"),
+            ]
+        ),
+    ]
+    sections, warnings = aggregate_bom(works)
+    assert [(r.resource_id, r.quantity, r.unit) for r in sections["materials"]] == [
+        ("paint", 3.5, "l"),
+        ("paint", 3.0, "kg"),
+        ("tape", 1.0, None),
+        ("tape", 2.0, "m"),
+    ]
+    assert [(r.resource_id, r.quantity) for r in sections["tools"]] == [("roller", None)]
+    assert sections["equipment"] == []
+    assert warnings == ["BOM_UNIT_CONFLICT:paint:l,kg", "BOM_UNIT_CONFLICT:tape:-,m"]
+
+
+def test_aggregate_bom_many_lines():
+    lines = [BomLine(resource_id=f"r{i % 300}", section="materials", quantity=1.0, unit="kg") for i in range(300_000)]
+    works = [_work(lines[i : i + 100]) for i in range(0, len(lines), 100)]
+    sections, _ = aggregate_bom(works)
+    assert len(sections["materials"]) == 300
+    assert sections["materials"][0].quantity == 1000.0
+
+
+def test_engine_v1_fills_resources_from_profile_bom(monkeypatch):
+    from app.domain.calc import engine_v1_skeleton
+    from app.domain.calc.profile_registry import get_profile_meta
+
+    base = get_profile_meta("paint_walls_putty")
+    profile = base.profile.model_copy(
+        update={
+            "bom": _profile(
+                [{"resource_id": "paint", "resource_type": "material", "unit": "l", "quantity": "wall_area_m2 * layers * 0.1"}]
+            ).bom
+        }
+    )
+    meta = replace(base, profile=profile, bom_plan=compile_bom_plan(profile))
+    monkeypatch.setattr(engine_v1_skeleton, "_resolve_profile", lambda work_unit: meta)
+
+    works, warnings = engine_v1_skeleton.build_work_results(
+        [
+            WorkUnit(work_id="paint_walls_putty", parameters={"wall_area_m2": 10, "layers": 2, "base_type": "putty"}),
+            WorkUnit(work_id="paint_walls_putty", parameters={"wall_area_m2": 5, "layers": 2, "base_type": "putty"}),
+        ]
+    )
+    sections, _ = aggregate_bom(works)
+    assert [(r.resource_id, r.quantity, r.unit) for r in sections["materials"]] == [("paint", 3.0, "l")]
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from app.contracts.engine_v1.input import EngineInput
+from app.domain.calc import get_calc_engine_v0
+from app.domain.calc.engine_v1_skeleton import calculate_v1
+from app.domain.calc.errors import CalcTimeout
+from app.domain.calc.executor import CalcExecutor
+
+
+def _input(area_m2: float) -> dict:
+    return {
+        "work_id": "wall_painting_v1",
+        "params": {"area_m2": area_m2, "base": "drywall", "quality": "econom"},
+    }
+
+
+def _sleep_chunk(items: list[float]) -> list[float]:
+    # уровень модуля: spawn-воркер импортирует функцию по имени
+    for seconds in items:
+        time.sleep(seconds)
+    return items
+
+
+def _engine_input(units: int) -> EngineInput:
+    return EngineInput.model_validate(
+        {
+            "project_profile": {
+                "region": "ru-moscow",
+                "object_type": "apartment",
+                "customer_type": "private",
+                "quality_level": "comfort",
+            },
+            "work_graph": [
+                {"work_id": "paint_walls_putty" if i % 2 else "unknown_work", "parameters": {"layers": 2}}
+                for i in range(units)
+            ],
+            "engine_context": {"rules_version": "rules_v1", "dictionaries_version": "dict_v1", "mode": "draft"},
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def executor():
+    ex = CalcExecutor(max_workers=2, offload_threshold=4, chunk_size=3)
+    ex.warm_up()
+    yield ex
+    ex.shutdown()
+
+
+def test_executor_offloads_in_chunks_and_keeps_order(executor):
+    inputs = [_input(10 + i) for i in range(7)] + [{"work_id": "nope"}]
+    outcomes = executor.calculate_many(inputs)
+    expected = get_calc_engine_v0().calculate_many(inputs)
+    assert outcomes[:7] == expected[:7]
+    assert outcomes[7].code == "calc_unknown_work"
+
+
+def test_executor_keeps_small_calls_inline():
+    ex = CalcExecutor(max_workers=2, offload_threshold=100, chunk_size=10)
+    assert ex.calculate_many([_input(5)]) == [get_calc_engine_v0().calculate(_input(5))]
+    assert ex._pool is None
+
+
+def test_executor_calculate_v1_matches_inline(executor):
+    payload = _engine_input(9)
+    assert executor.calculate_v1(payload) == calculate_v1(payload)
+
+
+def test_executor_deadline(executor):
+    with pytest.raises(CalcTimeout):
+        executor.calculate_many([_input(10)] * 50, deadline_s=0)
+
+
+def test_executor_cancels_chunks_past_deadline(executor):
+    # 2 воркера, 8 чанков по 0.3 с: к дедлайну часть чанков ещё в очереди и снимается;
+    # пул после таймаута остаётся рабочим
+    job = executor.submit(_sleep_chunk, [0.1] * 24, deadline_s=0.15)
+    with pytest.raises(CalcTimeout):
+        executor._collect(job)
+    assert any(future.cancelled() for future in job.futures)
+    assert executor.calculate_many([_input(10)] * 4) == get_calc_engine_v0().calculate_many([_input(10)] * 4)
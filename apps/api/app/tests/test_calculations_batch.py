@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+
+from fastapi.testclient import TestClient
+
+from app.contracts.input_v1 import EstimateInputV1
+from app.domain.calc import get_calc_engine_v0
+from app.main import app
+from app.settings import settings
+
+
+def _headers() -> dict:
+    return {"X-API-Key": settings.api_keys.split("=", 1)[1]}
+
+
+def _item(area_m2: float, base: str = "plaster") -> dict:
+    return {
+        "work_id": "wall_painting_v1",
+        "params": {"area_m2": area_m2, "base": base, "quality": "comfort"},
+        "prices": {"paint_price_per_l": 450, "labor_price_per_hour": 700},
+    }
+
+
+def test_calculate_batch_matches_single_and_keeps_order():
+    client = TestClient(app)
+    items = [_item(12.5), {"work_id": "tiling_v1", "params": {}}, _item(80, base="drywall")]
+    response = client.post(
+        "/v1/calculations/calculate-batch",
+        json={"items": items},
+        headers=_headers(),
+    )
+    assert response.status_code == 200
+    payload = response.json()
+    assert [item["index"] for item in payload["items"]] == [0, 1, 2]
+    assert payload["ok_count"] == 2
+    assert payload["error_count"] == 1
+
+    assert payload["items"][1]["ok"] is False
+    assert payload["items"][1]["error"]["code"] == "validation_error"
+
+    for i in (0, 2):
+        single = client.post("/v1/calculations/calculate", json=items[i], headers=_headers())
+        assert single.status_code == 200
+        assert payload["items"][i]["result"] == single.json()
+
+
+def test_calc_engine_v0_calculate_many_reports_per_item_errors():
+    engine = get_calc_engine_v0()
+    outcomes = engine.calculate_many(
+        [
+            _item(10),
+            {"params": {}},
+            {"work_id": "unknown"},
+            {"work_id": "wall_painting_v1", "params": {"area_m2": 0, "base": "plaster", "quality": "comfort"}},
+        ]
+    )
+    assert outcomes[0] == engine.calculate(_item(10))
+    assert [getattr(o, "code", None) for o in outcomes[1:]] == [
+        "calc_invalid_input",
+        "calc_unknown_work",
+        "calc_invalid_input",
+    ]
+
+
+def test_calculate_stream_ndjson_in_order(monkeypatch):
+    monkeypatch.setattr(settings, "calc_stream_chunk_items", 2)
+    client = TestClient(app)
+    lines = [
+        json.dumps(_item(12.5)),
+        "{not json",
+        "",
+        json.dumps({"work_id": "wall_painting_v1", "params": {"area_m2": -1}}),
+        json.dumps(_item(40, base="concrete")),
+    ]
+
+    def _body():
+        for line in lines:
+            yield (line + "\n").encode()
+
+    response = client.post(
+        "/v1/calculations/calculate-stream",
+        content=_body(),
+        headers={**_headers(), "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    out = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["index"] for item in out] == [0, 1, 3, 4]
+    assert [item["ok"] for item in out] == [True, False, False, True]
+    assert out[1]["error"]["code"] == "invalid_json"
+    assert out[2]["error"]["code"] == "validation_error"
+    assert out[3]["result"] == get_calc_engine_v0().calculate(
+        EstimateInputV1.model_validate(_item(40, base="concrete")).model_dump()
+    )
+
+
+def test_calculate_stream_rejects_oversized_line(monkeypatch):
+    monkeypatch.setattr(settings, "calc_stream_max_line_bytes", 64)
+    client = TestClient(app)
+    body = json.dumps(_item(10)) + "\n" + "x" * 200
+    response = client.post(
+        "/v1/calculations/calculate-stream",
+        content=body.encode(),
+        headers={**_headers(), "Content-Type": "application/x-ndjson"},
+    )
+    out = [json.loads(line) for line in response.text.splitlines()]
+    assert out[-1]["error"]["code"] == "line_too_long"
+
+
+def test_sweep_endpoint_returns_grid_and_limits_size(monkeypatch):
+    client = TestClient(app)
+    body = {
+        "work_id": "wall_painting_v1",
+        "params": {"area_m2": 20, "quality": "comfort"},
+        "axes": {"base": ["concrete", "drywall"], "coats": [1, 2, 3]},
+    }
+    response = client.post("/v1/calculations/sweep", json=body, headers=_headers())
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["columns"][:2] == ["base", "coats"]
+    assert [row[:2] for row in payload["rows"]] == [
+        ["concrete", 1], ["concrete", 2], ["concrete", 3],
+        ["drywall", 1], ["drywall", 2], ["drywall", 3],
+    ]
+
+    missing_base = {**body, "axes": {"coats": [1, 2]}}
+    response = client.post("/v1/calculations/sweep", json=missing_base, headers=_headers())
+    assert response.status_code == 422
+
+    monkeypatch.setattr(settings, "calc_sweep_max_variants", 5)
+    response = client.post("/v1/calculations/sweep", json=body, headers=_headers())
+    assert response.status_code == 413
@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from fastapi.testclient import TestClient
 
+from app.contracts.engine_v1.input import EngineInput
+from app.contracts.engine_v1.result import EngineResult
+from app.domain.calc.engine_v1_skeleton import calculate_v1
+from app.domain.calc.result_projection import expand_engine_result
 from app.main import app
 from app.settings import settings
 
@@ -95,3 +99,64 @@ def test_engine_v1_deterministic_response():
     assert first.status_code == 200
     assert second.status_code == 200
     assert first.json() == second.json()
+
+
+def test_engine_v1_compact_projection_round_trips():
+    client = TestClient(app)
+    headers = {"X-API-Key": settings.api_keys.split("=", 1)[1]}
+    body = _minimal_payload()
+    full = client.post("/v1/engine/calculate", json=body, headers=headers).json()
+
+    response = client.post("/v1/engine/calculate?compact=true", json=body, headers=headers)
+    assert response.status_code == 200
+    compact = response.json()
+    assert "inputs" not in compact and "project_profile" not in compact
+    assert "parameters" not in compact["works"][0] and "dependencies" not in compact["works"][0]
+
+    payload = EngineInput.model_validate(body)
+    assert expand_engine_result(payload, compact).model_dump(mode="json") == full
+
+    response = client.post("/v1/engine/calculate?include=totals,meta", json=body, headers=headers)
+    assert set(response.json()) == {"totals", "meta"}
+
+    response = client.post("/v1/engine/calculate?include=works,nope", json=body, headers=headers)
+    assert response.status_code == 422
+
+
+def test_engine_v1_trusted_result_matches_validated_model():
+    client = TestClient(app)
+    headers = {"X-API-Key": settings.api_keys.split("=", 1)[1]}
+    body = _minimal_payload()
+    body["work_graph"].append(
+        {
+            "work_id": "paint_walls_putty",
+            "calculation_profile_id": "paint_walls_putty@v1",
+            "parameters": {"wall_area_m2": 20, "layers": 2, "base_type": "putty"},
+            "dependencies": [],
+        }
+    )
+    result = calculate_v1(EngineInput.model_validate(body))
+    assert EngineResult.model_validate(result.model_dump()) == result
+
+    response = client.post("/v1/engine/calculate", json=body, headers=headers)
+    assert response.status_code == 200
+    assert response.content == result.model_dump_json().encode("utf-8")
+
+    schema = client.get("/openapi.json").json()
+    responses = schema["paths"]["/v1/engine/calculate"]["post"]["responses"]
+    assert responses["200"]["content"]["application/json"]["schema"] == {"$ref": "#/components/schemas/EngineResult"}
+
+
+def test_engine_v1_huge_int_param_is_a_type_warning():
+    client = TestClient(app)
+    payload = _minimal_payload()
+    payload["work_graph"] = [
+        {"work_id": "paint_walls_putty", "parameters": {"wall_area_m2": 10**400, "layers": 2, "base_type": "putty"}}
+    ]
+    response = client.post(
+        "/v1/engine/calculate",
+        json=payload,
+        headers={"X-API-Key": settings.api_keys.split("=", 1)[1]},
+    )
+    assert response.status_code == 200
+    assert response.json()["works"][0]["warnings"] == ["INVALID_PARAM:wall_area_m2:type"]
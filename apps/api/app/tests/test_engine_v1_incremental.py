@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from app.contracts.engine_v1.input import EngineInput
+from app.domain.calc.engine_v1_skeleton import calculate_v1, recalculate_v1
+
+_READY_PARAMS = {"wall_area_m2": 20, "layers": 2, "base_type": "putty"}
+
+
+def _payload(units: list[dict]) -> EngineInput:
+    return EngineInput.model_validate(
+        {
+            "project_profile": {
+                "region": "ru-moscow",
+                "object_type": "apartment",
+                "customer_type": "private",
+                "quality_level": "comfort",
+            },
+            "work_graph": units,
+            "engine_context": {"rules_version": "rules_v1", "dictionaries_version": "dict_v1", "mode": "draft"},
+        }
+    )
+
+
+def _rooms(count: int) -> list[dict]:
+    units = [{"work_id": "prep", "calculation_profile_id": "paint_walls_putty@v1", "parameters": dict(_READY_PARAMS)}]
+    units += [
+        {
+            "work_id": f"room_{i}",
+            "calculation_profile_id": "paint_walls_putty@v1",
+            "parameters": dict(_READY_PARAMS, wall_area_m2=10 + i),
+            "dependencies": ["prep"],
+        }
+        for i in range(count)
+    ]
+    return units
+
+
+def test_recalculate_reuses_unchanged_units():
+    units = _rooms(200)
+    previous = calculate_v1(_payload(units))
+
+    units[5]["parameters"]["wall_area_m2"] = 99
+    payload = _payload(units)
+    result = recalculate_v1(payload, previous)
+
+    assert result == calculate_v1(payload)
+    assert result.model_dump_json() == calculate_v1(payload).model_dump_json()
+    assert result.works[0] is previous.works[0]
+    assert result.works[5] is not previous.works[5]
+    assert result.works[7] is previous.works[7]
+
+
+def test_recalculate_follows_upstream_readiness():
+    units = _rooms(3)
+    previous = calculate_v1(_payload(units))
+
+    units[0]["parameters"] = {}
+    payload = _payload(units)
+    result = recalculate_v1(payload, previous)
+
+    assert result == calculate_v1(payload)
+    assert "DEPENDENCIES_NOT_READY:prep" in result.works[2].warnings
+    assert "DEPENDENCIES_NOT_READY:room_1:prep" in result.meta.warnings
+
+
+def test_recalculate_handles_added_removed_and_reordered_units():
+    units = _rooms(10)
+    previous = calculate_v1(_payload(units))
+
+    units = list(reversed(units[3:])) + [{"work_id": "unknown_work", "dependencies": ["room_1"]}]
+    payload = _payload(units)
+    assert recalculate_v1(payload, previous) == calculate_v1(payload)
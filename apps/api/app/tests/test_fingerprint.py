@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from app.contracts.engine_v1.input import WorkUnit
+from app.domain.calc.engine_v1_skeleton import calculate_v1, recalculate_v1
+from app.domain.calc.fingerprint import input_fingerprint, work_unit_fingerprint
+from app.tests.test_engine_v1_incremental import _payload, _rooms
+
+
+def test_work_unit_fingerprint_is_content_addressed():
+    a = WorkUnit(work_id="w", parameters={"a": 1, "b": [1, 2]})
+    b = WorkUnit(work_id="w", parameters={"b": [1, 2], "a": 1})
+    c = WorkUnit(work_id="w", parameters={"a": 1, "b": [2, 1]})
+    assert work_unit_fingerprint(a) == work_unit_fingerprint(b)
+    assert work_unit_fingerprint(a) != work_unit_fingerprint(c)
+    assert a == WorkUnit(work_id="w", parameters={"a": 1, "b": [1, 2]})
+
+
+def test_work_unit_fingerprint_falls_back_for_non_string_keys():
+    unit = WorkUnit(work_id="w", parameters={"grid": {1: "a", 2: "b"}})
+    assert work_unit_fingerprint(unit) == work_unit_fingerprint(unit.model_copy(deep=True))
+
+
+def test_root_changes_only_with_content_and_order():
+    units = _rooms(5)
+    first = input_fingerprint(_payload(units))
+    assert input_fingerprint(_payload(units)) == first
+
+    units[2]["parameters"]["layers"] = 3
+    edited = input_fingerprint(_payload(units))
+    assert edited.root != first.root
+    assert edited.project_profile == first.project_profile
+    assert [x != y for x, y in zip(edited.work_units, first.work_units)] == [False, False, True, False, False, False]
+
+    reordered = input_fingerprint(_payload(list(reversed(units))))
+    assert reordered.root != edited.root
+
+
+def test_work_unit_fingerprint_follows_in_place_edits():
+    unit = WorkUnit(work_id="w", parameters={"a": 1})
+    before = work_unit_fingerprint(unit)
+    unit.parameters["a"] = 2
+    assert work_unit_fingerprint(unit) != before
+    unit.dependencies.append("prep")
+    assert work_unit_fingerprint(unit) != work_unit_fingerprint(WorkUnit(work_id="w", parameters={"a": 2}))
+
+
+def test_recalculate_sees_in_place_edits_of_the_new_input():
+    payload = _payload(_rooms(3))
+    previous = calculate_v1(payload.model_copy(deep=True))
+    work_unit_fingerprint(payload.work_graph[1])
+    payload.work_graph[1].parameters["layers"] = 3
+    result = recalculate_v1(payload, previous)
+    assert result == calculate_v1(payload)
+    assert result.works[1] is not previous.works[1]
+
+
+def test_trace_id_is_the_input_fingerprint_root():
+    payload = _payload(_rooms(3))
+    meta = calculate_v1(payload).meta
+    assert meta.trace_id == input_fingerprint(payload).root
+    assert calculate_v1(payload.model_copy(deep=True)).meta.trace_id == meta.trace_id
+
+    payload.work_graph[1].parameters["layers"] = 3
+    assert calculate_v1(payload).meta.trace_id != meta.trace_id
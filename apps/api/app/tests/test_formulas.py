@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import pytest
+
+from app.contracts.engine_v1.profile import CalculationProfile
+from app.domain.calc.errors import CalcFailed
+from app.domain.calc.formulas import compile_formula_plan
+from app.domain.calc.profile_registry import get_formula_plan
+
+
+def _profile(formulas: list[dict]) -> CalculationProfile:
+    return CalculationProfile.model_validate(
+        {
+            "profile_id": "test@v1",
+            "work_id": "test",
+            "params": [
+                {"key": "wall_area_m2", "type": "number", "required": True},
+                {"key": "openings_area_m2", "type": "number", "required": False},
+                {"key": "layers", "type": "number", "required": True},
+            ],
+            "formulas": formulas,
+            "outputs": {},
+        }
+    )
+
+
+def test_formula_plan_orders_by_dependencies():
+    plan = compile_formula_plan(
+        _profile(
+            [
+                {"formula_id": "paint_area", "expression": "net_area * layers"},
+                {"formula_id": "net_area", "expression": "max(wall_area_m2 - openings_area_m2, 0)"},
+                {"formula_id": "cans", "expression": "ceil(paint_area / 10) if paint_area > 0 else 0"},
+            ]
+        )
+    )
+    assert [step.formula_id for step in plan.steps] == ["net_area", "paint_area", "cans"]
+
+    values, warnings = plan.evaluate({"wall_area_m2": 40, "openings_area_m2": 4.5, "layers": 2})
+    assert values == {"net_area": 35.5, "paint_area": 71.0, "cans": 8}
+    assert warnings == []
+
+    values, warnings = plan.evaluate({"wall_area_m2": 40, "layers": 2})
+    assert values == {}
+    assert warnings[0] == "FORMULA_INPUTS_MISSING:net_area:openings_area_m2"
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "__import__('os')",
+        "wall_area_m2.real",
+        "layers ** wall_area_m2",
+        "unknown_param + 1",
+        "[x for x in layers]",
+        "open('x')",
+    ],
+)
+def test_formula_compiler_rejects_unsafe_or_unknown(expression):
+    with pytest.raises(CalcFailed):
+        compile_formula_plan(_profile([{"formula_id": "f", "expression": expression}]))
+
+
+def test_formula_cycle_is_detected():
+    with pytest.raises(CalcFailed, match="cycle"):
+        compile_formula_plan(
+            _profile(
+                [
+                    {"formula_id": "a", "expression": "b + 1"},
+                    {"formula_id": "b", "expression": "a * 2"},
+                ]
+            )
+        )
+
+
+def test_formula_plan_is_cached_on_registry_and_handles_deep_chains():
+    assert get_formula_plan("paint_walls_putty@v1") is get_formula_plan("paint_walls_putty@v1")
+
+    formulas = [{"formula_id": "f0", "expression": "wall_area_m2 * layers + 1"}]
+    formulas += [
+        {"formula_id": f"f{i}", "expression": f"f{i - 1} * 1.0001 + min(layers, 2) - 1"} for i in range(1, 2000)
+    ]
+    plan = compile_formula_plan(_profile(formulas))
+    assert plan.node_count > 10_000
+
+    values, warnings = plan.evaluate({"wall_area_m2": 10, "layers": 3})
+    assert warnings == []
+    assert len(values) == 2000
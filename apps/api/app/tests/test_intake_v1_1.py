@@ -1,16 +1,41 @@
+from uuid import uuid4
+
 import pytest
+from fastapi.testclient import TestClient
 
 from app.contracts.intake_v1_1 import (
     AccessLogistics,
     ClientType,
+    LocationProfile,
     ProjectIntakeV1_1,
+    SelectedPlace,
     WorkClass,
     WorkFor,
     WorkLocation,
     WorkType,
 )
-from app.domain.intake.location_profiles import get_location_profile, resolve_location_profile
-from app.domain.intake.rules_engine import evaluate_intake_rules
+from app.domain.calc.executor import CalcExecutor
+from app.domain.intake import batch as intake_batch
+from app.domain.intake.batch import evaluate_intake_batch
+from app.domain.intake.config_loader import ConfigCache, load_rules_config
+from app.domain.intake.location_profiles import (
+    LocationProfileIndex,
+    get_location_profile,
+    resolve_location_profile,
+)
+from app.domain.intake.rule_context import build_rule_context, compile_context_paths
+from app.domain.intake.rules_engine import (
+    CompiledRules,
+    RuleContext,
+    RulesConfig,
+    compile_rules,
+    evaluate_intake_rules,
+    evaluate_intake_rules_many,
+    get_compiled_rules,
+    reevaluate_intake_rules,
+)
+from app.main import app
+from app.settings import settings
 
 
 def _base_access_logistics() -> AccessLogistics:
@@ -34,8 +59,41 @@ def _base_intake() -> ProjectIntakeV1_1:
     )
 
 
+def _place(country: str, admin: str | None, city: str) -> SelectedPlace:
+    return SelectedPlace(
+        location_id=uuid4(),
+        country_iso2=country,
+        admin_level_1=admin,
+        city=city,
+        source="manual",
+    )
+
+
 def test_resolve_location_profile_defaults_to_global() -> None:
     assert resolve_location_profile(None) == "global_default_v1"
+    assert resolve_location_profile(_place("RU", "MOW", "Moscow")) == "global_default_v1"
+
+
+def test_location_profile_index_prefers_most_specific_match() -> None:
+    profiles = [
+        LocationProfile(profile_id="global_default_v1"),
+        LocationProfile(profile_id="ru_v1", match_rules=[{"country_iso2": "RU"}]),
+        LocationProfile(profile_id="ru_mow_v1", match_rules=[{"country_iso2": "RU", "admin_level_1": "MOW"}]),
+        LocationProfile(
+            profile_id="moscow_v1",
+            match_rules=[{"country_iso2": "RU", "admin_level_1": "MOW", "city": "Moscow"}],
+        ),
+        LocationProfile(profile_id="moscow_dup_v1", match_rules=[{"country_iso2": "RU", "city": "Moscow"}]),
+    ]
+    index = LocationProfileIndex(profiles, max_cached=2)
+    assert index.resolve(_place("RU", "MOW", "Moscow")) == "moscow_v1"
+    assert index.resolve(_place("RU", "MOW", "Zelenograd")) == "ru_mow_v1"
+    assert index.resolve(_place("RU", None, "Moscow")) == "moscow_dup_v1"
+    assert index.resolve(_place("RU", "SPE", "Saint Petersburg")) == "ru_v1"
+    assert index.resolve(_place("KZ", None, "Almaty")) == "global_default_v1"
+    assert len(index._resolved) == 2
+    assert index.get("ru_mow_v1") is profiles[2]
+    assert index.get("nope") is None
 
 
 def test_rules_engine_visibility_for_third_party_outside() -> None:
@@ -48,6 +106,208 @@ def test_rules_engine_visibility_for_third_party_outside() -> None:
     assert "cost_responsibility.payer_materials" in output.visible_fields
 
 
+def test_compiled_rules_are_reused_until_config_changes() -> None:
+    assert get_compiled_rules() is get_compiled_rules()
+
+    stamp = [(0, 0)]
+    raw = [load_rules_config()]
+    builds: list[str] = []
+
+    def build(data: dict) -> CompiledRules:
+        builds.append(data["version"])
+        return compile_rules(RulesConfig.model_validate(data))
+
+    cache = ConfigCache(lambda: stamp[0], lambda: raw[0], build)
+    first = cache.get()
+    assert cache.get() is first
+    # файл тронули, но содержимое то же — JSON перечитан, компиляция переиспользована
+    stamp[0] = (1, 0)
+    raw[0] = load_rules_config()
+    assert cache.get() is first
+    stamp[0] = (2, 0)
+    raw[0] = {**raw[0], "version": "v1.2"}
+    assert cache.get().version == "v1.2"
+    assert builds == ["v1.1", "v1.2"]
+
+
+def test_compiled_in_matches_str_enum_values() -> None:
+    rules = compile_rules(
+        RulesConfig.model_validate(
+            {
+                "version": "test",
+                "visibility_rules": [
+                    {
+                        "rule_id": "in_enum",
+                        "fields": ["x"],
+                        "conditions": {"all": [{"field": "intake.work_class", "op": "in", "value": ["comfort"]}]},
+                    },
+                    {
+                        "rule_id": "in_list_value",
+                        "fields": ["y"],
+                        "conditions": {"any": [{"field": "mall_areas", "op": "in", "value": [["tenant_unit"]]}]},
+                    },
+                ],
+            }
+        )
+    )
+    context = RuleContext(data={"work_class": WorkClass.COMFORT, "mall_areas": ["tenant_unit"]}, provided={})
+    assert [rule.predicate(context) for rule in rules.visibility_rules] == [True, True]
+
+    with pytest.raises(ValueError, match="Unsupported operation"):
+        compile_rules(
+            RulesConfig.model_validate(
+                {
+                    "version": "test",
+                    "required_rules": [
+                        {"rule_id": "bad", "fields": ["x"], "conditions": {"all": [{"field": "a", "op": "gt"}]}}
+                    ],
+                }
+            )
+        )
+
+
+def test_rule_dependency_index_covers_parents_and_children() -> None:
+    index = get_compiled_rules().dependencies
+    assert "client_type_when_third_party" in index.affected(["work_for"])
+    # правило читает selected_place целиком и selected_place.confidence_object_type
+    assert "object_category_when_uninferred" in index.affected(["selected_place.city"])
+    assert "object_category_when_uninferred" in index.affected(["intake.selected_place"])
+    assert "object_category_when_uninferred" in index.affected(["location_profile"])
+    assert index.affected(["cleanup_waste.trash_removal_mode"]) == set()
+
+
+def test_reevaluate_matches_full_evaluation() -> None:
+    profile = get_location_profile("global_default_v1")
+    assert profile is not None
+    intake = _base_intake()
+    previous = evaluate_intake_rules(intake, profile)
+    assert previous.rules_version == get_compiled_rules().version
+
+    edits = [
+        ({"work_for": WorkFor.SELF, "client_type": None}, ["work_for", "client_type"]),
+        ({"work_class": WorkClass.PREMIUM}, ["work_class"]),
+        ({"work_for": WorkFor.THIRD_PARTY, "client_type": ClientType.GOVERNMENT}, ["work_for", "client_type"]),
+    ]
+    for update, changed in edits:
+        intake = ProjectIntakeV1_1.model_validate({**intake.model_dump(), **update})
+        output = reevaluate_intake_rules(intake, profile, previous, changed)
+        assert output == evaluate_intake_rules(intake, profile)
+        previous = output
+
+    stale = previous.model_copy(update={"rules_version": "old"})
+    assert reevaluate_intake_rules(intake, profile, stale, []) == previous
+
+
+def _nested_lookup(data: dict, path: str):
+    current = data
+    for part in path.split("."):
+        if not isinstance(current, dict) or part not in current:
+            return None
+        current = current[part]
+    return current
+
+
+def test_rule_context_matches_model_dump_views() -> None:
+    profile = LocationProfile(
+        profile_id="test_v1",
+        default_values={"time_windows.work_time_start": "08:00", "nested": {"key": None}},
+        visible_fields=["object_category"],
+    )
+    base = _base_intake()
+    intakes = [
+        base,
+        ProjectIntakeV1_1.model_validate(
+            {
+                **base.model_dump(),
+                "time_windows": {"work_allowed_weekends": False},
+                "selected_place": _place("RU", None, "Tver"),
+            }
+        ),
+        ProjectIntakeV1_1.model_validate({**base.model_dump(), "time_windows": {"work_allowed_weekends": None}}),
+    ]
+    paths = sorted(get_compiled_rules().dependencies.refs) + [
+        "time_windows",
+        "time_windows.work_blackout_intervals",
+        "access_logistics.work_floor",
+        "location_profile",
+        "location_profile.default_values.nested",
+        "location_profile.default_values.nested.key",
+        "location_profile.visibility_flags.noise_dust",
+        "no_such_field.x",
+    ]
+    for intake in intakes:
+        context = build_rule_context(intake, profile, compile_context_paths(paths))
+        data = {**intake.model_dump(), "location_profile": profile.model_dump()}
+        provided = {
+            **intake.model_dump(exclude_defaults=True, exclude_none=True),
+            "location_profile": profile.model_dump(exclude_defaults=True, exclude_none=True),
+        }
+        for path in paths:
+            assert context.data[path] == _nested_lookup(data, path), path
+            assert (context.provided[path] is None) == (_nested_lookup(provided, path) is None), path
+        # дефолты профиля ищутся только в intake, в том числе вне путей правил
+        assert context.intake_value("intake.time_windows.work_time_start") == intake.time_windows.work_time_start
+        assert context.intake_value("cleanup_waste.trash_removal_mode") is None
+        assert context.intake_value("location_profile.profile_id") is None
+
+
+def _batch_intakes() -> list[ProjectIntakeV1_1]:
+    own = _base_intake().model_copy(update={"work_for": WorkFor.SELF, "client_type": None})
+    unknown = _base_intake().model_copy(update={"location_profile_id": "nope_v1"})
+    return [_base_intake(), own, unknown, _base_intake(), own]
+
+
+def test_evaluate_intake_rules_many_matches_single() -> None:
+    profile = get_location_profile("global_default_v1")
+    assert profile is not None
+    intakes = [intake for intake in _batch_intakes() if intake.location_profile_id != "nope_v1"]
+    assert evaluate_intake_rules_many(intakes, profile) == [
+        evaluate_intake_rules(intake, profile) for intake in intakes
+    ]
+
+
+@pytest.mark.parametrize("offload", [False, True])
+def test_evaluate_intake_batch_keeps_order(monkeypatch, offload) -> None:
+    executor = CalcExecutor(max_workers=1, offload_threshold=1 if offload else 100, chunk_size=2)
+    monkeypatch.setattr(intake_batch, "get_calc_executor", lambda: executor)
+    try:
+        evaluations = evaluate_intake_batch(_batch_intakes())
+    finally:
+        executor.shutdown()
+    profile = get_location_profile("global_default_v1")
+    assert [e.location_profile_id for e in evaluations] == [
+        "global_default_v1",
+        "global_default_v1",
+        "nope_v1",
+        "global_default_v1",
+        "global_default_v1",
+    ]
+    assert evaluations[2].output is None
+    for evaluation, intake in zip(evaluations, _batch_intakes()):
+        if evaluation.output is not None:
+            assert evaluation.output == evaluate_intake_rules(intake, profile)
+
+
+def test_intake_evaluate_batch_endpoint_reports_item_errors() -> None:
+    client = TestClient(app)
+    items = [intake.model_dump(mode="json") for intake in _batch_intakes()[:3]]
+    items.insert(1, {"work_type": "construction"})
+    response = client.post(
+        "/v1/intake/evaluate-batch",
+        json={"items": items},
+        headers={"X-API-Key": settings.api_keys.split("=", 1)[1]},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["index"] for item in body["items"]] == [0, 1, 2, 3]
+    assert (body["ok_count"], body["error_count"]) == (2, 2)
+    assert body["items"][0]["output"]["visible_fields"] == list(
+        evaluate_intake_rules(_base_intake(), get_location_profile("global_default_v1")).visible_fields
+    )
+    assert body["items"][1]["error"]["code"] == "validation_error"
+    assert body["items"][3]["error"]["code"] == "location_profile_not_found"
+
+
 def test_client_type_invalid_for_self() -> None:
     with pytest.raises(ValueError, match="client_type must not be set"):
         ProjectIntakeV1_1(
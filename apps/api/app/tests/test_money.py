@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.domain.calc.errors import CalcInvalidInput
+from app.domain.calc.money import (
+    Money,
+    Rounding,
+    div_round,
+    line_costs,
+    to_minor,
+    to_price_units,
+)
+from app.domain.calc.calculators.wall_painting_v1 import calc_wall_painting_v1
+
+
+def test_to_minor_absorbs_float_representation_error():
+    assert to_minor([0.295, 210.5, 99]).tolist() == [30, 21050, 9900]
+    assert to_minor([0.125], rounding=Rounding.HALF_EVEN).tolist() == [12]
+    assert to_minor([1.5], currency="JPY").tolist() == [2]
+    with pytest.raises(CalcInvalidInput):
+        to_minor([float("nan")])
+
+
+def test_div_round_policies():
+    values = np.array([25, 35, -25, 21, -21], dtype=np.int64)
+    assert div_round(values, 10, Rounding.HALF_UP).tolist() == [3, 4, -3, 2, -2]
+    assert div_round(values, 10, Rounding.HALF_EVEN).tolist() == [2, 4, -2, 2, -2]
+    assert div_round(values, 10, Rounding.UP).tolist() == [3, 4, -3, 3, -3]
+    assert div_round(values, 10, Rounding.DOWN).tolist() == [2, 3, -2, 2, -2]
+
+
+def test_line_costs_are_integer_and_overflow_safe():
+    # 7.4000000000000004 л × 450.00 ₽ = 3330.00 ₽ ровно
+    assert line_costs(to_price_units([450.0]), [7.4000000000000004]).tolist() == [333000]
+    big = line_costs(to_price_units([1e12]), [10**6])
+    assert big.tolist() == [10**12 * 10**6 * 100]
+
+
+def test_line_costs_keep_sub_minor_unit_prices():
+    # цена не округляется до копейки до умножения: округляется только итог строки
+    prices = to_price_units([0.0049, 450.335, 0.004, 0.295])
+    assert line_costs(prices, [280, 244.5, 20, 1]).tolist() == [137, 11010691, 8, 30]
+    assert to_price_units([0.0049], currency="JPY").tolist() == [4900]
+
+
+def test_wall_painting_v1_costs_with_sub_minor_unit_prices():
+    result = calc_wall_painting_v1(
+        {
+            "work_id": "wall_painting_v1",
+            "params": {"area_m2": 2000, "base": "plaster", "quality": "comfort"},
+            "prices": {
+                "labor_price_per_hour": 0.0049,
+                "paint_price_per_l": 450.335,
+                "masking_tape_price_per_roll": 0.004,
+                "film_price_per_roll": 0.0049,
+            },
+        }
+    )
+    # значения вычислены исходной float-реализацией с одним округлением в конце
+    assert result["cost"]["labor_cost"] == 2.74
+    assert result["cost"]["material_cost"] == 220169.19
+
+
+def test_money_sums_are_exact_and_currency_checked():
+    total = Money(0, "RUB")
+    for _ in range(10):
+        total = total + Money.of(0.1)
+    assert total == Money(100, "RUB")
+    assert total.amount == 1.0
+    with pytest.raises(CalcInvalidInput):
+        Money(1, "RUB") + Money(1, "USD")
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from app.contracts.engine_v1.input import WorkUnit
+from app.contracts.engine_v1.result import WorkStatus
+from app.domain.calc.engine_v1_skeleton import build_work_results
+from app.domain.calc.profile_registry import get_profile_meta
+
+
+def test_validator_reports_type_range_and_options_per_row():
+    validator = get_profile_meta("paint_walls_putty").validator
+    rows = [
+        {"wall_area_m2": 20, "layers": 2, "base_type": "putty", "has_openings": False},
+        {"wall_area_m2": -1, "layers": 4, "base_type": "concrete"},
+        {"wall_area_m2": "20", "layers": True, "has_openings": "yes"},
+        {"wall_area_m2": float("nan"), "openings_area_m2": 1.5},
+        {},
+        {"wall_area_m2": 10**400, "layers": 2},
+    ]
+    assert validator.validate(rows) == {
+        1: ["INVALID_PARAM:wall_area_m2:min", "INVALID_PARAM:layers:max", "INVALID_PARAM:base_type:options"],
+        2: ["INVALID_PARAM:wall_area_m2:type", "INVALID_PARAM:layers:type", "INVALID_PARAM:has_openings:type"],
+        3: ["INVALID_PARAM:wall_area_m2:type"],
+        5: ["INVALID_PARAM:wall_area_m2:type"],
+    }
+
+
+def test_invalid_params_block_the_unit():
+    units = [
+        WorkUnit(work_id="paint_walls_putty", parameters={"wall_area_m2": 20, "layers": 2, "base_type": "putty"}),
+        WorkUnit(work_id="paint_walls_putty", parameters={"wall_area_m2": 20, "layers": 9, "base_type": "putty"}),
+    ]
+    works, meta_warnings = build_work_results(units)
+    assert works[0].status == WorkStatus.DRAFT
+    assert works[1].status == WorkStatus.READY_FOR_INPUT
+    assert works[1].warnings == ["INVALID_PARAM:layers:max"]
+    assert meta_warnings == ["INVALID_PARAM:paint_walls_putty:layers:max"]
+
+
+def test_validator_scales_columnar():
+    validator = get_profile_meta("paint_walls_putty").validator
+    rows = [{"wall_area_m2": float(i % 50), "layers": 1 + i % 4, "base_type": "putty"} for i in range(100_000)]
+    errors = validator.validate(rows)
+    assert len(errors) == 25_000
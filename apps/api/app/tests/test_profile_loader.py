@@ -1,6 +1,15 @@
 from __future__ import annotations
 
-from app.domain.calc.profile_registry import get_profile_by_work_id
+import pytest
+
+from app.domain.calc import profile_loader
+from app.domain.calc.profile_loader import (
+    ProfileIndex,
+    StaleProfileIndex,
+    load_profile_index,
+    write_profile_index,
+)
+from app.domain.calc.profile_registry import ProfileRegistry, get_profile_by_work_id, get_profile_meta
 
 
 def test_profile_loader_paint_walls_putty():
@@ -8,3 +17,97 @@ def test_profile_loader_paint_walls_putty():
     assert profile is not None
     assert profile.profile_id == "paint_walls_putty@v1"
     assert profile.work_id == "paint_walls_putty"
+
+
+def test_profile_meta_is_precomputed_once():
+    meta = get_profile_meta("paint_walls_putty")
+    assert meta is get_profile_meta("anything", "paint_walls_putty@v1")
+    assert meta.required_keys == ("wall_area_m2", "layers", "base_type")
+    assert meta.optional == {"has_openings", "openings_area_m2", "include_covering"}
+    assert meta.expected_sections == tuple(meta.profile.outputs.model_dump())
+    assert meta.missing_required({"layers": 2, "wall_area_m2": 1}) == ["base_type"]
+    assert meta.missing_required({"wall_area_m2": 1, "layers": 2, "base_type": "putty"}) == []
+    assert get_profile_meta("unknown_work") is None
+
+
+_PROFILE_YAML = """profile_id: "{work_id}@v1"
+work_id: "{work_id}"
+params:
+  - key: "area_m2"
+    type: "number"
+    required: true
+outputs: {{}}
+"""
+
+
+def _write_profiles(profile_dir, count):
+    for i in range(count):
+        (profile_dir / f"work_{i}.yaml").write_text(_PROFILE_YAML.format(work_id=f"work_{i}"))
+
+
+def test_profile_index_loads_profiles_on_demand(tmp_path, monkeypatch):
+    _write_profiles(tmp_path, 20)
+    write_profile_index(tmp_path)
+
+    parsed = []
+    load = ProfileIndex.load
+    monkeypatch.setattr(ProfileIndex, "load", lambda self, entry: parsed.append(entry.file) or load(self, entry))
+
+    registry = ProfileRegistry(load_profile_index(tmp_path), max_cached=4)
+    assert parsed == []
+    assert registry.get_meta_by_work_id("work_3").profile_id == "work_3@v1"
+    assert registry.get_meta_by_id("work_3@v1") is registry.get_meta_by_work_id("work_3")
+    assert registry.get_meta_by_work_id("missing") is None
+    assert parsed == ["work_3.yaml"]
+
+    for i in range(10):
+        registry.get_meta_by_work_id(f"work_{i}")
+    assert len(registry._metas) == 4
+
+
+def test_profile_index_falls_back_when_stale(tmp_path):
+    _write_profiles(tmp_path, 2)
+    write_profile_index(tmp_path)
+    _write_profiles(tmp_path, 3)
+    assert "work_2@v1" in load_profile_index(tmp_path).by_profile_id
+
+    (tmp_path / "work_0.yaml").write_text(_PROFILE_YAML.format(work_id="renamed"))
+    index = load_profile_index(tmp_path)
+    assert "renamed" in index.by_work_id
+
+    write_profile_index(tmp_path)
+    (tmp_path / "work_1.yaml").write_text(_PROFILE_YAML.format(work_id="other"))
+    index = load_profile_index(tmp_path)
+    with pytest.raises(StaleProfileIndex):
+        index.load(index.by_work_id["work_1"])
+
+
+def test_registry_rebuilds_stale_index(tmp_path):
+    _write_profiles(tmp_path, 2)
+    write_profile_index(tmp_path)
+    (tmp_path / "work_1.yaml").write_text(_PROFILE_YAML.format(work_id="other"))
+
+    registry = ProfileRegistry(load_profile_index(tmp_path), max_cached=4)
+    assert registry.get_meta_by_work_id("work_1") is None
+    assert registry.get_meta_by_work_id("other").profile_id == "other@v1"
+    assert registry.get_meta_by_work_id("work_0").profile_id == "work_0@v1"
+
+
+def test_index_fallback_seeds_parsed_profiles(tmp_path, monkeypatch):
+    _write_profiles(tmp_path, 3)
+    validated = []
+    validate = profile_loader.validate_profile
+    monkeypatch.setattr(
+        profile_loader, "validate_profile", lambda data, name: validated.append(name) or validate(data, name)
+    )
+
+    registry = ProfileRegistry(load_profile_index(tmp_path), max_cached=4)
+    assert sorted(validated) == ["work_0.yaml", "work_1.yaml", "work_2.yaml"]
+    assert registry.get_meta_by_work_id("work_2").profile_id == "work_2@v1"
+    assert len(validated) == 3
+
+    # правка файла после сборки индекса разбирается заново
+    (tmp_path / "work_2.yaml").write_text(_PROFILE_YAML.format(work_id="work_2") + "# edited\n")
+    registry = ProfileRegistry(registry.index, max_cached=4)
+    assert registry.get_meta_by_work_id("work_2").profile_id == "work_2@v1"
+    assert validated[-1] == "work_2.yaml" and len(validated) == 4
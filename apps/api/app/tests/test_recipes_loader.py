@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+import pytest
+
+from app.domain.calc.errors import CalcFailed
+from app.domain.calc.recipes_loader import compile_recipe, get_compiled_recipe, load_compiled_recipe
+
+_RECIPES_DIR = Path(__file__).resolve().parents[1] / "domain" / "calc" / "recipes"
+
+
+def test_compiled_recipe_wall_painting_v1():
+    recipe = load_compiled_recipe(_RECIPES_DIR / "wall_painting_v1.yaml")
+    assert get_compiled_recipe("wall_painting_v1", 1) is recipe
+    assert recipe.enums["quality"] == frozenset({"econom", "comfort", "premium"})
+
+    idx = recipe.lookup("base", ["drywall", "marble", None])
+    table = recipe.norms["paint_coverage_m2_per_l_by_base"]
+    assert table[idx[0]] == 10.0
+    assert math.isnan(table[idx[1]]) and math.isnan(table[idx[2]])
+    assert recipe.rounding["liters_step"] == 0.1
+    with pytest.raises(ValueError):
+        table[0] = 1.0
+
+
+def test_compile_recipe_rejects_non_numeric_norm():
+    data = {"id": "x", "norms": {"k_by_base": {"a": "fast"}}}
+    with pytest.raises(CalcFailed, match="Invalid recipe norm"):
+        compile_recipe(data)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.domain.calc import recipes_loader
+from app.domain.calc.engine_v0 import CalcEngineV0
+from app.domain.calc.recipes_loader import load_compiled_recipe
+from app.domain.calc.registry_v0 import (
+    build_batch_registry_v0,
+    build_recipe_registry_v0,
+    build_registry_v0,
+)
+from app.domain.calc.result_cache import CalcResultCache
+from app.settings import settings
+
+_RECIPE_PATH = Path(__file__).resolve().parents[1] / "domain" / "calc" / "recipes" / "wall_painting_v1.yaml"
+
+
+def _engine(max_entries: int) -> CalcEngineV0:
+    return CalcEngineV0(
+        registry=build_registry_v0(),
+        batch_registry=build_batch_registry_v0(),
+        recipe_registry=build_recipe_registry_v0(),
+        cache=CalcResultCache(max_entries),
+    )
+
+
+def _input(area_m2: float) -> dict:
+    return {
+        "work_id": "wall_painting_v1",
+        "params": {"area_m2": area_m2, "base": "plaster", "quality": "comfort"},
+        "prices": {"paint_price_per_l": 450},
+    }
+
+
+def test_result_cache_hits_and_evicts():
+    engine = _engine(max_entries=2)
+    assert engine.cache is not None
+
+    first = engine.calculate(_input(10))
+    first["cost"]["total_cost"] = -1  # мутация результата не портит кеш
+    again = engine.calculate(_input(10))
+    assert again == _engine(0).calculate(_input(10))
+
+    engine.calculate(_input(20))
+    engine.calculate(_input(30))
+    stats = engine.cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.size) == (1, 3, 1, 2)
+
+    outcomes = engine.calculate_many([_input(30), _input(40)])
+    assert outcomes[0] == engine.calculate(_input(30))
+    assert engine.cache.stats().hits == 3
+
+
+def test_result_cache_key_changes_with_recipe_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "calc_recipe_check_interval_s", 0.0)
+    path = tmp_path / "recipe.yaml"
+    path.write_bytes(_RECIPE_PATH.read_bytes())
+    before = load_compiled_recipe(path)
+    assert load_compiled_recipe(path) is before
+
+    path.write_bytes(_RECIPE_PATH.read_bytes().replace(b"concrete: 8.0", b"concrete: 8.25"))
+    after = load_compiled_recipe(path)
+    assert after.checksum != before.checksum
+    assert CalcResultCache.key(_input(10), before) != CalcResultCache.key(_input(10), after)
+
+
+def test_recipe_file_is_checked_once_per_interval(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "calc_recipe_check_interval_s", 3600.0)
+    path = tmp_path / "recipe.yaml"
+    path.write_bytes(_RECIPE_PATH.read_bytes())
+    before = load_compiled_recipe(path)
+
+    stats = []
+    stamp = recipes_loader._file_stamp
+    monkeypatch.setattr(recipes_loader, "_file_stamp", lambda p: stats.append(p) or stamp(p))
+    path.write_bytes(_RECIPE_PATH.read_bytes().replace(b"concrete: 8.0", b"concrete: 8.25"))
+    assert load_compiled_recipe(path) is before
+    assert stats == []
+
+    monkeypatch.setattr(settings, "calc_recipe_check_interval_s", 0.0)
+    assert load_compiled_recipe(path).checksum != before.checksum
+    assert stats == [path]
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.domain.calc import recipes_loader, snapshot
+from app.domain.calc.profile_loader import load_profile_file
+from app.domain.calc.recipes_loader import load_compiled_recipe, load_yaml_with_checksum
+from app.domain.calc.snapshot import build_snapshot, load_snapshot, write_snapshot
+
+_CALC_DIR = Path(snapshot.__file__).resolve().parent
+
+
+@pytest.fixture
+def calc_dir(tmp_path):
+    for sub in ("recipes", "profiles"):
+        shutil.copytree(_CALC_DIR / sub, tmp_path / sub, ignore=shutil.ignore_patterns("*.json"))
+    return tmp_path
+
+
+def test_snapshot_roundtrip(calc_dir, tmp_path):
+    path = write_snapshot(tmp_path / "snapshot.bin", calc_dir)
+    loaded = load_snapshot(path)
+
+    recipe_data, recipe_checksum = load_yaml_with_checksum(calc_dir / "recipes" / "wall_painting_v1.yaml")
+    assert loaded.recipe_data(recipe_checksum) == recipe_data
+    _, profile_checksum = load_yaml_with_checksum(calc_dir / "profiles" / "paint_walls_putty.yaml")
+    assert loaded.profile(profile_checksum).profile_id == "paint_walls_putty@v1"
+
+
+class _Gone:
+    pass
+
+
+def test_snapshot_rejects_corrupt_or_foreign_files(calc_dir, tmp_path):
+    raw = bytearray(build_snapshot(calc_dir))
+    raw[-1] ^= 0xFF
+    (tmp_path / "corrupt.bin").write_bytes(bytes(raw))
+    corrupt = load_snapshot(tmp_path / "corrupt.bin")
+    # битая только последняя запись (профиль), рецепты целы
+    _, profile_checksum = load_yaml_with_checksum(calc_dir / "profiles" / "paint_walls_putty.yaml")
+    recipe_data, recipe_checksum = load_yaml_with_checksum(calc_dir / "recipes" / "wall_painting_v1.yaml")
+    assert corrupt.profile(profile_checksum) is None
+    assert corrupt.recipe_data(recipe_checksum) == recipe_data
+
+    (tmp_path / "truncated.bin").write_bytes(bytes(raw[:-1]))
+    (tmp_path / "foreign.bin").write_bytes(b"not a snapshot")
+    (tmp_path / "header.bin").write_bytes(bytes(raw[:12]) + b"{")
+    for name in ("truncated.bin", "foreign.bin", "header.bin", "missing.bin"):
+        assert len(load_snapshot(tmp_path / name)) == 0, name
+
+
+def test_snapshot_rejects_other_profile_schema(calc_dir, tmp_path, monkeypatch):
+    path = write_snapshot(tmp_path / "snapshot.bin", calc_dir)
+    assert len(load_snapshot(path)) > 0
+    monkeypatch.setattr(snapshot, "_profile_schema_hash", lambda: "other")
+    assert len(load_snapshot(path)) == 0
+
+
+def test_snapshot_entry_that_fails_to_unpickle_falls_back(tmp_path, monkeypatch):
+    raw = snapshot._encode_snapshot({}, {"gone": _Gone(), "ok": {"a": 1}}, {})
+    (tmp_path / "snapshot.bin").write_bytes(raw)
+    monkeypatch.delattr(__import__(__name__, fromlist=["_Gone"]), "_Gone")
+    loaded = load_snapshot(tmp_path / "snapshot.bin")
+    assert loaded.profile("gone") is None
+    assert loaded._get("profiles", loaded._profiles, "ok") == {"a": 1}
+
+
+def test_snapshot_unpickles_only_requested_entries(calc_dir, tmp_path):
+    loaded = load_snapshot(write_snapshot(tmp_path / "snapshot.bin", calc_dir))
+    assert loaded._loaded == {}
+    _, profile_checksum = load_yaml_with_checksum(calc_dir / "profiles" / "paint_walls_putty.yaml")
+    profile = loaded.profile(profile_checksum)
+    assert profile is loaded.profile(profile_checksum)
+    assert list(loaded._loaded) == [("profiles", profile_checksum)]
+
+
+def test_loaders_use_snapshot_and_fall_back_for_changed_files(calc_dir, tmp_path, monkeypatch):
+    loaded = load_snapshot(write_snapshot(tmp_path / "snapshot.bin", calc_dir))
+    monkeypatch.setattr(snapshot, "_SNAPSHOT", loaded)
+
+    parsed = []
+    parse_yaml = recipes_loader.parse_yaml
+    monkeypatch.setattr(recipes_loader, "parse_yaml", lambda raw, name: parsed.append(name) or parse_yaml(raw, name))
+    monkeypatch.setattr("app.domain.calc.profile_loader.parse_yaml", recipes_loader.parse_yaml)
+
+    profile_path = calc_dir / "profiles" / "paint_walls_putty.yaml"
+    profile, checksum = load_profile_file(profile_path)
+    assert profile is loaded.profile(checksum)
+    recipe = load_compiled_recipe(calc_dir / "recipes" / "wall_painting_v1.yaml")
+    assert recipe.recipe_id == "wall_painting_v1"
+    assert parsed == []
+
+    profile_path.write_text(profile_path.read_text() + "\n# edited\n")
+    assert load_profile_file(profile_path)[0].profile_id == "paint_walls_putty@v1"
+    assert parsed == ["paint_walls_putty.yaml"]
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.common.errors import AppError
+from app.contracts.engine_v1.input import EngineInput
+from app.domain.calc.engine_v0 import CalcEngineV0
+from app.domain.calc.engine_v1_skeleton import calculate_v1
+from app.domain.calc.executor import CalcExecutor
+from app.domain.calc.registry_v0 import build_batch_registry_v0, build_registry_v0
+from app.domain.calc.timings import get_calc_metrics, stage
+from app.main import app
+from app.settings import settings
+
+
+def _payload() -> dict:
+    return {
+        "project_profile": {
+            "region": "ru-moscow",
+            "object_type": "apartment",
+            "customer_type": "private",
+            "quality_level": "comfort",
+        },
+        "work_graph": [
+            {
+                "work_id": "paint_walls_putty",
+                "parameters": {"wall_area_m2": 20, "layers": 2, "base_type": "putty"},
+            },
+            {"work_id": "unknown_work", "parameters": {}},
+        ],
+        "engine_context": {"rules_version": "rules_v1", "dictionaries_version": "dict_v1", "mode": "draft"},
+    }
+
+
+def test_timings_are_off_by_default():
+    assert stage("graph") is stage("bom")  # без таймера — один общий no-op
+    result = calculate_v1(EngineInput.model_validate(_payload()))
+    assert result.meta.timings is None
+
+
+def test_timings_in_meta_do_not_change_result():
+    payload = EngineInput.model_validate(_payload())
+    plain = calculate_v1(payload)
+    timed = calculate_v1(payload, timings=True)
+    stages = {item.stage: item for item in timed.meta.timings}
+    assert list(stages) == ["graph", "profiles", "params", "evaluate", "trace", "bom", "assemble"]
+    assert stages["profiles"].units == 2 and stages["profiles"].calls == 1
+    assert all(item.wall_ms >= 0 and item.cpu_ms >= 0 for item in timed.meta.timings)
+
+    timed.meta.timings = None
+    assert timed == plain
+
+
+def test_engine_v1_route_timings_query():
+    client = TestClient(app)
+    headers = {"X-API-Key": settings.api_keys.split("=", 1)[1]}
+    response = client.post("/v1/engine/calculate?timings=true&include=meta", json=_payload(), headers=headers)
+    assert response.status_code == 200
+    assert [item["stage"] for item in response.json()["meta"]["timings"]][0] == "graph"
+
+
+def test_metrics_accumulate_per_engine_when_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "calc_timings_enabled", True)
+    metrics = get_calc_metrics()
+    metrics.reset()
+    engine = CalcEngineV0(registry=build_registry_v0(), batch_registry=build_batch_registry_v0())
+    item = {"work_id": "wall_painting_v1", "params": {"area_m2": 10, "base": "drywall", "quality": "econom"}}
+    engine.calculate_many([item, item, {"work_id": "nope"}])
+    calculate_v1(EngineInput.model_validate(_payload()))
+
+    client = TestClient(app)
+    with pytest.raises(AppError):
+        client.get("/metrics/calc")
+    headers = {"X-API-Key": settings.api_keys.split("=", 1)[1]}
+    snapshot = client.get("/metrics/calc", headers=headers).json()
+    assert snapshot["engine_v0"]["runs"] == 1  # вложенные calculate пишут во внешний таймер
+    v0_stages = {s["stage"]: s for s in snapshot["engine_v0"]["stages"]}
+    assert v0_stages["calculate"]["units_total"] == 2
+    assert snapshot["engine_v1"]["runs"] == 1
+    assert {s["stage"] for s in snapshot["engine_v1"]["stages"]} >= {"profiles", "params", "trace"}
+    metrics.reset()
+
+
+def test_metrics_include_stages_of_offloaded_v0_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "calc_timings_enabled", True)
+    metrics = get_calc_metrics()
+    metrics.reset()
+    executor = CalcExecutor(max_workers=1, offload_threshold=2, chunk_size=2)
+    items = [
+        {"work_id": "wall_painting_v1", "params": {"area_m2": 10 + i, "base": "drywall", "quality": "econom"}}
+        for i in range(5)
+    ]
+    try:
+        outcomes = executor.calculate_many(items)
+    finally:
+        executor.shutdown()
+    assert len(outcomes) == 5
+
+    snapshot = metrics.snapshot()
+    assert snapshot["engine_v0"]["runs"] == 1
+    v0_stages = {s["stage"]: s for s in snapshot["engine_v0"]["stages"]}
+    assert v0_stages["pool"]["units_total"] == 5
+    # стадии из воркеров: по одной на чанк
+    assert v0_stages["cache_lookup"]["units_total"] == 5
+    assert v0_stages["cache_lookup"]["calls_total"] == 3
+    metrics.reset()
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import warnings
+
+import numpy as np
+import pytest
+
+from app.domain.calc.calculators.wall_painting_v1 import (
+    calc_wall_painting_v1,
+    calc_wall_painting_v1_batch,
+    calc_wall_painting_v1_many,
+    sweep_wall_painting_v1,
+)
+from app.domain.calc.errors import CalcInvalidInput
+
+
+def _input(**params) -> dict:
+    return {
+        "work_id": "wall_painting_v1",
+        "params": {"area_m2": 30, "base": "plaster", "quality": "comfort", **params},
+        "prices": {
+            "paint_price_per_l": 450,
+            "primer_price_per_l": 210.5,
+            "masking_tape_price_per_roll": 99,
+            "film_price_per_roll": 120,
+            "labor_price_per_hour": 700,
+        },
+    }
+
+
+def test_wall_painting_v1_scalar_result():
+    result = calc_wall_painting_v1(_input())
+    assert result["materials"] == {
+        "paint_l": 7.4,
+        "primer_l": 3.0,
+        "masking_tape_rolls": 1,
+        "film_rolls": 1,
+    }
+    assert result["labor"] == {"hours": 8.4}
+    assert result["cost"]["currency"] == "RUB"
+
+
+def test_wall_painting_v1_many_matches_scalar_per_row():
+    inputs = [
+        _input(),
+        _input(area_m2=123.4, base="drywall", quality="premium", coats=3, waste_pct=0),
+        _input(area_m2=-1),
+        _input(base="marble"),
+        _input(base="painted_wall", quality="econom", waste_pct=30),
+    ]
+    batch = calc_wall_painting_v1_many(inputs)
+    assert len(batch) == len(inputs)
+    for i, item in enumerate(inputs):
+        try:
+            expected = calc_wall_painting_v1(item)
+        except CalcInvalidInput as e:
+            assert batch.errors[i] is not None
+            assert str(batch.errors[i]) == e.message
+        else:
+            assert batch.result(i) == expected
+
+    assert str(batch.errors[2]) == "area_m2 must be > 0"
+    assert str(batch.errors[3]).startswith("base must be one of")
+
+
+def test_wall_painting_v1_batch_columns():
+    batch = calc_wall_painting_v1_batch(
+        area_m2=np.array([10.0, 50.0, 0.0]),
+        base=["concrete", "concrete", "concrete"],
+        quality=["econom", "econom", "econom"],
+        coats=np.array([1, 2, 2]),
+    )
+    assert batch.errors[:2] == [None, None]
+    assert isinstance(batch.errors[2], CalcInvalidInput)
+    assert batch.result(0)["materials"]["paint_l"] == pytest.approx(1.4)
+    with pytest.raises(CalcInvalidInput, match="area_m2 must be > 0"):
+        batch.result(2)
+    assert batch.result(1) == calc_wall_painting_v1(
+        {"params": {"area_m2": 50, "base": "concrete", "quality": "econom", "coats": 2}}
+    )
+
+
+def test_sweep_wall_painting_v1_matches_single_calculations():
+    base = _input()
+    axes = {"base": ["concrete", "plaster", "drywall", "painted_wall", "wallpaper_paintable"],
+            "quality": ["econom", "comfort", "premium"],
+            "waste_pct": [0, 5, 10, 15, 20, 30]}
+    sweep = sweep_wall_painting_v1({"area_m2": 42.5, "coats": 3}, axes, base["prices"])
+    assert sweep["fixed"] == {"area_m2": 42.5, "coats": 3}
+    assert len(sweep["rows"]) == 5 * 3 * 6
+
+    for row in sweep["rows"]:
+        cell = dict(zip(sweep["columns"], row))
+        expected = calc_wall_painting_v1(
+            {
+                "params": {"area_m2": 42.5, "coats": 3, "base": cell["base"],
+                           "quality": cell["quality"], "waste_pct": cell["waste_pct"]},
+                "prices": base["prices"],
+            }
+        )
+        assert cell["paint_l"] == expected["materials"]["paint_l"]
+        assert cell["primer_l"] == expected["materials"]["primer_l"]
+        assert cell["masking_tape_rolls"] == expected["materials"]["masking_tape_rolls"]
+        assert cell["labor_hours"] == expected["labor"]["hours"]
+        assert cell["total_cost"] == expected["cost"]["total_cost"]
+
+
+def test_sweep_wall_painting_v1_rejects_invalid_cell():
+    with pytest.raises(CalcInvalidInput):
+        sweep_wall_painting_v1({"area_m2": 10, "quality": "econom"}, {"base": ["concrete", "marble"]})
+
+
+def test_wall_painting_v1_many_out_of_range_values_match_scalar_without_warnings():
+    inputs = [_input(coats=2**70), _input(coats=-(2**70)), _input(area_m2=1e300)]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        batch = calc_wall_painting_v1_many(inputs)
+    for i, item in enumerate(inputs):
+        with pytest.raises(CalcInvalidInput) as exc:
+            calc_wall_painting_v1(item)
+        assert str(batch.errors[i]) == exc.value.message
+    assert str(batch.errors[0]) == "coats must be between 1 and 6"
+
+
+def test_wall_painting_v1_rejects_non_finite_and_huge_prices():
+    huge = _input()
+    huge["prices"]["paint_price_per_l"] = 1e13
+    nan = _input()
+    nan["prices"]["paint_price_per_l"] = float("nan")
+    batch = calc_wall_painting_v1_many([huge, nan])
+    assert str(batch.errors[0]) == "paint_price_per_l is too large"
+    assert str(batch.errors[1]) == "paint_price_per_l must be a finite number"
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import pytest
+
+from app.contracts.engine_v1.input import WorkUnit
+from app.domain.calc.engine_v1_skeleton import build_work_results
+from app.domain.calc.errors import CalcInvalidInput
+from app.domain.calc.work_graph import build_work_graph, run_work_graph
+
+_READY_PARAMS = {"wall_area_m2": 20, "layers": 2, "base_type": "putty"}
+
+
+def _unit(work_id: str, *deps: str, parameters: dict | None = None) -> WorkUnit:
+    return WorkUnit(
+        work_id=work_id,
+        calculation_profile_id="paint_walls_putty@v1",
+        parameters=_READY_PARAMS if parameters is None else parameters,
+        dependencies=list(deps),
+    )
+
+
+def test_work_graph_levels_and_unknown_dependencies():
+    graph = build_work_graph([_unit("c", "a", "b"), _unit("a"), _unit("b", "a", "ghost")])
+    assert graph.levels == ((1,), (2,), (0,))
+    assert graph.upstream[0] == (1, 2)
+    assert graph.unknown[2] == ("ghost",)
+
+
+def test_work_graph_cycle_is_rejected():
+    with pytest.raises(CalcInvalidInput, match="a, b"):
+        build_work_graph([_unit("a", "b"), _unit("b", "a"), _unit("c")])
+
+
+def test_deep_chain_without_recursion():
+    units = [_unit("w0")] + [_unit(f"w{i}", f"w{i - 1}") for i in range(1, 20_000)]
+    graph = build_work_graph(units)
+    depths = run_work_graph(graph, lambda i, upstream: max(upstream, default=-1) + 1)
+    assert len(graph.levels) == 20_000
+    assert depths[-1] == 19_999
+
+
+def test_run_work_graph_runs_each_unit_once_after_its_dependencies():
+    units = [_unit(f"branch{b}_{i}", f"branch{b}_{i - 1}" if i else "root") for b in range(3) for i in range(4)]
+    units.append(_unit("root"))
+    graph = build_work_graph(units)
+    calls: list[int] = []
+
+    def fn(index: int, upstream: tuple[int, ...]) -> int:
+        assert all(j in calls for j in graph.upstream[index])
+        calls.append(index)
+        return sum(upstream) + 1
+
+    results = run_work_graph(graph, fn)
+    assert sorted(calls) == list(range(len(units)))
+    assert results[3] == 5
+
+
+def test_build_work_results_propagates_blocked_dependencies():
+    units = [
+        _unit("finish", "paint"),
+        _unit("paint", "prep"),
+        _unit("prep", parameters={}),
+        _unit("other", "missing_work"),
+    ]
+    works, meta_warnings = build_work_results(units)
+    assert [work.work_id for work in works] == ["finish", "paint", "prep", "other"]
+    assert "DEPENDENCIES_NOT_READY:prep" in works[1].warnings
+    assert "DEPENDENCIES_NOT_READY:paint" in works[0].warnings
+    assert "DEPENDENCY_NOT_FOUND:missing_work" in works[3].warnings
+    assert "DEPENDENCY_NOT_FOUND:other:missing_work" in meta_warnings